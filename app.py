@@ -34,12 +34,29 @@ from models import db, Call, Patient, Transcript
 db.init_app(app)
 
 # Import and register blueprints
-from routes import call_routes, webhook_routes, api_routes, dashboard_routes
+from routes import call_routes, webhook_routes, api_routes, dashboard_routes, event_routes, asset_routes
 
 app.register_blueprint(call_routes.bp)
 app.register_blueprint(webhook_routes.bp)
 app.register_blueprint(api_routes.bp)
 app.register_blueprint(dashboard_routes.bp)
+app.register_blueprint(event_routes.bp)
+app.register_blueprint(asset_routes.bp)
+
+# Live event bus (Server-Sent Events)
+from services.event_bus import event_bus
+event_bus.init_app(app)
+
+# Fingerprinted static assets and JSON response compression
+from services import static_assets
+from services.compression import compressor
+static_assets.init_app(app)
+compressor.init_app(app)
+
+# Outbox workers for MemVerge, ApertureData and backend pushes
+from services.outbox import outbox, enabled_targets
+from services.circuit_breaker import breaker_states
+outbox.init_app(app)
 
 @app.route('/')
 def index():
@@ -49,10 +66,12 @@ def index():
 @app.route('/health')
 def health():
     """Health check endpoint"""
+    circuits = breaker_states(enabled_targets())
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if any(c['state'] != 'closed' for c in circuits.values()) else 'healthy',
         'service': 'telnyx-patient-intake-agent',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'circuits': circuits
     })
 
 @app.errorhandler(404)
@@ -82,6 +101,10 @@ if __name__ == '__main__':
         db.create_all()
         logger.info("Database tables created")
     
+    # Deliver pushes left in the outbox by a previous run
+    if Config.OUTBOX_WORKERS_ENABLED:
+        outbox.start()
+    
     # Run the application
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_ENV') == 'development')
@@ -38,12 +38,30 @@ from storage_integration import StorageIntegration
 storage = StorageIntegration()
 
 # Import and register blueprints
-from routes import call_routes, webhook_routes, api_routes, dashboard_routes
+from routes import call_routes, webhook_routes, api_routes, dashboard_routes, event_routes, asset_routes
+from routes.api_routes import parse_timestamp
 
 app.register_blueprint(call_routes.bp)
 app.register_blueprint(webhook_routes.bp)
 app.register_blueprint(api_routes.bp)
 app.register_blueprint(dashboard_routes.bp)
+app.register_blueprint(event_routes.bp)
+app.register_blueprint(asset_routes.bp)
+
+# Live event bus (Server-Sent Events)
+from services.event_bus import event_bus
+event_bus.init_app(app)
+
+# Fingerprinted static assets and JSON response compression
+from services import static_assets
+from services.compression import compressor
+static_assets.init_app(app)
+compressor.init_app(app)
+
+# Outbox workers for MemVerge, ApertureData and backend pushes
+from services.outbox import outbox, enabled_targets
+from services.circuit_breaker import breaker_states
+outbox.init_app(app)
 
 
 @app.route('/')
@@ -56,8 +74,9 @@ def index():
 @app.route('/healthz')
 def health():
     """Health check endpoint"""
+    circuits = breaker_states(enabled_targets())
     return jsonify({
-        'status': 'healthy',
+        'status': 'degraded' if any(c['state'] != 'closed' for c in circuits.values()) else 'healthy',
         'service': 'telnyx-patient-intake-agent',
         'version': '1.1.0',
         'enhanced': True,
@@ -66,7 +85,8 @@ def health():
             'memverge': os.getenv('MEMVERGE_ENABLED', 'false').lower() == 'true',
             'aperturedata': os.getenv('APERTUREDATA_ENABLED', 'false').lower() == 'true',
             'backend_api': bool(os.getenv('BACKEND_API_URL'))
-        }
+        },
+        'circuits': circuits
     })
 
 
@@ -113,11 +133,36 @@ def test_storage():
 
 @app.route('/api/intake-notes', methods=['GET'])
 def get_intake_notes():
-    """Get all locally stored intake notes"""
+    """
+    Get locally stored intake notes, newest first
+    
+    Query parameters:
+        call_id: Only notes for this call
+        since, until: ISO 8601 bounds on when the note was saved
+        offset: Number of notes to skip (default: 0)
+        limit: Page size (default: 50, max: 500)
+    """
     try:
-        notes = storage.get_all_intake_notes()
+        since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        until = parse_timestamp(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'since and until must be ISO 8601 timestamps'}), 400
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    
+    try:
+        total, notes = storage.get_intake_notes_page(
+            call_id=request.args.get('call_id'),
+            since=since,
+            until=until,
+            offset=offset,
+            limit=limit
+        )
         return jsonify({
             'count': len(notes),
+            'total': total,
+            'offset': offset,
+            'limit': limit,
             'notes': notes
         }), 200
     except Exception as e:
@@ -162,6 +207,10 @@ if __name__ == '__main__':
         db.create_all()
         logger.info("Database tables created")
     
+    # Deliver pushes left in the outbox by a previous run
+    if Config.OUTBOX_WORKERS_ENABLED:
+        outbox.start()
+    
     # Log storage configuration
     logger.info(f"Storage configuration:")
     logger.info(f"  - Local JSON: Enabled (data/)")
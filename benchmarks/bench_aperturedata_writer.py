@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Benchmark ApertureData write throughput by transaction size and pipeline depth
+Writes calls to the local protocol stand-in with a simulated round-trip
+latency and reports calls per second for each setting.
+Usage: python benchmarks/bench_aperturedata_writer.py [--calls 2000] [--latency-ms 5]
+       [--transaction-sizes 1,5,20,50] [--depths 1,4]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.aperturedata_client import ApertureDataWriter
+from services.aperturedata_standin import ApertureDataStandIn
+
+TRANSCRIPT = [{'sequence': i, 'speaker': 'patient', 'text': 'It started two days ago'} for i in range(20)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=5, help='Simulated round trip per transaction')
+    parser.add_argument('--transaction-sizes', default='1,5,20,50')
+    parser.add_argument('--depths', default='1,4')
+    parser.add_argument('--write-size', type=int, default=100, help='Calls per write (outbox batch)')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{args.calls} calls in writes of {args.write_size}, round trip {args.latency_ms:.0f} ms")
+    print(f"{'txn size':>8} {'depth':>6} {'calls/s':>9} {'transactions':>13}")
+    for size in (int(n) for n in args.transaction_sizes.split(',')):
+        for depth in (int(n) for n in args.depths.split(',')):
+            standin = ApertureDataStandIn(latency=args.latency_ms / 1000)
+            host, port = standin.start()
+            writer = ApertureDataWriter(host=host, port=port, username='admin', password='',
+                                        transaction_size=size, pipeline_depth=depth, connections=1)
+            items = [(f'bench:{size}:{depth}:{i}', {'id': i, 'status': 'completed'}, TRANSCRIPT)
+                     for i in range(args.calls)]
+
+            start = time.perf_counter()
+            for offset in range(0, len(items), args.write_size):
+                acks = writer.write(items[offset:offset + args.write_size])
+                assert all(accepted for accepted, _ in acks.values())
+            elapsed = time.perf_counter() - start
+
+            print(f"{size:>8} {depth:>6} {args.calls / elapsed:>9.0f} {standin.transactions:>13}")
+            writer.close()
+            standin.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Benchmark the columnar archive export against JSON lines
+Fills a SQLite file with calls spread over 30 days, each with transcript
+segments and intake answers, then exports every table as:
+  parquet-<codec> - services.archive_export (day-partitioned Parquet)
+  jsonl / jsonl.gz - the same streamed rows written as JSON lines
+and reports rows per second and output size.
+Usage: python benchmarks/bench_archive_export.py [--calls 5000] [--segments 20] [--codecs zstd,snappy]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from models import db, Call, IntakeAnswer, Transcript
+from services.archive_export import TABLES, ArchiveExporter
+
+PHRASES = ['It started two days ago', 'The pain is worse at night', 'No allergies that I know of',
+           'My father had high blood pressure', 'About a seven out of ten', 'I take ibuprofen sometimes']
+
+
+def populate(calls, segments):
+    start = datetime(2026, 1, 1)
+    for first in range(1, calls + 1, 1000):
+        call_rows, transcript_rows, answer_rows = [], [], []
+        for call_id in range(first, min(first + 1000, calls + 1)):
+            created = start + timedelta(minutes=random.randrange(30 * 24 * 60))
+            call_rows.append({'id': call_id, 'call_control_id': f'cc_{call_id}', 'status': 'completed',
+                              'direction': 'outbound', 'from_number': '+15550100000',
+                              'to_number': f'+1555{call_id:07d}', 'consent_given': True,
+                              'consent_timestamp': created, 'started_at': created, 'ended_at': created,
+                              'duration_seconds': random.randrange(60, 900), 'version': 1,
+                              'intake_data': json.dumps({'hpi': {'pain_level': random.randrange(11)}}),
+                              'created_at': created, 'updated_at': created})
+            transcript_rows += [{'call_id': call_id, 'sequence': i, 'speaker': ('agent', 'patient')[i % 2],
+                                 'text': random.choice(PHRASES), 'confidence': random.random(), 'is_final': True,
+                                 'timestamp': created, 'created_at': created} for i in range(segments)]
+            answer_rows += [{'call_id': call_id, 'section': 'hpi', 'question_key': key,
+                             'value': str(random.randrange(11)), 'numeric_value': None, 'answered_at': created}
+                            for key in ('pain_level', 'symptom_duration', 'onset')]
+        db.session.execute(db.insert(Call), call_rows)
+        db.session.execute(db.insert(Transcript), transcript_rows)
+        db.session.execute(db.insert(IntakeAnswer), answer_rows)
+        db.session.commit()
+
+
+def export_jsonl(output, compress):
+    """The same streamed rows as JSON lines, one file per table"""
+    total_rows, total_bytes = 0, 0
+    for name, spec in TABLES.items():
+        keys = [column.key for column in spec['columns']]
+        query = db.select(*spec['columns'])
+        if 'join' in spec:
+            query = query.join(*spec['join'])
+        path = os.path.join(output, f'{name}.jsonl' + ('.gz' if compress else ''))
+        with (gzip.open(path, 'wt') if compress else open(path, 'w')) as f:
+            for batch in db.session.execute(query.execution_options(yield_per=10000)).partitions():
+                f.writelines(json.dumps(dict(zip(keys, row)), default=str) + '\n' for row in batch)
+                total_rows += len(batch)
+        total_bytes += os.path.getsize(path)
+    return total_rows, total_bytes
+
+
+def export_parquet(output, codec):
+    results = ArchiveExporter(output, compression=codec).export(full=True)
+    return sum(r['rows'] for r in results.values()), sum(r['bytes'] for r in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--segments', type=int, default=20, help='Transcript segments per call')
+    parser.add_argument('--codecs', default='zstd,snappy')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            populate(args.calls, args.segments)
+
+            runs = [(f'parquet-{codec}', lambda out, codec=codec: export_parquet(out, codec))
+                    for codec in args.codecs.split(',')]
+            runs += [('jsonl', lambda out: export_jsonl(out, False)), ('jsonl.gz', lambda out: export_jsonl(out, True))]
+            print(f"{args.calls} calls, {args.segments} segments each, 30 days")
+            print(f"{'format':>15} {'rows':>9} {'rows/s':>9} {'size MB':>8}")
+            for label, run in runs:
+                output = os.path.join(tmp, label)
+                os.makedirs(output)
+                db.session.expunge_all()
+                start = time.perf_counter()
+                rows, size = run(output)
+                elapsed = time.perf_counter() - start
+                print(f"{label:>15} {rows:>9} {rows / elapsed:>9.0f} {size / 2 ** 20:>8.2f}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Benchmark per-call vs micro-batched backend pushes through the outbox
+Enqueues completed calls at a steady rate while outbox workers deliver them
+to a local stub receiver with fixed per-request latency, then reports the
+requests sent and the enqueue-to-delivery delay.
+Usage: python benchmarks/bench_backend_batching.py [--calls 1000] [--rate 200] [--latency-ms 20]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from config import Config
+from models import db, Call, OutboxJob
+from services.outbox import Outbox
+from services.circuit_breaker import reset_breakers
+
+
+def stub_receiver(latency):
+    """Backend stub: acknowledges every item of a batch, or a single push, after latency seconds"""
+    counts = {'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            with lock:
+                counts['requests'] += 1
+            time.sleep(latency)
+            if isinstance(body, list):
+                reply = {'results': [{'idempotency_key': item['idempotency_key'], 'ok': True} for item in body]}
+            else:
+                reply = {'ok': True}
+            data = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', counts
+
+
+def run(batched, args, url, counts):
+    Config.BACKEND_BATCH_ENABLED = batched
+    Config.BACKEND_API_URL = url
+    reset_breakers()
+    counts['requests'] = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            outbox = Outbox()
+            outbox.start(app)
+
+            start = time.perf_counter()
+            for i in range(args.calls):
+                call = Call(call_control_id=f'cc_{i}', status='completed')
+                db.session.add(call)
+                db.session.flush()
+                outbox.enqueue_push(call, [{'speaker': 'patient', 'text': 'It started two days ago'}])
+                db.session.commit()
+                outbox.wake()
+                time.sleep(max(0.0, start + (i + 1) / args.rate - time.perf_counter()))
+
+            while OutboxJob.query.filter(OutboxJob.status != 'delivered').count():
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            outbox.stop(5)
+            delivery = outbox.delivery_stats()['backend']
+            db.session.remove()
+
+    name = 'batched' if batched else 'per-call'
+    print(f"{name:<9} {counts['requests']:>6} requests ({counts['requests'] / elapsed:>6.1f}/s)   "
+          f"{delivery['requests_saved']:>6} saved   "
+          f"delay p50 {delivery['delay_p50_seconds'] * 1000:>7.1f} ms   "
+          f"p95 {delivery['delay_p95_seconds'] * 1000:>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=200, help='Completed calls per second')
+    parser.add_argument('--latency-ms', type=float, default=20, help='Receiver latency per request')
+    parser.add_argument('--max-items', type=int, default=50)
+    parser.add_argument('--max-delay-ms', type=float, default=100)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    server, url, counts = stub_receiver(args.latency_ms / 1000)
+    Config.OUTBOX_WORKERS_ENABLED = True
+    Config.OUTBOX_POLL_INTERVAL = 0.05
+    Config.MEMVERGE_ENABLED = False
+    Config.APERTUREDATA_ENABLED = False
+    Config.BACKEND_BATCH_MAX_ITEMS = args.max_items
+    Config.BACKEND_BATCH_MAX_DELAY_MS = args.max_delay_ms
+
+    print(f"{args.calls} calls at {args.rate:.0f}/s, receiver latency {args.latency_ms:.0f} ms, "
+          f"batches of up to {args.max_items} or {args.max_delay_ms:.0f} ms")
+    run(False, args, url, counts)
+    run(True, args, url, counts)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
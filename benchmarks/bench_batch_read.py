@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark reading many calls one resource at a time against the batch endpoint
+Stores calls with intake data and transcript segments in a SQLite file, then
+reads call, intake data and transcripts for the first N calls through the
+Flask test client two ways and reports the time and SQL statements issued:
+  per-call - GET /api/calls/<id>, /intake-data and /transcripts for each call
+  batch    - GET /api/calls/batch?ids=... (following next_ids)
+The response cache is disabled so both read from the database.
+Usage: python benchmarks/bench_batch_read.py [--calls 10,50,100] [--segments 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy import event
+from config import Config
+from models import db, Call, Transcript
+from routes import api_routes, call_routes
+from services.response_cache import response_cache
+
+INTAKE = '{"hpi": {"chief_complaint": {"value": "Headache for two days"}, "pain_level": {"value": "7"}}}'
+
+
+def per_call(client, ids):
+    for call_id in ids:
+        for path in (f'/api/calls/{call_id}', f'/api/calls/{call_id}/intake-data', f'/api/calls/{call_id}/transcripts'):
+            assert client.get(path).status_code == 200
+
+
+def batch(client, ids):
+    while ids:
+        data = client.get(f"/api/calls/batch?ids={','.join(map(str, ids))}").get_json()
+        ids = data['next_ids']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', default='10,50,100', help='Calls read per run')
+    parser.add_argument('--segments', type=int, default=20, help='Transcript segments per call')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    Config.RESPONSE_CACHE_TTL = 0
+    Config.TIERING_ENABLED = False
+    counts = [int(n) for n in args.calls.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        app.register_blueprint(api_routes.bp)
+        app.register_blueprint(call_routes.bp)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            now = datetime.utcnow()
+            db.session.execute(db.insert(Call), [
+                {'id': i, 'call_control_id': f'cc_{i}', 'status': 'completed', 'intake_data': INTAKE,
+                 'consent_given': True, 'version': 1, 'created_at': now, 'updated_at': now}
+                for i in range(1, max(counts) + 1)
+            ])
+            db.session.execute(db.insert(Transcript), [
+                {'call_id': i, 'speaker': 'patient', 'sequence': s, 'text': 'It started two days ago',
+                 'timestamp': now, 'created_at': now}
+                for i in range(1, max(counts) + 1) for s in range(args.segments)
+            ])
+            db.session.commit()
+            engine = db.engine
+
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(1))
+        print(f"{'calls':>6}   {'per-call ms':>11} {'requests':>9} {'queries':>8}   {'batch ms':>8} {'queries':>8}")
+        for count in counts:
+            ids = list(range(1, count + 1))
+            results = []
+            for read in (per_call, batch):
+                response_cache.clear()
+                statements.clear()
+                start = time.perf_counter()
+                read(client, ids)
+                results.append(((time.perf_counter() - start) * 1000, len(statements)))
+            (single_ms, single_queries), (batch_ms, batch_queries) = results
+            print(f"{count:>6}   {single_ms:>11.1f} {count * 3:>9} {single_queries:>8}   "
+                  f"{batch_ms:>8.1f} {batch_queries:>8}")
+
+
+if __name__ == '__main__':
+    main()
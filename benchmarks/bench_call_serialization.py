@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark call list serialization for the detail and summary views
+Usage: python benchmarks/bench_call_serialization.py [--rows 10000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from sqlalchemy.orm import load_only
+from models import db, Call
+
+INTAKE = {
+    'consent_given': True,
+    'hpi': {key: {'value': '3', 'timestamp': datetime.utcnow().isoformat()}
+            for key in ('chief_complaint', 'symptom_duration', 'pain_level')},
+    'ample': {key: {'value': '2', 'timestamp': datetime.utcnow().isoformat()}
+              for key in ('allergies', 'medications', 'past_medical_history', 'last_meal')},
+    'family_history': {key: {'value': '2', 'timestamp': datetime.utcnow().isoformat()}
+                       for key in ('heart_disease', 'diabetes', 'cancer')}
+}
+
+
+def seed(count):
+    """Insert completed calls with intake data"""
+    now = datetime.utcnow()
+    db.session.execute(Call.__table__.insert(), [
+        {
+            'status': 'completed',
+            'to_number': '+12025550000',
+            'from_number': '+12025551111',
+            'started_at': now - timedelta(minutes=i),
+            'duration_seconds': 120,
+            'intake_data': json.dumps(INTAKE),
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def page(fields):
+    """Load and serialize one page of calls, as /api/calls does"""
+    db.session.expunge_all()
+    calls = Call.query.options(load_only(*Call.load_columns(fields))).order_by(
+        Call.created_at.desc()
+    ).all()
+    return json.dumps({'calls': [c.to_dict(fields) for c in calls], 'total': len(calls)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark call serialization')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+
+        for view in ('detail', 'summary'):
+            fields = Call.resolve_fields(view=view)
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                body = page(fields)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{view:<8} {best * 1000:8.1f} ms  {args.rows / best:10.0f} rows/s  {len(body) / 1024:8.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
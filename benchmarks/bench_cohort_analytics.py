@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmark cohort analytics against per-row JSON parsing
+Usage: python benchmarks/bench_cohort_analytics.py [--intakes 100000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from models import db, Call, IntakeAnswer
+from services import cohort_analytics
+
+SECTIONS = {
+    'symptom_duration': 'hpi',
+    'pain_level': 'hpi',
+    'last_meal': 'ample',
+    'heart_disease': 'family_history',
+    'diabetes': 'family_history',
+    'cancer': 'family_history'
+}
+
+
+def seed(count):
+    """Insert completed calls with both the JSON blob and normalized answers"""
+    rng = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=90)
+    calls = []
+    answers = []
+    for call_id in range(1, count + 1):
+        intake = {'hpi': {}, 'ample': {}, 'family_history': {}}
+        for key, codes in cohort_analytics.COLUMNS.items():
+            intake[SECTIONS[key]][key] = {'value': str(rng.choice(codes))}
+        calls.append({
+            'id': call_id,
+            'status': 'completed',
+            'started_at': start + timedelta(seconds=call_id * 60),
+            'intake_data': json.dumps(intake)
+        })
+        for key, codes in cohort_analytics.COLUMNS.items():
+            value = intake[SECTIONS[key]][key]['value']
+            answers.append({
+                'call_id': call_id,
+                'section': SECTIONS[key],
+                'question_key': key,
+                'value': value,
+                'numeric_value': float(value)
+            })
+    db.session.execute(Call.__table__.insert(), calls)
+    db.session.execute(IntakeAnswer.__table__.insert(), answers)
+    db.session.commit()
+
+
+def naive_pain_histogram():
+    """Baseline: load every call and parse intake_data per row"""
+    counts = {}
+    for call in Call.query.all():
+        value = call.get_intake_data().get('hpi', {}).get('pain_level', {}).get('value')
+        if value is not None:
+            counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<40} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cohort analytics')
+    parser.add_argument('--intakes', type=int, default=100000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        timed(f"seed {args.intakes} intakes", lambda: seed(args.intakes))
+
+        timed("naive: parse intake_data per call", naive_pain_histogram)
+        db.session.expunge_all()
+
+        cache = timed("columnar: initial load", cohort_analytics.get_cache)
+        timed("columnar: summarize + crosstab", lambda: cohort_analytics.summarize(
+            cache, crosstab_pair=('symptom_duration', 'pain_level')))
+        timed("columnar: refresh (no new calls)", cohort_analytics.get_cache)
+        print(f"cached arrays: {cache.values.nbytes + cache.call_ids.nbytes + cache.started_at.nbytes} bytes")
+
+
+if __name__ == '__main__':
+    main()
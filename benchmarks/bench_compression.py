@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Benchmark at-rest compression of intake notes and transcripts
+Reports compression ratio and encode/decode throughput for each codec, with
+and without a dictionary trained on earlier records.
+Usage: python benchmarks/bench_compression.py [--records 2000] [--level 3]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.record_codec import RecordCodec, train_dictionary, zstandard
+
+COMPLAINTS = ['chest pain', 'headache', 'shortness of breath', 'abdominal pain', 'dizziness', 'back pain']
+PHRASES = ['I have had this for about', 'It started', 'The pain gets worse when', 'I take',
+           'No known allergies', 'My father had', 'I last ate', 'On a scale of one to ten it is']
+
+
+def intake_record(i):
+    """An intake note shaped like IntakeNoteService output"""
+    ts = (datetime(2024, 1, 1) + timedelta(minutes=i)).isoformat()
+    field = lambda value: {'value': value, 'timestamp': ts}
+    return {
+        'call_id': f'v3:{random.getrandbits(64):016x}',
+        'consent_given': True,
+        'hpi': {'chief_complaint': field(random.choice(COMPLAINTS)),
+                'symptom_duration': field(f'{random.randint(1, 14)} days'),
+                'pain_level': field(str(random.randint(1, 10)))},
+        'ample': {key: field(random.choice(['none', 'yes', 'ibuprofen', 'lisinopril']))
+                  for key in ('allergies', 'medications', 'past_medical_history', 'last_meal')},
+        'family_history': {key: field(random.choice(['yes', 'no']))
+                           for key in ('heart_disease', 'diabetes', 'cancer')},
+        'completed_at': ts
+    }
+
+
+def transcript_record(i):
+    """A transcript: a list of timestamped utterances"""
+    start = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return [{'speaker': 'patient' if n % 2 else 'agent',
+             'text': f'{random.choice(PHRASES)} {random.choice(COMPLAINTS)} {random.randint(1, 99)}',
+             'timestamp': (start + timedelta(seconds=5 * n)).isoformat()}
+            for n in range(random.randint(10, 40))]
+
+
+def measure(label, codec, records):
+    """Compress then decompress every record, checking the roundtrip"""
+    for record in records:
+        assert codec.decompress(codec.compress(record)) == record
+    stats = codec.stats()
+    print(f"{label:<22} ratio {stats['ratio']:>5.2f}x   "
+          f"encode {stats['encode_mb_per_second']:>7.1f} MB/s   decode {stats['decode_mb_per_second']:>7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--level', type=int, default=3)
+    parser.add_argument('--dictionary-size', type=int, default=16384)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    random.seed(0)
+
+    codecs = ['zlib'] + (['zstd'] if zstandard is not None else [])
+    for kind, make in (('intake', intake_record), ('transcript', transcript_record)):
+        # Train on one set of records and measure on another, as in production
+        encode = lambda r: json.dumps(r, separators=(',', ':')).encode('utf-8')
+        training = [encode(make(i)) for i in range(args.records)]
+        records = [encode(make(i)) for i in range(args.records, 2 * args.records)]
+        indented = [json.dumps(json.loads(r), indent=2).encode('utf-8') for r in records]
+        average = sum(map(len, records)) / len(records)
+        print(f"\n{kind}: {len(records)} records, {average:,.0f} bytes compact "
+              f"({sum(map(len, indented)) / len(records):,.0f} indented)")
+
+        for name in codecs:
+            measure(f'{name} indented file', RecordCodec(name, args.level), indented)
+            measure(f'{name} record', RecordCodec(name, args.level), records)
+            dictionary = train_dictionary(training, name, args.dictionary_size)
+            measure(f'{name} record + dict', RecordCodec(name, args.level, dictionary), records)
+
+
+if __name__ == '__main__':
+    main()
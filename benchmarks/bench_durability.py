@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark write latency and throughput for each local storage durability mode
+Usage: python benchmarks/bench_durability.py [--threads 8] [--writes 100] [--dir /path/on/real/disk]
+
+Run against the filesystem you deploy on; fsync on tmpfs is free and meaningless.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.durability import AtomicFileWriter, DURABILITY_MODES
+from services.segment_log import SegmentLog
+
+RECORD = {'consent_given': True, 'hpi': {'pain_level': {'value': '7'}}, 'notes': 'x' * 1500}
+
+
+def run(write, threads, writes):
+    """Call write(thread, i) from concurrent threads; returns (seconds, per-write latencies)"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(thread):
+        mine = []
+        for i in range(writes):
+            start = time.perf_counter()
+            write(thread, i)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(backend, mode, seconds, latencies):
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+
+    print(f"{backend:<9} {mode:<10} {len(latencies) / seconds:>9,.0f} writes/s   "
+          f"p50 {pct(50):>7.2f} ms   p99 {pct(99):>7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=100, help='Writes per thread')
+    parser.add_argument('--window-ms', type=float, default=0)
+    parser.add_argument('--dir', default=None, help='Directory on the filesystem to test')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    payload = repr(RECORD).encode('utf-8')
+
+    for mode in DURABILITY_MODES:
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            writer = AtomicFileWriter(mode=mode, window=args.window_ms / 1000)
+            seconds, latencies = run(
+                lambda t, i: writer.write(os.path.join(tmp, f'intake_{t}_{i}.json'), payload),
+                args.threads, args.writes
+            )
+            report('json', mode, seconds, latencies)
+
+    for mode in DURABILITY_MODES:
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            log = SegmentLog(tmp, durability=mode, group_window=args.window_ms / 1000)
+            seconds, latencies = run(
+                lambda t, i: log.append('intake', f'call_{t}_{i}', RECORD),
+                args.threads, args.writes
+            )
+            report('segments', mode, seconds, latencies)
+            log.close()
+
+
+if __name__ == '__main__':
+    main()
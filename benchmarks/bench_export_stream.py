@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark peak memory of the streaming NDJSON export against a buffered listing
+Fills a SQLite file with calls that carry intake data, then reads them all
+through the Flask test client two ways and reports the peak Python heap
+(tracemalloc), the time taken and calls per second:
+  buffered - GET /api/calls?limit=N (one JSON document built in memory)
+  streamed - GET /api/export/calls (NDJSON from a yield_per cursor)
+Usage: python benchmarks/bench_export_stream.py [--calls 10000,50000,100000]
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from models import db, Call
+from routes import api_routes, call_routes
+
+INTAKE = json.dumps({
+    'hpi': {'chief_complaint': {'value': 'Headache for two days, worse at night'}, 'pain_level': {'value': '7'}},
+    'ample': {'allergies': {'value': 'None known'}, 'medications': {'value': 'Ibuprofen as needed'}},
+    'family_history': {'heart_disease': {'value': 'Father'}}
+})
+
+
+def measure(client, url):
+    """Read the whole response body in chunks; returns (peak MB, seconds, bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', default='10000,50000,100000', help='Table sizes to test')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        app.register_blueprint(api_routes.bp)
+        app.register_blueprint(call_routes.bp)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+        total = 0
+        print(f"{'calls':>7} {'body MB':>8}   "
+              f"{'buffered peak':>14} {'calls/s':>8}   {'streamed peak':>14} {'calls/s':>8}")
+        for count in (int(n) for n in args.calls.split(',')):
+            with app.app_context():
+                now = datetime.utcnow()
+                db.session.execute(db.insert(Call), [
+                    {'call_control_id': f'cc_{i}', 'status': 'completed', 'consent_given': True,
+                     'to_number': '+12025551234', 'intake_data': INTAKE, 'version': 1,
+                     'started_at': now, 'created_at': now, 'updated_at': now}
+                    for i in range(total, count)
+                ])
+                db.session.commit()
+            total = count
+
+            buffered_mb, buffered_s, _ = measure(client, f'/api/calls?limit={count}')
+            streamed_mb, streamed_s, size = measure(client, '/api/export/calls')
+            print(f"{count:>7} {size / 2 ** 20:>8.1f}   {buffered_mb:>11.1f} MB {count / buffered_s:>8.0f}   "
+                  f"{streamed_mb:>11.1f} MB {count / streamed_s:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
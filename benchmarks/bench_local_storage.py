@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark local call persistence: one JSON file per record vs the segment log
+Usage: python benchmarks/bench_local_storage.py [--calls 2000] [--reads 2000]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import storage_integration
+from storage_integration import LocalJSONStorage, SegmentLogStorage
+
+INTAKE = {
+    'consent_given': True,
+    'hpi': {key: {'value': '3', 'timestamp': datetime.utcnow().isoformat()}
+            for key in ('chief_complaint', 'symptom_duration', 'pain_level')},
+    'ample': {key: {'value': '2', 'timestamp': datetime.utcnow().isoformat()}
+              for key in ('allergies', 'medications', 'past_medical_history', 'last_meal')},
+    'family_history': {key: {'value': '2', 'timestamp': datetime.utcnow().isoformat()}
+                       for key in ('heart_disease', 'diabetes', 'cancer')}
+}
+TRANSCRIPT = [{'text': f'Segment {i} of the patient conversation', 'timestamp': datetime.utcnow().isoformat()}
+              for i in range(20)]
+METADATA = {'status': 'completed', 'to_number': '+12025550000', 'duration_seconds': 180}
+
+
+def write_calls(storage, calls):
+    """Save intake note, transcript and metadata for each call"""
+    start = time.perf_counter()
+    for i in range(calls):
+        call_id = f'call_{i}'
+        storage.save_intake_note(call_id, dict(INTAKE, call_id=call_id))
+        storage.save_transcript(call_id, TRANSCRIPT)
+        storage.save_call_metadata(call_id, dict(METADATA, id=call_id))
+    return time.perf_counter() - start
+
+
+def read_notes(entries, read, reads):
+    """Read random intake notes by index entry"""
+    sample = [random.choice(entries) for _ in range(reads)]
+    start = time.perf_counter()
+    for entry in sample:
+        read(entry)
+    return time.perf_counter() - start
+
+
+def report(name, calls, reads, write_seconds, read_seconds, list_seconds, files):
+    print(f"{name:<10} write {calls * 3 / write_seconds:>9,.0f} records/s   "
+          f"random read {reads / read_seconds:>9,.0f} notes/s   "
+          f"list dir {list_seconds * 1000:>6.2f} ms ({files} files)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / 'json'
+        data_dir.mkdir()
+        storage_integration.DATA_DIR = data_dir
+        storage = LocalJSONStorage()
+        write_seconds = write_calls(storage, args.calls)
+        index = storage_integration.get_intake_index()
+        read_seconds = read_notes(index.find(), index.read, args.reads)
+        start = time.perf_counter()
+        files = len(os.listdir(data_dir))
+        report('json', args.calls, args.reads, write_seconds, read_seconds, time.perf_counter() - start, files)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SegmentLogStorage(Path(tmp) / 'segments')
+        write_seconds = write_calls(storage, args.calls)
+        read_seconds = read_notes(storage.find_intake_notes(), storage.log.read, args.reads)
+        start = time.perf_counter()
+        files = sum(len(files) for _, _, files in os.walk(storage.log.root))
+        report('segments', args.calls, args.reads, write_seconds, read_seconds, time.perf_counter() - start, files)
+        storage.log.close()
+
+
+if __name__ == '__main__':
+    main()
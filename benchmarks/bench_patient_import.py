@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Benchmark bulk patient import against one-at-a-time creation
+Writes a CSV roster (10% of the numbers already on file, 1% invalid rows) and
+loads it into a SQLite file two ways, reporting patients per second:
+  per-row - what POST /api/patients does for each patient: existence check,
+            insert, commit (run on the first --per-row-rows rows only)
+  bulk    - services.patient_import: streamed, one IN query and one
+            executemany insert per batch
+Usage: python benchmarks/bench_patient_import.py [--rows 100000] [--batch-sizes 500,1000,5000]
+"""
+
+import argparse
+import csv
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from models import db, Patient
+from services.patient_import import PatientImporter, iter_csv_records, normalize_phone, parse_record
+
+FORMATS = ['({a}) {b}-{c}', '{a}-{b}-{c}', '{a}.{b}.{c}', '+1 {a} {b} {c}', '1{a}{b}{c}']
+
+
+def write_roster(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['phone', 'first_name', 'last_name', 'email', 'dob'])
+        for i in range(rows):
+            number = f'{2020000000 + i:010d}'
+            phone = random.choice(FORMATS).format(a=number[:3], b=number[3:6], c=number[6:])
+            if i % 100 == 99:
+                phone = 'unknown'
+            writer.writerow([phone, f'First{i}', f'Last{i}', f'patient{i}@example.com',
+                             f'19{random.randrange(30, 99)}-0{random.randrange(1, 10)}-1{random.randrange(10)}'])
+
+
+def preload(rows):
+    """Put every tenth number on file already"""
+    db.session.execute(db.insert(Patient), [
+        {'phone_number': normalize_phone(f'{2020000000 + i:010d}'), 'first_name': 'Existing'}
+        for i in range(0, rows, 10)
+    ])
+    db.session.commit()
+
+
+def per_row(path, limit):
+    inserted = 0
+    with open(path, newline='') as f:
+        for row_number, record in iter_csv_records(f):
+            if row_number - 1 > limit:
+                break
+            try:
+                values = parse_record(record)
+            except ValueError:
+                continue
+            if Patient.query.filter_by(phone_number=values['phone_number']).first():
+                continue
+            db.session.add(Patient(**values))
+            db.session.commit()
+            inserted += 1
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--per-row-rows', type=int, default=2000, help='Rows loaded one at a time for comparison')
+    parser.add_argument('--batch-sizes', default='500,1000,5000')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    random.seed(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster = os.path.join(tmp, 'roster.csv')
+        write_roster(roster, args.rows)
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        with app.app_context():
+            print(f"{args.rows} rows, {os.path.getsize(roster) / 2 ** 20:.1f} MB CSV")
+            print(f"{'method':>16} {'rows':>8} {'inserted':>9} {'seconds':>8} {'rows/s':>9}")
+            db.create_all()
+            preload(args.rows)
+            start = time.perf_counter()
+            inserted = per_row(roster, args.per_row_rows)
+            elapsed = time.perf_counter() - start
+            print(f"{'per-row':>16} {args.per_row_rows:>8} {inserted:>9} {elapsed:>8.2f} "
+                  f"{args.per_row_rows / elapsed:>9.0f}")
+
+            for batch_size in (int(n) for n in args.batch_sizes.split(',')):
+                db.drop_all()
+                db.create_all()
+                preload(args.rows)
+                start = time.perf_counter()
+                with open(roster, newline='') as f:
+                    result = PatientImporter(batch_size=batch_size).import_stream(f, 'csv')
+                elapsed = time.perf_counter() - start
+                print(f"{f'bulk ({batch_size})':>16} {result['rows']:>8} {result['inserted']:>9} {elapsed:>8.2f} "
+                      f"{result['rows'] / elapsed:>9.0f}")
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main()
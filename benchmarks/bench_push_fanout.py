@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Benchmark sequential vs concurrent pushes to the external storage targets
+Starts local stub servers for MemVerge, ApertureData and the backend API with
+injected latency, then times one call's fan-out each way.
+Usage: python benchmarks/bench_push_fanout.py [--latency-ms 80,150,250] [--calls 20]
+
+ApertureData has no HTTP API in this tree (the push is a placeholder for its
+client), so the benchmark swaps in a push that makes one round trip to its stub.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from services.storage_service import StorageService
+
+CALL = {'id': 1, 'status': 'completed', 'created_at': '2024-01-01T00:00:00'}
+TRANSCRIPT = [{'speaker': 'patient', 'text': 'It started two days ago'}] * 20
+
+
+def stub_server(latency):
+    """Start an HTTP server that answers every POST with {"id": ...} after latency seconds"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            body = json.dumps({'id': 'stub'}).encode()
+            self.send_response(201)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def sequential(call_data, transcript_data):
+    """The previous push_all: one target after another"""
+    return {
+        'memverge_id': StorageService.push_to_memverge(call_data, transcript_data),
+        'aperturedata_id': StorageService.push_to_aperturedata(call_data, transcript_data),
+        'backend_pushed': StorageService.push_to_backend(call_data, transcript_data)
+    }
+
+
+def measure(name, push, calls):
+    push(CALL, TRANSCRIPT)  # Warm up connections and the pool
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        push(CALL, TRANSCRIPT)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{name:<12} median {statistics.median(timings):>7.1f} ms   max {max(timings):>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency-ms', default='80,150,250', help='MemVerge,ApertureData,backend latency')
+    parser.add_argument('--calls', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    latencies = [float(ms) / 1000 for ms in args.latency_ms.split(',')]
+
+    servers = [stub_server(latency) for latency in latencies]
+    memverge_url, aperturedata_url, backend_url = (url for _, url in servers)
+    Config.MEMVERGE_ENABLED = True
+    Config.MEMVERGE_ENDPOINT = memverge_url
+    Config.APERTUREDATA_ENABLED = True
+    Config.BACKEND_API_URL = backend_url
+
+    def push_to_aperturedata(call_data, transcript_data, idempotency_key=None):
+        requests.post(aperturedata_url, json={'properties': call_data, 'transcripts': transcript_data},
+                      timeout=Config.STORAGE_PUSH_TIMEOUT)
+        return f"aperture_{call_data.get('id')}"
+    StorageService.push_to_aperturedata = staticmethod(push_to_aperturedata)
+
+    print(f"Target latency: {args.latency_ms} ms "
+          f"(sum {sum(latencies) * 1000:.0f}, slowest {max(latencies) * 1000:.0f})")
+    measure('sequential', sequential, args.calls)
+    measure('concurrent', StorageService.push_all, args.calls)
+
+    for server, _ in servers:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Benchmark peak memory of buffered vs streamed backend pushes
+Stores one call with N transcript segments in a SQLite file, then pushes it to
+a local stub receiver two ways and reports the peak Python heap (tracemalloc)
+and the time taken:
+  buffered - load every row, build the payload dict, send it with json=
+  streamed - read rows from a cursor and send them with chunked transfer encoding
+Usage: python benchmarks/bench_streaming_upload.py [--segments 1000,10000,50000] [--text-length 300]
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from config import Config
+from models import db, Call, Transcript
+from services.json_stream import TranscriptRows
+from services.storage_service import StorageService
+
+
+def stub_receiver():
+    """Receiver that reads (and discards) plain or chunked bodies 64 KB at a time"""
+    received = {'bytes': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def read(self, size):
+            while size:
+                size -= len(self.rfile.read(min(size, 64 * 1024)))
+
+        def do_POST(self):
+            if self.headers.get('Transfer-Encoding') == 'chunked':
+                total = 0
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    self.read(size)
+                    self.rfile.readline()
+                    total += size
+                    if size == 0:
+                        break
+            else:
+                total = int(self.headers.get('Content-Length', 0))
+                self.read(total)
+            received['bytes'] = total
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', received
+
+
+def buffered_push(call_id):
+    """The previous push_to_backend: whole payload in memory, serialized in one go"""
+    call_data = db.session.get(Call, call_id).to_dict()
+    transcripts = [t.to_dict() for t in Transcript.query.filter_by(call_id=call_id).order_by(Transcript.sequence)]
+    payload = {'call': call_data, 'transcripts': transcripts, 'intake_data': call_data.get('intake_data')}
+    response = requests.post(Config.BACKEND_API_URL, json=payload, timeout=60)
+    return response.status_code == 200
+
+
+def streamed_push(call_id):
+    call_data = db.session.get(Call, call_id).to_dict()
+    return StorageService.push_to_backend(call_data, TranscriptRows(call_id))
+
+
+def measure(push, call_id):
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    assert push(call_id)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--segments', default='1000,10000,50000', help='Transcript lengths to test')
+    parser.add_argument('--text-length', type=int, default=300, help='Characters per segment')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    server, url, received = stub_receiver()
+    Config.BACKEND_API_URL = url
+    Config.BACKEND_API_KEY = None
+    text = ('It started two days ago and gets worse at night. ' * 10)[:args.text_length]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp}/bench.db'
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            print(f"{'segments':>9} {'body MB':>8}   "
+                  f"{'buffered peak':>14} {'time':>8}   {'streamed peak':>14} {'time':>8}")
+            for count in (int(n) for n in args.segments.split(',')):
+                call = Call(call_control_id=f'cc_{count}', status='completed')
+                db.session.add(call)
+                db.session.flush()
+                now = datetime.utcnow()
+                db.session.execute(db.insert(Transcript), [
+                    {'call_id': call.id, 'speaker': 'patient', 'text': text, 'sequence': i,
+                     'timestamp': now, 'created_at': now}
+                    for i in range(count)
+                ])
+                db.session.commit()
+                call_id = call.id
+
+                buffered_mb, buffered_s = measure(buffered_push, call_id)
+                body_mb = received['bytes'] / 2 ** 20
+                streamed_mb, streamed_s = measure(streamed_push, call_id)
+                print(f"{count:>9} {body_mb:>8.1f}   {buffered_mb:>11.1f} MB {buffered_s:>7.2f}s   "
+                      f"{streamed_mb:>11.1f} MB {streamed_s:>7.2f}s")
+            db.session.remove()
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Load test for the live transcript WebSocket fan-out
+Usage: python benchmarks/bench_ws_fanout.py [--viewers 2000] [--events 200]
+
+Connects many viewers to one call on a single server process, publishes
+transcript events and measures delivery. Viewers run in the same process,
+so the numbers include client overhead too.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import websockets
+from services import live_transcript_ws
+from services.event_bus import Event
+from services.live_transcript_ws import TranscriptHub
+
+
+def snapshot_loader(call_id):
+    return {'status': 'answered', 'transcripts': [], 'answers': {}}
+
+
+async def viewer(url, expected, ready, finished):
+    async with websockets.connect(url, max_queue=None) as websocket:
+        await websocket.recv()  # snapshot
+        ready()
+        for _ in range(expected):
+            await websocket.recv()
+        finished.append(time.perf_counter())
+
+
+async def main(args):
+    encodes = 0
+    original_encode = live_transcript_ws.encode
+
+    def counting_encode(message):
+        nonlocal encodes
+        encodes += 1
+        return original_encode(message)
+
+    live_transcript_ws.encode = counting_encode
+
+    hub = TranscriptHub(snapshot_loader=snapshot_loader)
+    hub.loop = asyncio.get_running_loop()
+    async with websockets.serve(hub.handler, 'localhost', 0, max_queue=16) as server:
+        url = f"ws://localhost:{server.sockets[0].getsockname()[1]}/calls/1"
+
+        ready_count = 0
+        all_ready = asyncio.Event()
+
+        def ready():
+            nonlocal ready_count
+            ready_count += 1
+            if ready_count == args.viewers:
+                all_ready.set()
+
+        finished = []
+        start = time.perf_counter()
+        tasks = []
+        for _ in range(args.viewers):
+            tasks.append(asyncio.ensure_future(viewer(url, args.events, ready, finished)))
+            if len(tasks) % 200 == 0:
+                await asyncio.sleep(0.05)  # Stay under the listen backlog
+        await asyncio.wait_for(all_ready.wait(), timeout=120)
+        print(f"connected {args.viewers} viewers in {time.perf_counter() - start:.2f} s")
+
+        encodes_before = encodes
+        start = time.perf_counter()
+        for i in range(args.events):
+            hub.dispatch(Event(i + 1, 'call.transcript', 1, {
+                'id': i + 1, 'text': f'segment {i}', 'is_final': True, 'speaker': 'patient'
+            }))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        delivered = args.viewers * args.events
+        print(f"delivered {delivered} messages in {elapsed:.2f} s ({delivered / elapsed:,.0f} msg/s)")
+        print(f"last viewer finished {max(finished) - start:.2f} s after the first event")
+        print(f"JSON encodes for {args.events} events: {encodes - encodes_before}")
+        print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='WebSocket fan-out load test')
+    parser.add_argument('--viewers', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -109,6 +109,36 @@ def get_patient(patient_id):
         click.echo(f"Error: {str(e)}", err=True)
 
 
+@patient.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='File format (default: from the extension)')
+def import_patients(path, fmt):
+    """Bulk import patients from a CSV or NDJSON file (streamed in one request)"""
+    if not fmt:
+        fmt = 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    
+    try:
+        with open(path, 'rb') as f:
+            response = requests.post(f'{API_BASE_URL}/api/patients/import', params={'format': fmt},
+                                     data=f, headers={'Content-Type': content_type})
+        response.raise_for_status()
+        data = response.json()
+        
+        click.echo(f"✓ Imported {data['inserted']} of {data['rows']} patients")
+        click.echo(f"  Skipped (already on file or repeated): {data['skipped']}")
+        click.echo(f"  Failed: {data['failed']}")
+        for error in data['errors']:
+            click.echo(f"  Row {error['row']}: {error['error']}")
+        if data['failed'] > len(data['errors']):
+            click.echo(f"  ... and {data['failed'] - len(data['errors'])} more")
+        
+    except requests.exceptions.HTTPError as e:
+        click.echo(f"Error: {e.response.text}", err=True)
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
 @cli.group()
 def call():
     """Manage calls"""
@@ -273,6 +303,234 @@ def stats():
         click.echo(f"Error: {str(e)}", err=True)
 
 
+@cli.command('analytics')
+@click.option('--since', help='Only calls started at or after this ISO 8601 time')
+@click.option('--until', help='Only calls started before this ISO 8601 time')
+@click.option('--crosstab', help='Two question keys to cross-tabulate, e.g. symptom_duration,pain_level')
+def analytics(since, until, crosstab):
+    """Show cohort analytics over intake answers"""
+    try:
+        params = {}
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        if crosstab:
+            params['crosstab'] = crosstab
+        
+        response = requests.get(f'{API_BASE_URL}/api/analytics/cohort', params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        click.echo(f"\n📈 Cohort Analytics ({data['intakes']} intakes)")
+        click.echo("=" * 40)
+        
+        for name, counts in data['distributions'].items():
+            click.echo(f"\n{name}:")
+            click.echo(tabulate([list(counts.values())], headers=list(counts.keys()), tablefmt='grid'))
+        
+        pain = data['pain_level']
+        click.echo(f"\nPain level: mean {pain['mean']}, answered {pain['answered']}")
+        for label, value in pain['percentiles'].items():
+            click.echo(f"  {label}: {value}")
+        
+        click.echo("\nFamily history (yes):")
+        for name, flag in data['family_history'].items():
+            rate = f" ({flag['yes_rate']}%)" if 'yes_rate' in flag else ''
+            click.echo(f"  {name}: {flag['yes']}{rate}")
+        
+        if data.get('crosstab'):
+            table = data['crosstab']
+            columns = list(next(iter(table['counts'].values())).keys())
+            rows = [[row] + list(counts.values()) for row, counts in table['counts'].items()]
+            click.echo(f"\n{table['rows']} x {table['columns']}:")
+            click.echo(tabulate(rows, headers=[table['rows']] + columns, tablefmt='grid'))
+        
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@cli.group()
+def storage():
+    """Manage local storage"""
+    pass
+
+
+@storage.command('rebuild-index')
+def rebuild_index():
+    """Rebuild the local storage index (intake note manifest or segment indexes)"""
+    from storage_integration import create_local_storage
+    
+    try:
+        count = create_local_storage().rebuild_index()
+        click.echo(f"✅ Indexed {count} records")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@storage.command('train-dictionary')
+@click.option('--kind', type=click.Choice(['intake', 'transcript', 'metadata']), help='Only sample this kind of record')
+@click.option('--samples', default=1000, help='Number of recent records to sample')
+def train_dictionary(kind, samples):
+    """Train a compression dictionary for new segment log records"""
+    from storage_integration import SegmentLogStorage
+    
+    try:
+        storage_backend = SegmentLogStorage()
+        if storage_backend.log.codecs.name == 'none':
+            click.echo("Error: set STORAGE_COMPRESSION to zstd or zlib first", err=True)
+            return
+        dictionary_id = storage_backend.log.train_dictionary(kind, samples)
+        storage_backend.log.close()
+        click.echo(f"✅ New segments will use dictionary {dictionary_id}")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@cli.group()
+def outbox():
+    """Manage the outbox of pushes to external storage"""
+    pass
+
+
+@outbox.command('status')
+def outbox_status():
+    """Show outbox depth and age per target"""
+    try:
+        response = requests.get(f'{API_BASE_URL}/api/outbox')
+        response.raise_for_status()
+        data = response.json()
+        
+        click.echo(f"\n📤 Outbox: {data['depth']} undelivered, {data['dead']} dead")
+        rows = [
+            [target, counts['pending'], counts['in_progress'], counts['delivered'], counts['dead'],
+             counts['oldest_pending_seconds'] if counts['oldest_pending_seconds'] is not None else '-']
+            for target, counts in data['targets'].items()
+        ]
+        click.echo(tabulate(rows, headers=['Target', 'Pending', 'In progress', 'Delivered', 'Dead', 'Oldest (s)'],
+                            tablefmt='grid'))
+        
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@outbox.command('retry')
+@click.option('--job-id', type=int, help='Only requeue this job (default: all dead jobs)')
+def outbox_retry(job_id):
+    """Requeue dead-lettered jobs"""
+    try:
+        payload = {'job_id': job_id} if job_id else {}
+        response = requests.post(f'{API_BASE_URL}/api/outbox/retry', json=payload)
+        response.raise_for_status()
+        click.echo(f"✅ Requeued {response.json()['requeued']} jobs")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@outbox.command('resync')
+@click.argument('call_ids', nargs=-1, type=int, required=True)
+def outbox_resync(call_ids):
+    """Push the current data for calls again (unchanged calls are skipped)"""
+    try:
+        response = requests.post(f'{API_BASE_URL}/api/outbox/resync', json={'call_ids': list(call_ids)})
+        response.raise_for_status()
+        data = response.json()
+        click.echo(f"✅ Enqueued {data['enqueued']} pushes")
+        if data['missing']:
+            click.echo(f"Calls not found: {', '.join(str(i) for i in data['missing'])}")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@outbox.command('run')
+def outbox_run():
+    """Run outbox workers in this process (set OUTBOX_WORKERS_ENABLED=false on web workers)"""
+    import time
+    from app import app
+    from services.outbox import outbox as push_outbox
+    
+    push_outbox.start(app)
+    click.echo("📤 Outbox workers running (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        push_outbox.stop()
+
+
+@cli.group()
+def tiering():
+    """Manage hot/cold storage tiering"""
+    pass
+
+
+@tiering.command('status')
+def tiering_status():
+    """Show calls per tier and calls due for demotion"""
+    try:
+        response = requests.get(f'{API_BASE_URL}/api/tiering')
+        response.raise_for_status()
+        data = response.json()
+        
+        click.echo(f"\n🗄️  Tiering {'enabled' if data['enabled'] else 'disabled'}")
+        click.echo(f"Hot (MemVerge): {data['hot']}")
+        click.echo(f"Cold only (ApertureData): {data['cold_only']}")
+        click.echo(f"Due for demotion: {data['due_for_demotion']}")
+        if data['last_run']:
+            run = data['last_run']
+            click.echo(f"Last run: {run['finished_at']} - {run['demoted']} demoted, {run['failed']} failed")
+        
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@tiering.command('run')
+@click.option('--dry-run', is_flag=True, help='Only show how many calls would be demoted')
+def tiering_run(dry_run):
+    """Demote idle calls from MemVerge to ApertureData (run periodically, e.g. from cron)"""
+    from app import app
+    from services.tiering import tiering as engine
+    
+    with app.app_context():
+        result = engine.run_once(dry_run=dry_run)
+    if dry_run:
+        click.echo(f"{result['planned']} calls would be demoted")
+    else:
+        click.echo(f"✅ Demoted {result['demoted']} of {result['planned']} calls ({result['failed']} failed)")
+
+
+@cli.command('export')
+@click.option('--output', required=True, type=click.Path(file_okay=False),
+              help='Dataset directory (partitions and watermarks)')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['calls', 'transcripts', 'answers']),
+              help='Only export this table (repeatable; default: all)')
+@click.option('--full', is_flag=True, help='Ignore the watermarks and export every row again')
+def export(output, tables, full):
+    """Export calls, transcripts and intake answers to day-partitioned Parquet files"""
+    from app import app
+    from services.archive_export import ArchiveExporter
+    
+    try:
+        with app.app_context():
+            results = ArchiveExporter(output).export(tables=list(tables) or None, full=full)
+        for name, result in results.items():
+            click.echo(f"✅ {name}: {result['rows']} rows, {result['files']} files, "
+                       f"{result['bytes'] / 1024:.1f} KB in {result['seconds']:.1f}s")
+    except Exception as e:
+        click.echo(f"Error: {str(e)}", err=True)
+
+
+@cli.command('build-assets')
+def build_assets():
+    """Fingerprint and precompress static assets into static/dist"""
+    from services.static_assets import build_assets as build
+    
+    manifest = build()
+    click.echo(f"✅ Built {len(manifest)} assets")
+    for logical, hashed in sorted(manifest.items()):
+        click.echo(f"  {logical} -> {hashed}")
+
+
 @cli.command('config')
 def show_config():
     """Show current configuration"""
@@ -33,16 +33,134 @@ class Config:
     APERTUREDATA_PORT = int(os.getenv('APERTUREDATA_PORT', 55555))
     APERTUREDATA_USERNAME = os.getenv('APERTUREDATA_USERNAME', 'admin')
     APERTUREDATA_PASSWORD = os.getenv('APERTUREDATA_PASSWORD')
+    # Writer: calls per transaction, transactions pipelined per connection, pooled connections;
+    # the outbox sends up to APERTUREDATA_BATCH_MAX_ITEMS calls per write (1 = one call at a time)
+    APERTUREDATA_TRANSACTION_SIZE = int(os.getenv('APERTUREDATA_TRANSACTION_SIZE', 20))
+    APERTUREDATA_PIPELINE_DEPTH = int(os.getenv('APERTUREDATA_PIPELINE_DEPTH', 4))
+    APERTUREDATA_CONNECTIONS = int(os.getenv('APERTUREDATA_CONNECTIONS', 2))
+    APERTUREDATA_BATCH_MAX_ITEMS = int(os.getenv('APERTUREDATA_BATCH_MAX_ITEMS', 100))
+    APERTUREDATA_BATCH_MAX_DELAY_MS = float(os.getenv('APERTUREDATA_BATCH_MAX_DELAY_MS', 200))
+    APERTUREDATA_MAX_RECORDING_BYTES = int(os.getenv('APERTUREDATA_MAX_RECORDING_BYTES', 50 * 1024 * 1024))
+    
+    # External pushes run concurrently on a shared pool; each target gets
+    # STORAGE_PUSH_TIMEOUT seconds and push_all returns by STORAGE_PUSH_DEADLINE
+    STORAGE_PUSH_TIMEOUT = float(os.getenv('STORAGE_PUSH_TIMEOUT', 10))
+    STORAGE_PUSH_DEADLINE = float(os.getenv('STORAGE_PUSH_DEADLINE', 15))
+    STORAGE_PUSH_WORKERS = int(os.getenv('STORAGE_PUSH_WORKERS', 16))
+    # Push bodies are streamed with chunked transfer encoding: transcripts are read
+    # STORAGE_STREAM_BATCH_SIZE rows at a time and sent in chunks of STORAGE_STREAM_CHUNK_SIZE bytes
+    STORAGE_STREAM_BATCH_SIZE = int(os.getenv('STORAGE_STREAM_BATCH_SIZE', 500))
+    STORAGE_STREAM_CHUNK_SIZE = int(os.getenv('STORAGE_STREAM_CHUNK_SIZE', 64 * 1024))
+    
+    # Circuit breaker and bulkhead per push target: the circuit opens when, over the last
+    # CIRCUIT_WINDOW pushes (at least CIRCUIT_MIN_CALLS), the failure or slow-call share
+    # reaches its rate; after CIRCUIT_OPEN_SECONDS, CIRCUIT_HALF_OPEN_PROBES trial pushes decide
+    CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 5))
+    CIRCUIT_SLOW_CALL_RATE = float(os.getenv('CIRCUIT_SLOW_CALL_RATE', 0.8))
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', 20))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 5))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', 1))
+    BULKHEAD_MAX_CONCURRENT = int(os.getenv('BULKHEAD_MAX_CONCURRENT', 8))  # In-flight pushes per target
+    
+    # Local Persistence ('json': one file per record, 'segments': append-only segment log)
+    LOCAL_STORAGE_BACKEND = os.getenv('LOCAL_STORAGE_BACKEND', 'json')
+    SEGMENT_MAX_BYTES = int(os.getenv('SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+    # Durability of local writes: none, group (shared fsync per window) or per-write
+    STORAGE_DURABILITY = os.getenv('STORAGE_DURABILITY', 'group')
+    STORAGE_GROUP_COMMIT_MS = float(os.getenv('STORAGE_GROUP_COMMIT_MS', 0))
+    # At-rest compression of local records: none, zstd (falls back to zlib if not installed) or zlib
+    STORAGE_COMPRESSION = os.getenv('STORAGE_COMPRESSION', 'none')
+    STORAGE_COMPRESSION_LEVEL = int(os.getenv('STORAGE_COMPRESSION_LEVEL', 3))
+    STORAGE_DICTIONARY_SIZE = int(os.getenv('STORAGE_DICTIONARY_SIZE', 16 * 1024))
     
     # Backend API Configuration
     BACKEND_API_URL = os.getenv('BACKEND_API_URL')
     BACKEND_API_KEY = os.getenv('BACKEND_API_KEY')
+    # Micro-batching: outbox jobs for the backend are sent together, cut at
+    # BACKEND_BATCH_MAX_ITEMS or BACKEND_BATCH_MAX_DELAY_MS after the first, as a JSON array or NDJSON
+    BACKEND_BATCH_ENABLED = os.getenv('BACKEND_BATCH_ENABLED', 'false').lower() == 'true'
+    BACKEND_BATCH_FORMAT = os.getenv('BACKEND_BATCH_FORMAT', 'json')
+    BACKEND_BATCH_MAX_ITEMS = int(os.getenv('BACKEND_BATCH_MAX_ITEMS', 50))
+    BACKEND_BATCH_MAX_DELAY_MS = float(os.getenv('BACKEND_BATCH_MAX_DELAY_MS', 200))
+    # Leave transcripts out of a backend push when they are unchanged since the last acknowledged
+    # push (the payload lists them in unchanged_sections); only if the receiver merges updates
+    BACKEND_PARTIAL_UPDATES = os.getenv('BACKEND_PARTIAL_UPDATES', 'false').lower() == 'true'
+    
+    # Outbox for external pushes (MemVerge, ApertureData, backend API)
+    # Set OUTBOX_WORKERS_ENABLED=false when running `python cli.py outbox run` as a separate process
+    OUTBOX_WORKERS_ENABLED = os.getenv('OUTBOX_WORKERS_ENABLED', 'true').lower() == 'true'
+    OUTBOX_CONCURRENCY = int(os.getenv('OUTBOX_CONCURRENCY', 2))  # Worker threads per target
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))  # Then the job is dead-lettered
+    OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv('OUTBOX_BACKOFF_BASE_SECONDS', 2.0))
+    OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv('OUTBOX_BACKOFF_MAX_SECONDS', 600))
+    OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', 120))  # Must exceed the push timeout
+    OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 1.0))
+    OUTBOX_RETENTION_HOURS = int(os.getenv('OUTBOX_RETENTION_HOURS', 72))  # Delivered jobs
+    
+    # Hot/cold tiering: completed calls go to MemVerge only, and `cli.py tiering run` moves
+    # calls unread for TIERING_DEMOTE_AFTER_DAYS (or beyond the hot caps; 0 = no cap) to ApertureData
+    TIERING_ENABLED = os.getenv('TIERING_ENABLED', 'false').lower() == 'true'
+    TIERING_DEMOTE_AFTER_DAYS = float(os.getenv('TIERING_DEMOTE_AFTER_DAYS', 7))
+    TIERING_HOT_MAX_CALLS = int(os.getenv('TIERING_HOT_MAX_CALLS', 0))
+    TIERING_HOT_MAX_BYTES = int(os.getenv('TIERING_HOT_MAX_BYTES', 0))
+    TIERING_BATCH_SIZE = int(os.getenv('TIERING_BATCH_SIZE', 50))
+    TIERING_ACCESS_FLUSH_SIZE = int(os.getenv('TIERING_ACCESS_FLUSH_SIZE', 100))  # Buffered reads per write
+    TIERING_ACCESS_FLUSH_SECONDS = float(os.getenv('TIERING_ACCESS_FLUSH_SECONDS', 30))  # Max age of a buffered read
+    
+    # Columnar archive export (`cli.py export`, needs pyarrow)
+    EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', 10000))  # Rows fetched and written per batch
+    EXPORT_COMPRESSION = os.getenv('EXPORT_COMPRESSION', 'zstd')  # Parquet codec: zstd, snappy, gzip, none
+    EXPORT_SAFETY_LAG_SECONDS = float(os.getenv('EXPORT_SAFETY_LAG_SECONDS', 60))  # Newer rows wait for the next run
+    
+    # Bulk patient import (POST /api/patients/import, `cli.py patient import`)
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))  # Rows per dedup query and transaction
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))  # Row errors listed in the response
+    IMPORT_DEFAULT_COUNTRY_CODE = os.getenv('IMPORT_DEFAULT_COUNTRY_CODE', '1')  # For numbers without one
     
     # Call Configuration
     MAX_CALL_DURATION = int(os.getenv('MAX_CALL_DURATION', 1800))
     RECORDING_ENABLED = os.getenv('RECORDING_ENABLED', 'true').lower() == 'true'
     TRANSCRIPTION_ENABLED = os.getenv('TRANSCRIPTION_ENABLED', 'true').lower() == 'true'
     
+    # Analytics Configuration
+    ROLLUP_MINUTE_RETENTION_HOURS = int(os.getenv('ROLLUP_MINUTE_RETENTION_HOURS', 24))
+    ROLLUP_HOUR_RETENTION_DAYS = int(os.getenv('ROLLUP_HOUR_RETENTION_DAYS', 30))
+    ROLLUP_COMPACTION_INTERVAL = int(os.getenv('ROLLUP_COMPACTION_INTERVAL', 3600))
+    
+    # Response Cache Configuration (completed call detail, intake data and transcripts)
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 512))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 86400))
+    
+    # Batch reads (GET/POST /api/calls/batch)
+    BATCH_READ_MAX_IDS = int(os.getenv('BATCH_READ_MAX_IDS', 100))
+    BATCH_READ_MAX_BYTES = int(os.getenv('BATCH_READ_MAX_BYTES', 4 * 1024 * 1024))  # Later calls are left for next_ids
+    
+    # Live Event Configuration
+    # 'database' shares events between workers through the call_events table; 'memory' is single-process
+    EVENT_BUS_BACKEND = os.getenv('EVENT_BUS_BACKEND', 'database')
+    EVENT_BUFFER_SIZE = int(os.getenv('EVENT_BUFFER_SIZE', 1000))
+    EVENT_POLL_INTERVAL = float(os.getenv('EVENT_POLL_INTERVAL', 0.5))
+    # Each poll re-reads this many ids below the newest seen, for rows that committed after a higher id
+    EVENT_POLL_LOOKBACK = int(os.getenv('EVENT_POLL_LOOKBACK', 100))
+    EVENT_RETENTION_SECONDS = int(os.getenv('EVENT_RETENTION_SECONDS', 3600))
+    EVENT_HEARTBEAT_SECONDS = int(os.getenv('EVENT_HEARTBEAT_SECONDS', 15))
+    
+    # WebSocket Live Transcript Configuration (ws_server.py)
+    WS_HOST = os.getenv('WS_HOST', '0.0.0.0')
+    WS_PORT = int(os.getenv('WS_PORT', 8765))
+    WS_MAX_PENDING = int(os.getenv('WS_MAX_PENDING', 256))
+    WS_INTERIM_INTERVAL = float(os.getenv('WS_INTERIM_INTERVAL', 0.2))
+    
+    # Dashboard overview snapshot (seconds between change checks)
+    OVERVIEW_TICK_SECONDS = float(os.getenv('OVERVIEW_TICK_SECONDS', 1.0))
+    
+    # JSON Response Compression
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 5))
+    COMPRESS_BUDGET_BYTES_PER_SEC = int(os.getenv('COMPRESS_BUDGET_BYTES_PER_SEC', 20 * 1024 * 1024))
+    
     # Database Configuration
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///patient_intake.db')
     
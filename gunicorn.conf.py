@@ -0,0 +1,13 @@
+"""
+Gunicorn settings
+Read automatically from the working directory when serving app:app (see the Dockerfile)
+"""
+
+
+def post_worker_init(worker):
+    """Start the outbox workers in each web process, so jobs left by a previous run are delivered after a restart"""
+    from config import Config
+    from services.outbox import outbox
+
+    if Config.OUTBOX_WORKERS_ENABLED:
+        outbox.start(worker.wsgi)
@@ -4,6 +4,8 @@ Database models for patient intake system
 
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 import json
 
 db = SQLAlchemy()
@@ -19,7 +21,7 @@ class Patient(db.Model):
     date_of_birth = db.Column(db.Date)
     email = db.Column(db.String(120))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     calls = db.relationship('Call', backref='patient', lazy=True)
@@ -76,44 +78,110 @@ class Call(db.Model):
     backend_pushed = db.Column(db.Boolean, default=False)
     backend_pushed_at = db.Column(db.DateTime)
     
+    # Analytics
+    rollup_recorded = db.Column(db.Boolean, default=False)
+    
+    # Bumped on every change to the call or its transcripts/answers (used for ETags)
+    version = db.Column(db.Integer, default=1, nullable=False)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     transcripts = db.relationship('Transcript', backref='call', lazy=True, cascade='all, delete-orphan')
+    answers = db.relationship('IntakeAnswer', backref='call', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'call_control_id': self.call_control_id,
-            'call_leg_id': self.call_leg_id,
-            'call_session_id': self.call_session_id,
-            'patient_id': self.patient_id,
-            'status': self.status,
-            'direction': self.direction,
-            'from_number': self.from_number,
-            'to_number': self.to_number,
-            'consent_given': self.consent_given,
-            'consent_timestamp': self.consent_timestamp.isoformat() if self.consent_timestamp else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'answered_at': self.answered_at.isoformat() if self.answered_at else None,
-            'ended_at': self.ended_at.isoformat() if self.ended_at else None,
-            'duration_seconds': self.duration_seconds,
-            'recording_url': self.recording_url,
-            'intake_data': json.loads(self.intake_data) if self.intake_data else None,
-            'memverge_id': self.memverge_id,
-            'aperturedata_id': self.aperturedata_id,
-            'backend_pushed': self.backend_pushed,
-            'backend_pushed_at': self.backend_pushed_at.isoformat() if self.backend_pushed_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+    # Serializable fields, in output order
+    FIELDS = [
+        'id', 'call_control_id', 'call_leg_id', 'call_session_id', 'patient_id',
+        'status', 'direction', 'from_number', 'to_number',
+        'consent_given', 'consent_timestamp',
+        'started_at', 'answered_at', 'ended_at', 'duration_seconds',
+        'recording_url', 'intake_data',
+        'memverge_id', 'aperturedata_id', 'backend_pushed', 'backend_pushed_at',
+        'created_at', 'updated_at', 'version'
+    ]
+    DATETIME_FIELDS = {
+        'consent_timestamp', 'started_at', 'answered_at', 'ended_at',
+        'backend_pushed_at', 'created_at', 'updated_at'
+    }
+    
+    # Named field sets for ?view=
+    VIEWS = {
+        'summary': [
+            'id', 'patient_id', 'status', 'direction', 'from_number', 'to_number',
+            'consent_given', 'started_at', 'ended_at', 'duration_seconds', 'created_at'
+        ],
+        'detail': FIELDS
+    }
+    
+    @classmethod
+    def resolve_fields(cls, fields=None, view=None):
+        """
+        Resolve a ?fields= list or ?view= name into the fields to serialize
+        
+        Args:
+            fields (str): Comma-separated field names
+            view (str): Named view (summary, detail)
+            
+        Returns:
+            list: Field names in output order
+            
+        Raises:
+            ValueError: If a field or view is unknown
+        """
+        if fields:
+            requested = [f.strip() for f in fields.split(',') if f.strip()]
+            unknown = [f for f in requested if f not in cls.FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            return [f for f in cls.FIELDS if f in requested]
+        if view:
+            if view not in cls.VIEWS:
+                raise ValueError(f"Unknown view '{view}'. Use one of: {', '.join(cls.VIEWS)}")
+            return cls.VIEWS[view]
+        return cls.FIELDS
+    
+    @classmethod
+    def load_columns(cls, fields):
+        """Column attributes to pass to load_only() for a field list"""
+        return [getattr(cls, f) for f in fields]
+    
+    def to_dict(self, fields=None):
+        """
+        Serialize the call
+        
+        Only the requested fields are read, so instances loaded with
+        load_only(*Call.load_columns(fields)) never trigger extra queries.
+        
+        Args:
+            fields (list): Field names to include (default: all)
+        """
+        result = {}
+        for name in fields or self.FIELDS:
+            if name == 'intake_data':
+                result[name] = self.get_intake_data() if self.intake_data else None
+            elif name in self.DATETIME_FIELDS:
+                value = getattr(self, name)
+                result[name] = value.isoformat() if value else None
+            else:
+                result[name] = getattr(self, name)
+        return result
     
     def get_intake_data(self):
-        """Parse and return intake data as dictionary"""
-        if self.intake_data:
-            return json.loads(self.intake_data)
-        return {}
+        """
+        Parse and return intake data as dictionary
+        
+        The parsed value is memoized per instance and reused until intake_data
+        changes, so callers must not mutate the returned dictionary.
+        """
+        if not self.intake_data:
+            return {}
+        cached = self.__dict__.get('_intake_cache')
+        if cached is None or cached[0] is not self.intake_data:
+            cached = (self.intake_data, json.loads(self.intake_data))
+            self._intake_cache = cached
+        return cached[1]
     
     def set_intake_data(self, data):
         """Set intake data from dictionary"""
@@ -151,3 +219,173 @@ class Transcript(db.Model):
             'is_final': self.is_final,
             'created_at': self.created_at.isoformat()
         }
+
+
+class IntakeAnswer(db.Model):
+    """Normalized intake answers (one row per answered question) for indexed clinical queries"""
+    __tablename__ = 'intake_answers'
+    __table_args__ = (
+        db.Index('ix_intake_answers_key_value', 'question_key', 'value'),
+        db.Index('ix_intake_answers_key_numeric', 'question_key', 'numeric_value'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    call_id = db.Column(db.Integer, db.ForeignKey('calls.id'), nullable=False, index=True)
+    
+    section = db.Column(db.String(20), nullable=False)  # hpi, ample, family_history
+    question_key = db.Column(db.String(50), nullable=False)
+    value = db.Column(db.String(500))
+    numeric_value = db.Column(db.Float)  # Parsed value for DTMF range queries (e.g. pain_level >= 8)
+    answered_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'call_id': self.call_id,
+            'section': self.section,
+            'question_key': self.question_key,
+            'value': self.value,
+            'answered_at': self.answered_at.isoformat() if self.answered_at else None
+        }
+
+
+class CallEvent(db.Model):
+    """Live call events shared between workers (status changes, answers, transcript segments)"""
+    __tablename__ = 'call_events'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Also the SSE event id
+    call_id = db.Column(db.Integer, index=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class OutboxJob(db.Model):
+    """
+    A pending push of call data to an external system
+    
+    Written in the same transaction as the call change that produced it, then
+    delivered (at least once) by the outbox workers.
+    """
+    __tablename__ = 'outbox_jobs'
+    __table_args__ = (
+        db.Index('ix_outbox_jobs_due', 'target', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(20), nullable=False)  # memverge, aperturedata, backend
+    call_id = db.Column(db.Integer, index=True)
+    idempotency_key = db.Column(db.String(100), unique=True, nullable=False)  # Sent with every attempt
+    payload = db.Column(db.Text, nullable=False)  # JSON: {call, transcripts}
+    content_hash = db.Column(db.String(64))  # Hash of the canonical payload
+    section_hashes = db.Column(db.Text)  # JSON: {section: hash}
+    
+    # pending, in_progress, delivered, skipped, dead
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = db.Column(db.DateTime)  # Lease of the worker delivering it
+    claimed_by = db.Column(db.String(40), index=True)  # Token of the claim that holds the lease
+    last_error = db.Column(db.Text)
+    result = db.Column(db.String(100))  # Id returned by the target
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    delivered_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'target': self.target,
+            'call_id': self.call_id,
+            'idempotency_key': self.idempotency_key,
+            'content_hash': self.content_hash,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None
+        }
+
+
+class PushState(db.Model):
+    """Content hash of the last payload each target acknowledged for a call"""
+    __tablename__ = 'push_states'
+    __table_args__ = (
+        db.UniqueConstraint('target', 'call_id', name='uq_push_states_target_call'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    target = db.Column(db.String(20), nullable=False)
+    call_id = db.Column(db.Integer, nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False)
+    section_hashes = db.Column(db.Text)  # JSON: {section: hash}
+    acknowledged_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class CallAccess(db.Model):
+    """Read activity per call, used by the hot/cold storage tiering policy"""
+    __tablename__ = 'call_accesses'
+    
+    call_id = db.Column(db.Integer, db.ForeignKey('calls.id'), primary_key=True)
+    last_accessed_at = db.Column(db.DateTime, nullable=False, index=True)
+    read_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class CallRollup(db.Model):
+    """Time-bucketed call aggregates (minute, hour and day granularity)"""
+    __tablename__ = 'call_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', name='uq_call_rollups_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # minute, hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    
+    # Counters (additive so finer buckets can be folded into coarser ones)
+    calls_total = db.Column(db.Integer, default=0, nullable=False)
+    calls_answered = db.Column(db.Integer, default=0, nullable=False)
+    calls_consented = db.Column(db.Integer, default=0, nullable=False)
+    calls_completed = db.Column(db.Integer, default=0, nullable=False)
+    duration_total_seconds = db.Column(db.Integer, default=0, nullable=False)
+    duration_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'granularity': self.granularity,
+            'bucket_start': self.bucket_start.isoformat(),
+            'calls_total': self.calls_total,
+            'calls_answered': self.calls_answered,
+            'calls_consented': self.calls_consented,
+            'calls_completed': self.calls_completed,
+            'duration_total_seconds': self.duration_total_seconds,
+            'duration_count': self.duration_count
+        }
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_call_versions(session, flush_context, instances):
+    """
+    Increment Call.version for modified calls and calls whose transcripts or answers changed
+    
+    The increment is a SQL expression (version = version + 1), so concurrent
+    writers each add one instead of overwriting each other's value.
+    """
+    touched = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Transcript, IntakeAnswer)) and obj.call_id:
+            touched.add(obj.call_id)
+    
+    for obj in list(session.dirty):
+        if isinstance(obj, Call) and session.is_modified(obj, include_collections=False):
+            if not db.inspect(obj).attrs.version.history.has_changes():
+                obj.version = Call.version + 1
+            touched.discard(obj.id)
+    
+    for call_id in touched:
+        call = session.get(Call, call_id)
+        if call is not None and call not in session.new:
+            call.version = Call.version + 1
@@ -2,9 +2,21 @@
 REST API routes for managing patients, calls, and transcripts
 """
 
-from flask import Blueprint, request, jsonify
-from models import db, Patient, Call, Transcript
-from datetime import datetime
+from flask import Blueprint, request, jsonify, make_response, Response, stream_with_context
+from sqlalchemy.orm import load_only
+from models import db, Patient, Call, Transcript, OutboxJob
+from services.rollup_service import RollupService, GRANULARITIES
+from services.intake_answer_service import IntakeAnswerService, parse_filter
+from services import cohort_analytics
+from services.response_cache import conditional_call_response
+from services.overview_snapshot import overview_snapshot, compute_stats
+from services.outbox import outbox
+from services.tiering import tiering
+from services.json_stream import iter_ndjson
+from services.patient_import import PatientImporter, normalize_phone, FORMATS as IMPORT_FORMATS
+from config import Config
+from datetime import datetime, timedelta, timezone
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +24,14 @@ logger = logging.getLogger(__name__)
 bp = Blueprint('api', __name__, url_prefix='/api')
 
 
+def parse_timestamp(value):
+    """Parse an ISO 8601 query parameter into a naive UTC datetime (raises ValueError)"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 # Patient endpoints
 @bp.route('/patients', methods=['GET'])
 def list_patients():
@@ -29,9 +49,11 @@ def create_patient():
     try:
         data = request.get_json()
         
-        phone_number = data.get('phone_number')
-        if not phone_number:
-            return jsonify({'error': 'phone_number is required'}), 400
+        # Stored in E.164, as the bulk import does, so both find the same patient
+        try:
+            phone_number = normalize_phone(data.get('phone_number'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Check if patient exists
         existing = Patient.query.filter_by(phone_number=phone_number).first()
@@ -64,6 +86,49 @@ def create_patient():
         return jsonify({'error': 'Failed to create patient'}), 500
 
 
+@bp.route('/patients/import', methods=['POST'])
+def import_patients():
+    """
+    Bulk import patients from CSV (with a header row) or NDJSON
+    
+    The file is the request body (Content-Type: text/csv or application/x-ndjson)
+    or a multipart upload named file. It is read as a stream and imported in
+    batches of IMPORT_BATCH_SIZE rows; patients whose normalized phone number
+    is already on file are skipped.
+    
+    Query parameters:
+        format: csv or ndjson (default: from the Content-Type or file name)
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, name, content_type = upload.stream, upload.filename or '', upload.mimetype
+    else:
+        stream, name, content_type = request.stream, '', request.mimetype
+    
+    fmt = request.args.get('format')
+    if not fmt:
+        if content_type == 'text/csv' or name.endswith('.csv'):
+            fmt = 'csv'
+        elif content_type in ('application/x-ndjson', 'application/jsonl') or name.endswith(('.ndjson', '.jsonl')):
+            fmt = 'ndjson'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({
+            'error': 'Unknown format. Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson'
+        }), 400
+    
+    try:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        result = PatientImporter().import_stream(text, fmt)
+        return jsonify({'success': True, **result})
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'File must be UTF-8 encoded'}), 400
+    except Exception as e:
+        logger.error(f"Error importing patients: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to import patients'}), 500
+
+
 @bp.route('/patients/<int:patient_id>', methods=['GET'])
 def get_patient(patient_id):
     """Get patient details"""
@@ -104,13 +169,20 @@ def update_patient(patient_id):
 
 @bp.route('/patients/<int:patient_id>/calls', methods=['GET'])
 def get_patient_calls(patient_id):
-    """Get all calls for a patient"""
+    """Get all calls for a patient (supports ?fields= and ?view= like /api/calls)"""
+    try:
+        fields = Call.resolve_fields(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     patient = Patient.query.get_or_404(patient_id)
-    calls = Call.query.filter_by(patient_id=patient_id).order_by(Call.created_at.desc()).all()
+    calls = Call.query.options(load_only(*Call.load_columns(fields))).filter_by(
+        patient_id=patient_id
+    ).order_by(Call.created_at.desc()).all()
     
     return jsonify({
         'patient': patient.to_dict(),
-        'calls': [c.to_dict() for c in calls],
+        'calls': [c.to_dict(fields) for c in calls],
         'total_calls': len(calls)
     })
 
@@ -118,45 +190,319 @@ def get_patient_calls(patient_id):
 # Transcript endpoints
 @bp.route('/calls/<int:call_id>/transcripts', methods=['GET'])
 def get_call_transcripts(call_id):
-    """Get all transcripts for a call"""
-    call = Call.query.get_or_404(call_id)
-    transcripts = Transcript.query.filter_by(call_id=call_id).order_by(Transcript.sequence).all()
+    """Get all transcripts for a call (supports If-None-Match)"""
+    def build():
+        transcripts = Transcript.query.filter_by(call_id=call_id).order_by(Transcript.sequence).all()
+        return {
+            'call_id': call_id,
+            'transcripts': [t.to_dict() for t in transcripts],
+            'total': len(transcripts)
+        }
     
-    return jsonify({
-        'call_id': call_id,
-        'transcripts': [t.to_dict() for t in transcripts],
-        'total': len(transcripts)
-    })
+    response = conditional_call_response('transcripts', call_id, build)  # 404 if the call does not exist
+    tiering.record_access(call_id)
+    return response
 
 
 @bp.route('/calls/<int:call_id>/intake-data', methods=['GET'])
 def get_intake_data(call_id):
-    """Get structured intake data for a call"""
-    call = Call.query.get_or_404(call_id)
+    """Get structured intake data for a call (supports If-None-Match)"""
+    def build():
+        call = Call.query.options(
+            load_only(Call.intake_data, Call.consent_given, Call.consent_timestamp)
+        ).filter_by(id=call_id).first_or_404()
+        return {
+            'call_id': call_id,
+            'intake_data': call.get_intake_data(),
+            'consent_given': call.consent_given,
+            'consent_timestamp': call.consent_timestamp.isoformat() if call.consent_timestamp else None
+        }
+    
+    response = conditional_call_response('intake-data', call_id, build)  # 404 if the call does not exist
+    tiering.record_access(call_id)
+    return response
+
+
+@bp.route('/calls/<int:call_id>/stored', methods=['GET'])
+def get_stored_call(call_id):
+    """Get a call's data as stored in external storage, from the hot or cold tier"""
+    try:
+        tier, data = tiering.read(call_id)
+    except Exception as e:
+        logger.error(f"Error reading stored call {call_id}: {str(e)}")
+        return jsonify({'error': 'Failed to read stored call'}), 502
+    if data is None:
+        return jsonify({'error': 'Call not found in external storage'}), 404
+    return jsonify({'call_id': call_id, 'tier': tier, **data})
+
+
+# Intake answer endpoints
+@bp.route('/intake-answers/search', methods=['GET'])
+def search_intake_answers():
+    """
+    Find calls by intake answers using the indexed intake_answers table
+    
+    Query parameters:
+        filter: question_key:operator:value, repeatable and combined with AND
+                (operators: eq, ne, gt, gte, lt, lte), e.g. pain_level:gte:8
+        since: ISO 8601 lower bound on call start
+        until: ISO 8601 upper bound on call start
+        limit: Maximum calls returned (default: 100)
+    """
+    try:
+        filters = [parse_filter(f) for f in request.args.getlist('filter')]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not filters:
+        return jsonify({'error': 'At least one filter is required'}), 400
+    
+    try:
+        since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        until = parse_timestamp(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid since/until format. Use ISO 8601'}), 400
+    
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    results = IntakeAnswerService.search(filters, since=since, until=until, limit=limit)
     
     return jsonify({
-        'call_id': call_id,
-        'intake_data': call.get_intake_data(),
-        'consent_given': call.consent_given,
-        'consent_timestamp': call.consent_timestamp.isoformat() if call.consent_timestamp else None
+        'results': results,
+        'total': len(results)
     })
 
 
+@bp.route('/intake-answers/rebuild', methods=['POST'])
+def rebuild_intake_answers():
+    """Rebuild the intake_answers table from stored call intake data"""
+    try:
+        processed = IntakeAnswerService.rebuild()
+        return jsonify({'success': True, 'calls_processed': processed})
+    except Exception as e:
+        logger.error(f"Error rebuilding intake answers: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to rebuild intake answers'}), 500
+
+
 # Statistics endpoint
 @bp.route('/stats', methods=['GET'])
 def get_stats():
     """Get system statistics"""
-    total_patients = Patient.query.count()
-    total_calls = Call.query.count()
-    completed_calls = Call.query.filter_by(status='completed').count()
-    active_calls = Call.query.filter(Call.status.in_(['initiated', 'ringing', 'answered'])).count()
-    consented_calls = Call.query.filter_by(consent_given=True).count()
+    return jsonify(compute_stats())
+
+
+@bp.route('/overview', methods=['GET'])
+def get_overview():
+    """
+    Get dashboard overview (stats and the 10 most recent calls)
+    
+    Served from a shared snapshot that is rebuilt at most once per
+    OVERVIEW_TICK_SECONDS and only when calls or patients changed.
+    """
+    body, etag = overview_snapshot.get()
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body)
+        response.mimetype = 'application/json'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={int(overview_snapshot.tick)}'
+    return response
+
+
+# Outbox endpoints
+@bp.route('/outbox', methods=['GET'])
+def get_outbox_stats():
+    """Get outbox depth and the age of the oldest undelivered push, per target"""
+    return jsonify(outbox.stats())
+
+
+@bp.route('/outbox/dead', methods=['GET'])
+def list_dead_jobs():
+    """List dead-lettered outbox jobs, newest first"""
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    jobs = OutboxJob.query.filter_by(status='dead').order_by(OutboxJob.id.desc()).limit(limit).all()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+
+@bp.route('/outbox/retry', methods=['POST'])
+def retry_dead_jobs():
+    """Requeue dead-lettered outbox jobs (all, or the one given as job_id)"""
+    data = request.get_json(silent=True) or {}
+    try:
+        requeued = outbox.retry_dead(data.get('job_id'))
+        return jsonify({'success': True, 'requeued': requeued})
+    except Exception as e:
+        logger.error(f"Error requeuing outbox jobs: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to requeue outbox jobs'}), 500
+
+
+@bp.route('/outbox/resync', methods=['POST'])
+def resync_calls():
+    """Queue pushes of the current data for the given calls; targets that already have it are skipped"""
+    data = request.get_json(silent=True) or {}
+    call_ids = data.get('call_ids')
+    if not isinstance(call_ids, list) or not call_ids or not all(isinstance(i, int) for i in call_ids):
+        return jsonify({'error': 'call_ids must be a non-empty list of integers'}), 400
+    try:
+        result = outbox.resync(call_ids)
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        logger.error(f"Error resyncing calls: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to resync calls'}), 500
+
+
+# Tiering endpoints
+@bp.route('/tiering', methods=['GET'])
+def get_tiering_stats():
+    """Get calls per storage tier and the calls due for demotion"""
+    return jsonify(tiering.stats())
+
+
+@bp.route('/tiering/run', methods=['POST'])
+def run_tiering():
+    """Demote idle calls from hot to cold storage now (or only plan it with {"dry_run": true})"""
+    data = request.get_json(silent=True) or {}
+    try:
+        result = tiering.run_once(dry_run=bool(data.get('dry_run')))
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        logger.error(f"Error running tiering: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': 'Failed to run tiering'}), 500
+
+
+# Bulk export endpoints
+@bp.route('/export/calls', methods=['GET'])
+def export_calls():
+    """
+    Stream calls with their intake data as NDJSON (one call per line, in id order)
+    
+    Rows are read from a cursor STORAGE_STREAM_BATCH_SIZE at a time and sent
+    with chunked transfer encoding, so memory use does not depend on the result size.
+    To resume an interrupted export, pass the id of the last call received as cursor.
+    
+    Query parameters:
+        since: ISO 8601 lower bound on call start
+        until: ISO 8601 upper bound on call start
+        status: Comma-separated statuses, e.g. completed,failed
+        consent: true or false
+        cursor: Only calls with a greater id
+        limit: Maximum calls returned (default: all)
+        fields, view: Fields to return, as for /api/calls (id is always included)
+    """
+    try:
+        since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        until = parse_timestamp(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid since/until format. Use ISO 8601'}), 400
+    
+    consent = request.args.get('consent')
+    if consent not in (None, 'true', 'false'):
+        return jsonify({'error': 'consent must be true or false'}), 400
+    
+    try:
+        fields = Call.resolve_fields(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if 'id' not in fields:
+        fields = ['id'] + fields
+    
+    query = db.select(Call).options(load_only(*Call.load_columns(fields)))
+    if since:
+        query = query.where(Call.started_at >= since)
+    if until:
+        query = query.where(Call.started_at < until)
+    if request.args.get('status'):
+        query = query.where(Call.status.in_([s.strip() for s in request.args['status'].split(',')]))
+    if consent:
+        query = query.where(Call.consent_given.is_(consent == 'true'))
+    cursor = request.args.get('cursor', type=int)
+    if cursor is not None:
+        query = query.where(Call.id > cursor)
+    limit = request.args.get('limit', type=int)
+    if limit:
+        query = query.limit(limit)
+    query = query.order_by(Call.id).execution_options(yield_per=Config.STORAGE_STREAM_BATCH_SIZE)
+    
+    def rows():
+        for call in db.session.execute(query).scalars():
+            yield call.to_dict(fields)
+    
+    response = Response(stream_with_context(iter_ndjson(rows())), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+# Analytics endpoints
+DEFAULT_TIMESERIES_WINDOWS = {
+    'minute': timedelta(hours=1),
+    'hour': timedelta(days=1),
+    'day': timedelta(days=30)
+}
+
+
+@bp.route('/analytics/timeseries', methods=['GET'])
+def get_timeseries():
+    """
+    Get call metrics per time bucket from the rollup tables
+    
+    Query parameters:
+        granularity: minute, hour or day (default: hour)
+        start: ISO 8601 range start (default: depends on granularity)
+        end: ISO 8601 range end (default: now)
+    """
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
+    
+    try:
+        end_str = request.args.get('end')
+        end = parse_timestamp(end_str) if end_str else datetime.utcnow()
+        start_str = request.args.get('start')
+        start = parse_timestamp(start_str) if start_str else end - DEFAULT_TIMESERIES_WINDOWS[granularity]
+    except ValueError:
+        return jsonify({'error': 'Invalid start/end format. Use ISO 8601'}), 400
+    
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+    
+    buckets = RollupService.timeseries(granularity, start, end)
     
     return jsonify({
-        'total_patients': total_patients,
-        'total_calls': total_calls,
-        'completed_calls': completed_calls,
-        'active_calls': active_calls,
-        'consented_calls': consented_calls,
-        'consent_rate': round(consented_calls / total_calls * 100, 2) if total_calls > 0 else 0
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'buckets': buckets,
+        'total': len(buckets)
     })
+
+
+@bp.route('/analytics/cohort', methods=['GET'])
+def get_cohort_analytics():
+    """
+    Get distributions, percentiles and cross-tabs over DTMF intake answers
+    
+    Query parameters:
+        since: ISO 8601 lower bound on call start
+        until: ISO 8601 upper bound on call start
+        crosstab: Two question keys separated by a comma, e.g. symptom_duration,pain_level
+    """
+    try:
+        since = parse_timestamp(request.args['since']) if request.args.get('since') else None
+        until = parse_timestamp(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid since/until format. Use ISO 8601'}), 400
+    
+    crosstab_pair = None
+    if request.args.get('crosstab'):
+        crosstab_pair = tuple(request.args['crosstab'].split(','))
+        if len(crosstab_pair) != 2 or any(k not in cohort_analytics.COLUMNS for k in crosstab_pair):
+            return jsonify({
+                'error': f"crosstab must be two of: {', '.join(cohort_analytics.COLUMN_NAMES)}"
+            }), 400
+    
+    cache = cohort_analytics.get_cache()
+    return jsonify(cohort_analytics.summarize(cache, since=since, until=until, crosstab_pair=crosstab_pair))
@@ -0,0 +1,40 @@
+"""
+Routes for fingerprinted static assets built by `python cli.py build-assets`
+"""
+
+import mimetypes
+import os
+from flask import Blueprint, current_app, request, send_from_directory, abort
+from werkzeug.security import safe_join
+from services.static_assets import ENCODINGS
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+# Fingerprinted names change with content, so they never need revalidating
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+
+@bp.route('/<path:filename>')
+def serve_asset(filename):
+    """Serve a fingerprinted asset, using a precompressed sibling when the client accepts it"""
+    dist_dir = current_app.extensions['static_assets']['dist_dir']
+    source = safe_join(dist_dir, filename)
+    if source is None or not os.path.isfile(source):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    path = filename
+    for name, suffix in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(source + suffix):
+            encoding = name
+            path = filename + suffix
+            break
+
+    response = send_from_directory(dist_dir, path, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
@@ -2,10 +2,16 @@
 Call management routes for initiating and managing calls
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
+from sqlalchemy.orm import load_only, selectinload
 from models import db, Call, Patient
 from services.telnyx_service import TelnyxService
+from services.response_cache import conditional_call_response
+from services.event_bus import event_bus
+from services.tiering import tiering
+from services.patient_import import normalize_phone
 from config import Config
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,8 +35,10 @@ def initiate_call():
         phone_number = data.get('phone_number')
         patient_id = data.get('patient_id')
         
-        if not phone_number:
-            return jsonify({'error': 'phone_number is required'}), 400
+        try:
+            phone_number = normalize_phone(phone_number)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Get or create patient
         patient = None
@@ -61,6 +69,7 @@ def initiate_call():
         )
         db.session.add(call)
         db.session.commit()
+        event_bus.publish_status(call)
         
         logger.info(f"Call initiated: {call.id}")
         
@@ -79,9 +88,120 @@ def initiate_call():
 
 @bp.route('/<int:call_id>', methods=['GET'])
 def get_call(call_id):
-    """Get call details"""
-    call = Call.query.get_or_404(call_id)
-    return jsonify(call.to_dict())
+    """
+    Get call details (supports If-None-Match; see services/response_cache.py)
+    
+    Query parameters:
+        fields: Comma-separated fields to return
+        view: Named field set (summary, detail)
+    """
+    try:
+        fields = Call.resolve_fields(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def build():
+        call = Call.query.options(load_only(*Call.load_columns(fields))).filter_by(id=call_id).first_or_404()
+        return call.to_dict(fields)
+    
+    response = conditional_call_response('call', call_id, build)  # 404 if the call does not exist
+    tiering.record_access(call_id)
+    return response
+
+
+BATCH_RESOURCES = ['call', 'intake_data', 'transcripts']
+
+# Columns the intake_data resource reads (as GET /api/calls/<id>/intake-data)
+INTAKE_FIELDS = ['intake_data', 'consent_given', 'consent_timestamp']
+
+
+def batch_item(call, include, fields):
+    """One call's requested resources, shaped like the single-call endpoints"""
+    item = {'call_id': call.id}
+    if 'call' in include:
+        item['call'] = call.to_dict(fields)
+    if 'intake_data' in include:
+        item['intake_data'] = {
+            'intake_data': call.get_intake_data(),
+            'consent_given': call.consent_given,
+            'consent_timestamp': call.consent_timestamp.isoformat() if call.consent_timestamp else None
+        }
+    if 'transcripts' in include:
+        transcripts = sorted(call.transcripts, key=lambda t: (t.sequence or 0, t.id))
+        item['transcripts'] = [t.to_dict() for t in transcripts]
+    return item
+
+
+@bp.route('/batch', methods=['GET', 'POST'])
+def batch_read():
+    """
+    Read several calls and their sub-resources in one request
+    
+    Each resource type is loaded with one query for all the calls (IN list),
+    whatever the number of calls. Calls are returned in the order requested
+    until the response reaches BATCH_READ_MAX_BYTES; the ids left over are
+    returned as next_ids to request again. At least one call is always returned.
+    
+    Parameters (query string for GET, JSON body for POST):
+        ids: Call ids (comma-separated or a list), at most BATCH_READ_MAX_IDS
+        include: Resources per call: call, intake_data, transcripts (default: all)
+        fields, view: Fields of the call resource (fields comma-separated or a list), as for /api/calls/<id>
+    """
+    params = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+    
+    def as_list(value):
+        return [v for v in (value.split(',') if isinstance(value, str) else value or []) if v != '']
+    
+    try:
+        ids = list(dict.fromkeys(int(i) for i in as_list(params.get('ids'))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be integers'}), 400
+    if not ids:
+        return jsonify({'error': 'ids is required'}), 400
+    if len(ids) > Config.BATCH_READ_MAX_IDS:
+        return jsonify({'error': f'At most {Config.BATCH_READ_MAX_IDS} ids per request'}), 400
+    
+    include = [str(r).strip() for r in as_list(params.get('include'))] or BATCH_RESOURCES
+    unknown = [r for r in include if r not in BATCH_RESOURCES]
+    if unknown:
+        return jsonify({'error': f"Unknown resources: {', '.join(unknown)}. Use: {', '.join(BATCH_RESOURCES)}"}), 400
+    
+    try:
+        fields = Call.resolve_fields(','.join(str(f) for f in as_list(params.get('fields'))), params.get('view'))
+    except TypeError:
+        return jsonify({'error': 'fields must be a list or comma-separated string and view a string'}), 400
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Call and intake data share one query on calls; transcripts are one more (selectin)
+    columns = set(fields if 'call' in include else []) | set(INTAKE_FIELDS if 'intake_data' in include else [])
+    query = Call.query.options(load_only(*Call.load_columns([f for f in Call.FIELDS if f in columns] or ['id'])))
+    if 'transcripts' in include:
+        query = query.options(selectinload(Call.transcripts))
+    calls = {call.id: call for call in query.filter(Call.id.in_(ids))}
+    
+    found = [call_id for call_id in ids if call_id in calls]
+    parts = []
+    size = 0
+    for call_id in found:
+        part = json.dumps(batch_item(calls[call_id], include, fields))
+        if parts and size + len(part) > Config.BATCH_READ_MAX_BYTES:
+            break
+        parts.append(part)
+        size += len(part) + 2
+    
+    # After serializing: a buffer flush commits the session and would expire the loaded calls
+    for call_id in found[:len(parts)]:
+        tiering.record_access(call_id)
+    
+    trailer = json.dumps({
+        'total': len(parts),
+        'missing': [call_id for call_id in ids if call_id not in calls],
+        'next_ids': found[len(parts):]
+    })
+    response = make_response('{"calls": [' + ', '.join(parts) + '], ' + trailer[1:])
+    response.mimetype = 'application/json'
+    return response
 
 
 @bp.route('/<int:call_id>/hangup', methods=['POST'])
@@ -98,6 +218,7 @@ def hangup_call(call_id):
         
         call.status = 'completed'
         db.session.commit()
+        event_bus.publish_status(call)
         
         return jsonify({'success': True, 'status': call.status})
         
@@ -108,12 +229,25 @@ def hangup_call(call_id):
 
 @bp.route('', methods=['GET'])
 def list_calls():
-    """List all calls with optional filtering"""
+    """
+    List all calls with optional filtering
+    
+    Query parameters:
+        status, patient_id, limit: Filters
+        fields: Comma-separated fields to return
+        view: Named field set (summary, detail) - summary skips intake_data entirely
+    """
     status = request.args.get('status')
     patient_id = request.args.get('patient_id')
     limit = request.args.get('limit', 50, type=int)
     
-    query = Call.query
+    try:
+        fields = Call.resolve_fields(request.args.get('fields'), request.args.get('view'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Only load the columns being serialized
+    query = Call.query.options(load_only(*Call.load_columns(fields)))
     
     if status:
         query = query.filter_by(status=status)
@@ -123,6 +257,6 @@ def list_calls():
     calls = query.order_by(Call.created_at.desc()).limit(limit).all()
     
     return jsonify({
-        'calls': [call.to_dict() for call in calls],
+        'calls': [call.to_dict(fields) for call in calls],
         'total': len(calls)
     })
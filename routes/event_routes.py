@@ -0,0 +1,49 @@
+"""
+Server-Sent Events routes for live call status, answers and transcripts
+"""
+
+from flask import Blueprint, request, Response, stream_with_context
+from services.event_bus import event_bus
+import logging
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint('events', __name__, url_prefix='/api')
+
+
+def get_last_event_id():
+    """Resume point from the Last-Event-ID header (or ?last_event_id= for the first connection)"""
+    value = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def sse_response(call_id=None):
+    """Subscribe to the event bus and stream events as text/event-stream"""
+    subscription, complete = event_bus.subscribe(call_id=call_id, last_event_id=get_last_event_id())
+    response = Response(
+        stream_with_context(event_bus.stream(subscription, complete)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+@bp.route('/events', methods=['GET'])
+def stream_all_events():
+    """
+    Global live feed of call events
+    
+    Events: call.status, call.answer, call.transcript, reset
+    Supports Last-Event-ID resume from a bounded buffer.
+    """
+    return sse_response()
+
+
+@bp.route('/calls/<int:call_id>/events', methods=['GET'])
+def stream_call_events(call_id):
+    """Live events for a single call"""
+    return sse_response(call_id=call_id)
@@ -6,7 +6,10 @@ from flask import Blueprint, request, jsonify
 from models import db, Call, Transcript
 from services.telnyx_service import TelnyxService
 from services.intake_service import IntakeService
-from services.storage_service import StorageService
+from services.outbox import outbox
+from services.rollup_service import RollupService
+from services.intake_answer_service import IntakeAnswerService
+from services.event_bus import event_bus
 from datetime import datetime
 import logging
 import json
@@ -75,6 +78,7 @@ def handle_call_initiated(payload):
     if call:
         call.status = 'ringing'
         db.session.commit()
+        event_bus.publish_status(call)
         logger.info(f"Call {call.id} is ringing")
     
     return jsonify({'status': 'ok'}), 200
@@ -92,6 +96,7 @@ def handle_call_answered(payload):
     call.status = 'answered'
     call.answered_at = datetime.utcnow()
     db.session.commit()
+    event_bus.publish_status(call)
     
     # Initialize call state
     call_states[call_control_id] = {
@@ -126,12 +131,16 @@ def handle_call_hangup(payload):
     if not call:
         return jsonify({'status': 'ok'}), 200
     
+    # A redelivered hangup keeps the original end time, so the call's content
+    # (and the push it queues) stays the same. Declined calls are already
+    # completed by the gather handler but end here.
     call.status = 'completed'
-    call.ended_at = datetime.utcnow()
-    
-    if call.answered_at:
-        duration = (call.ended_at - call.answered_at).total_seconds()
-        call.duration_seconds = int(duration)
+    if call.ended_at is None:
+        call.ended_at = datetime.utcnow()
+        
+        if call.answered_at:
+            duration = (call.ended_at - call.answered_at).total_seconds()
+            call.duration_seconds = int(duration)
     
     # Get call state and save intake data
     state = call_states.get(call_control_id, {})
@@ -139,25 +148,23 @@ def handle_call_hangup(payload):
         intake_service = IntakeService()
         intake_data = intake_service.format_intake_data(state)
         call.set_intake_data(intake_data)
+        IntakeAnswerService.sync_answers(call, intake_data)
     
-    db.session.commit()
-    
-    # Push to storage systems
-    transcripts = Transcript.query.filter_by(call_id=call.id).all()
-    transcript_data = [t.to_dict() for t in transcripts]
+    # Queue pushes to external storage in the same transaction as the completion,
+    # so a crash or failing endpoint cannot lose them; outbox workers deliver them
+    outbox.enqueue_push(call)
     
-    storage_results = StorageService.push_all(call.to_dict(), transcript_data)
+    db.session.commit()
+    outbox.wake()
     
-    # Update call with storage IDs
-    if storage_results.get('memverge_id'):
-        call.memverge_id = storage_results['memverge_id']
-    if storage_results.get('aperturedata_id'):
-        call.aperturedata_id = storage_results['aperturedata_id']
-    if storage_results.get('backend_pushed'):
-        call.backend_pushed = True
-        call.backend_pushed_at = datetime.utcnow()
+    # Update analytics rollups
+    try:
+        RollupService.record_call(call)
+    except Exception as e:
+        logger.error(f"Error recording call rollup: {str(e)}")
+        db.session.rollback()
     
-    db.session.commit()
+    event_bus.publish_status(call)
     
     # Clean up call state
     if call_control_id in call_states:
@@ -197,6 +204,7 @@ def handle_gather_ended(payload):
             state['consent_given'] = True
             state['consent_timestamp'] = datetime.utcnow().isoformat()
             db.session.commit()
+            event_bus.publish('call.answer', call.id, {'call_id': call.id, 'question_key': 'consent', 'value': digits})
             
             # Start intake questions
             TelnyxService.speak(call_control_id, "Thank you for providing consent. Let's begin with a few health questions.")
@@ -213,6 +221,8 @@ def handle_gather_ended(payload):
             call.consent_given = False
             call.status = 'completed'
             db.session.commit()
+            event_bus.publish('call.answer', call.id, {'call_id': call.id, 'question_key': 'consent', 'value': digits})
+            event_bus.publish_status(call)
     
     # Handle intake questions
     elif state['stage'] == 'intake':
@@ -235,6 +245,12 @@ def handle_gather_ended(payload):
             
             # Process the response
             intake_service.process_response(state, current_question['key'], digits)
+            event_bus.publish('call.answer', call.id, {
+                'call_id': call.id,
+                'section': current_section,
+                'question_key': current_question['key'],
+                'value': digits
+            })
             
             # Get next question
             next_question = intake_service.get_next_question(state)
@@ -270,6 +286,7 @@ def finish_intake(call_control_id, call, state):
     # Save intake data
     intake_data = intake_service.format_intake_data(state)
     call.set_intake_data(intake_data)
+    IntakeAnswerService.sync_answers(call, intake_data)
     db.session.commit()
     
     # Say goodbye
@@ -322,6 +339,7 @@ def handle_transcription(payload):
     )
     db.session.add(transcript)
     db.session.commit()
+    event_bus.publish('call.transcript', call.id, transcript.to_dict())
     
     logger.info(f"Transcript saved for call {call.id}: {transcript_text[:50]}...")
     
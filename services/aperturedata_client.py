@@ -0,0 +1,437 @@
+"""
+ApertureData cold storage writer
+Speaks ApertureDB's query protocol over a persistent TCP connection: each
+message is a length-prefixed protobuf QueryMessage holding a JSON array of
+commands, the blobs those commands consume and a session token. Calls are
+written as PatientCall entities (AddEntity) with the recording attached as a
+blob (AddBlob), many calls per transaction, with several transactions
+pipelined on one connection.
+"""
+
+import json
+import logging
+import queue
+import socket
+import struct
+import threading
+from contextlib import contextmanager
+import requests
+from models import Call
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ENTITY_CLASS = 'PatientCall'
+RECORDING_CONNECTION = 'has_recording'
+
+# Call fields copied onto the entity as queryable properties (the full call is kept in call_json)
+ENTITY_FIELDS = ('id', 'patient_id', 'status', 'direction', 'consent_given',
+                 'started_at', 'ended_at', 'duration_seconds', 'created_at')
+
+# ApertureDB status codes: 0 ok, 2 object exists (if_not_found matched), negative errors
+STATUS_OK = (0, 2)
+
+
+class ApertureDataError(Exception):
+    """The server rejected a query or the connection failed"""
+
+
+# Wire format
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data, pos):
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_message(query, blobs=(), token=None):
+    """
+    Encode a QueryMessage (json = 1, blobs = 2, token = 3) with its length prefix
+
+    Args:
+        query (list): Commands (serialized to JSON)
+        blobs (list): Blob bytes, consumed in order by Add* commands
+        token (str): Session token from Authenticate
+
+    Returns:
+        bytes: The frame to send
+    """
+    text = json.dumps(query, default=str).encode('utf-8')
+    parts = [b'\x0a', _varint(len(text)), text]
+    for blob in blobs:
+        parts += [b'\x12', _varint(len(blob)), blob]
+    if token:
+        encoded = token.encode('utf-8')
+        parts += [b'\x1a', _varint(len(encoded)), encoded]
+    body = b''.join(parts)
+    return struct.pack('<I', len(body)) + body
+
+
+def decode_message(body):
+    """
+    Decode a QueryMessage body (without the length prefix)
+
+    Returns:
+        tuple: (parsed JSON, list of blobs, token)
+    """
+    text, blobs, token = b'', [], None
+    pos = 0
+    while pos < len(body):
+        tag, pos = _read_varint(body, pos)
+        field, wire_type = tag >> 3, tag & 7
+        if wire_type == 0:
+            _, pos = _read_varint(body, pos)
+            continue
+        if wire_type != 2:
+            raise ApertureDataError(f"Unsupported wire type {wire_type}")
+        length, pos = _read_varint(body, pos)
+        value = body[pos:pos + length]
+        pos += length
+        if field == 1:
+            text = value
+        elif field == 2:
+            blobs.append(value)
+        elif field == 3:
+            token = value.decode('utf-8')
+    return (json.loads(text) if text else None), blobs, token
+
+
+def read_frame(sock):
+    """Read one length-prefixed message body from a socket"""
+    header = _read_exact(sock, 4)
+    (length,) = struct.unpack('<I', header)
+    return _read_exact(sock, length)
+
+
+def _read_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ApertureDataError("Connection closed by server")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def command_statuses(response):
+    """
+    Status of each command in a response (a failed transaction gives one negative status)
+
+    Returns:
+        list: (status, info) per command
+    """
+    if isinstance(response, dict):
+        return [(response.get('status', -1), response.get('info'))]
+    statuses = []
+    for entry in response or []:
+        body = next(iter(entry.values())) if len(entry) == 1 else entry
+        if not isinstance(body, dict):
+            body = entry
+        statuses.append((body.get('status', 0), body.get('info')))
+    return statuses
+
+
+# Connections
+
+class ApertureDataConnection:
+    """
+    One authenticated, persistent connection
+
+    Not thread-safe; ApertureDataWriter hands each connection to one thread at a time.
+    """
+
+    def __init__(self, host, port, username, password, timeout):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._token = None
+
+    def connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.sendall(encode_message([{'Authenticate': {'username': self.username,
+                                                             'password': self.password or ''}}]))
+        response, _, _ = decode_message(read_frame(self._sock))
+        result = (response or [{}])[0].get('Authenticate', {})
+        if result.get('status') != 0:
+            self.close()
+            raise ApertureDataError(f"Authentication failed: {result.get('info')}")
+        self._token = result.get('session_token')
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._token = None
+
+    def pipeline(self, transactions, depth):
+        """
+        Send transactions with up to depth of them awaiting a response at once
+
+        Transactions are taken from the iterable only as they are sent, so a
+        generator can build each one (e.g. load its recordings) just in time.
+        The server answers in order, so responses are matched by position.
+        A connection error closes the connection; the caller treats the
+        remaining transactions as failed.
+
+        Args:
+            transactions (iterable): (commands, blobs) pairs
+            depth (int): Maximum transactions in flight
+
+        Returns:
+            list: (response JSON, blobs) per transaction
+        """
+        pending = iter(transactions)
+        results = []
+        in_flight = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and in_flight < max(depth, 1):
+                    transaction = next(pending, None)
+                    if transaction is None:
+                        exhausted = True
+                        break
+                    if self._sock is None:
+                        self.connect()
+                    commands, blobs = transaction
+                    self._sock.sendall(encode_message(commands, blobs, self._token))
+                    transaction = commands = blobs = None  # Drop the sent recordings
+                    in_flight += 1
+                if not in_flight:
+                    return results
+                response, blobs, _ = decode_message(read_frame(self._sock))
+                results.append((response, blobs))
+                in_flight -= 1
+        except (OSError, ApertureDataError):
+            self.close()
+            raise
+
+    def query(self, commands, blobs=()):
+        """Run one transaction and return (response JSON, blobs)"""
+        return self.pipeline([(commands, list(blobs))], 1)[0]
+
+
+# Writer
+
+def _download_recording(url):
+    """Fetch recording audio, up to APERTUREDATA_MAX_RECORDING_BYTES"""
+    response = requests.get(url, stream=True, timeout=Config.STORAGE_PUSH_TIMEOUT)
+    response.raise_for_status()
+    chunks, size = [], 0
+    for chunk in response.iter_content(64 * 1024):
+        size += len(chunk)
+        if size > Config.APERTUREDATA_MAX_RECORDING_BYTES:
+            raise ApertureDataError(f"Recording larger than {Config.APERTUREDATA_MAX_RECORDING_BYTES} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def entity_uid(idempotency_key, call_data):
+    """Unique id of a call's entity, also returned as Call.aperturedata_id"""
+    return idempotency_key or f"aperturedata:call:{call_data.get('id')}:v{call_data.get('version')}"
+
+
+class ApertureDataWriter:
+    """
+    Batched, pipelined writer of calls to ApertureData
+
+    Calls are grouped transaction_size to a transaction (fewer once their
+    recordings reach APERTUREDATA_MAX_RECORDING_BYTES); the transactions of
+    one write are built as they are sent, pipelined pipeline_depth deep on a
+    pooled connection. A transaction is atomic, so its calls succeed or fail
+    together. Entities are added with if_not_found on their uid, so a retried
+    write stores each call once.
+
+    Args:
+        host, port, username, password: Server (default: APERTUREDATA_* settings)
+        transaction_size (int): Calls per transaction
+        pipeline_depth (int): Transactions in flight per connection
+        connections (int): Pooled connections (concurrent writers)
+        recording_loader (callable): url -> audio bytes
+    """
+
+    def __init__(self, host=None, port=None, username=None, password=None, transaction_size=None,
+                 pipeline_depth=None, connections=None, recording_loader=None):
+        self.host = host or Config.APERTUREDATA_HOST
+        self.port = port or Config.APERTUREDATA_PORT
+        self.username = username or Config.APERTUREDATA_USERNAME
+        self.password = password if password is not None else Config.APERTUREDATA_PASSWORD
+        self.transaction_size = transaction_size or Config.APERTUREDATA_TRANSACTION_SIZE
+        self.pipeline_depth = pipeline_depth or Config.APERTUREDATA_PIPELINE_DEPTH
+        self.max_connections = connections or Config.APERTUREDATA_CONNECTIONS
+        self.recording_loader = recording_loader or _download_recording
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, opening one if fewer than max_connections exist"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.max_connections
+                if create:
+                    self._created += 1
+            if create:
+                conn = ApertureDataConnection(self.host, self.port, self.username, self.password,
+                                              Config.STORAGE_PUSH_TIMEOUT)
+            else:
+                conn = self._pool.get(timeout=Config.STORAGE_PUSH_TIMEOUT)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        """Close pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _commands(self, ref, uid, call_data, transcript_data):
+        """AddEntity (+ AddBlob for the recording) commands and blobs for one call"""
+        properties = {'uid': uid, 'call_json': json.dumps(call_data, default=str),
+                      'transcripts': json.dumps(list(transcript_data or []), default=str)}
+        for field in ENTITY_FIELDS:
+            value = call_data.get(field)
+            if value is None:
+                continue
+            properties[field] = {'_date': value} if field in Call.DATETIME_FIELDS else value
+        commands = [{'AddEntity': {'_ref': ref, 'class': ENTITY_CLASS, 'properties': properties,
+                                   'if_not_found': {'uid': ['==', uid]}}}]
+        blobs = []
+        if call_data.get('recording_url'):
+            blobs.append(self.recording_loader(call_data['recording_url']))
+            commands.append({'AddBlob': {
+                'properties': {'uid': f'{uid}:recording', 'kind': 'recording', 'call_id': call_data.get('id')},
+                'connect': {'ref': ref, 'class': RECORDING_CONNECTION, 'direction': 'in'},
+                'if_not_found': {'uid': ['==', f'{uid}:recording']}
+            }})
+        return commands, blobs
+
+    def _transactions(self, items, acks, members):
+        """
+        Yield one (commands, blobs) transaction at a time
+
+        A transaction closes at transaction_size calls, or earlier once its
+        recordings reach APERTUREDATA_MAX_RECORDING_BYTES, so only the
+        recordings of the transactions being sent are held in memory.
+        """
+        commands, blobs, keys, blob_bytes = [], [], [], 0
+        for key, call_data, transcript_data in items:
+            uid = entity_uid(key, call_data)
+            try:
+                call_commands, call_blobs = self._commands(len(keys) + 1, uid, call_data, transcript_data)
+            except Exception as e:
+                acks[key] = (False, f"Recording not available: {str(e)}")
+                continue
+            commands += call_commands
+            blobs += call_blobs
+            keys.append((key, uid))
+            blob_bytes += sum(len(blob) for blob in call_blobs)
+            if len(keys) >= self.transaction_size or blob_bytes >= Config.APERTUREDATA_MAX_RECORDING_BYTES:
+                members.append(keys)
+                yield commands, blobs
+                commands, blobs, keys, blob_bytes = [], [], [], 0
+        if keys:
+            members.append(keys)
+            yield commands, blobs
+
+    def write(self, items):
+        """
+        Write calls in batched, pipelined transactions
+
+        Args:
+            items (list): (idempotency_key, call_data, transcript_data) tuples
+
+        Returns:
+            dict: idempotency_key -> (accepted, entity uid if accepted else error);
+                  a call is refused only if the server rejected its transaction
+                  (or its recording could not be loaded)
+
+        Raises:
+            OSError, ApertureDataError: The server could not be reached or the
+                connection failed; no call is acknowledged
+        """
+        acks = {}
+        members = []  # (key, uid) pairs per transaction, filled in as transactions are built
+        transactions = self._transactions(items, acks, members)
+        with self.connection() as conn:
+            results = conn.pipeline(transactions, self.pipeline_depth)
+
+        for keys, result in zip(members, results):
+            failed = [(status, info) for status, info in command_statuses(result[0]) if status not in STATUS_OK]
+            failure = (failed[0][1] or f"status {failed[0][0]}") if failed else None
+            for key, uid in keys:
+                acks[key] = (False, failure) if failure else (True, uid)
+        return acks
+
+    def fetch(self, uid):
+        """
+        Read a call written by write()
+
+        Returns:
+            dict: {'call': ..., 'transcripts': [...]} or None if there is no such entity
+        """
+        commands = [{'FindEntity': {'class': ENTITY_CLASS, 'constraints': {'uid': ['==', uid]},
+                                    'results': {'list': ['call_json', 'transcripts']}}}]
+        with self.connection() as conn:
+            response, _ = conn.query(commands)
+        result = (response or [{}])[0].get('FindEntity', {})
+        if result.get('status', -1) not in STATUS_OK:
+            raise ApertureDataError(result.get('info') or 'FindEntity failed')
+        entities = result.get('entities') or []
+        if not entities:
+            return None
+        return {'call': json.loads(entities[0]['call_json']), 'transcripts': json.loads(entities[0]['transcripts'])}
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_aperturedata_writer():
+    """Shared writer (one connection pool per process)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ApertureDataWriter()
+        return _writer
+
+
+def reset_aperturedata_writer():
+    """Close and forget the shared writer (used by tests and after config changes)"""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+        _writer = None
@@ -0,0 +1,147 @@
+"""
+Local stand-in for an ApertureData server
+Speaks the same length-prefixed QueryMessage protocol as the writer in
+services/aperturedata_client.py and keeps entities and blobs in memory, so
+the writer can be tested and tuned (transaction size, pipeline depth) without
+the real service. Only the commands the writer uses are implemented:
+Authenticate, AddEntity, AddBlob and FindEntity with uid constraints.
+"""
+
+import logging
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from services.aperturedata_client import ApertureDataError, decode_message, encode_message, read_frame
+
+logger = logging.getLogger(__name__)
+
+
+class ApertureDataStandIn:
+    """
+    In-memory ApertureData server on a local port
+
+    Each response is sent latency seconds after its request arrived, without
+    holding up the requests behind it, like a network round trip; pipelined
+    requests therefore overlap their waits. Transactions are atomic: if any
+    command fails, none of its changes are kept.
+
+    Args:
+        latency (float): Seconds from request to response
+        fail_uids (set): Entity uids whose AddEntity fails (to test partial failure)
+    """
+
+    def __init__(self, latency=0.0, fail_uids=()):
+        self.latency = latency
+        self.fail_uids = set(fail_uids)
+        self.entities = {}  # uid -> properties
+        self.blobs = {}  # uid -> (properties, bytes, connected entity uid)
+        self.transactions = 0
+        self.commands = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._tokens = set()
+        self._server = None
+
+    def start(self):
+        """Start serving on 127.0.0.1; returns (host, port)"""
+        standin = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                standin._serve(self.request)
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _serve(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._lock:
+            self.connections += 1
+        replies = queue.Queue()
+        sender = threading.Thread(target=self._send_replies, args=(sock, replies), daemon=True)
+        sender.start()
+        try:
+            while True:
+                body = read_frame(sock)
+                due = time.monotonic() + self.latency
+                commands, blobs, token = decode_message(body)
+                replies.put((due, encode_message(self.execute(commands, blobs, token))))
+        except (OSError, ApertureDataError):
+            pass
+        finally:
+            replies.put(None)
+            sender.join()
+
+    @staticmethod
+    def _send_replies(sock, replies):
+        while True:
+            reply = replies.get()
+            if reply is None:
+                return
+            due, frame = reply
+            time.sleep(max(0.0, due - time.monotonic()))
+            try:
+                sock.sendall(frame)
+            except OSError:
+                return
+
+    def execute(self, commands, blobs, token):
+        """Run one transaction and return its response"""
+        if len(commands) == 1 and 'Authenticate' in commands[0]:
+            session_token = uuid.uuid4().hex
+            with self._lock:
+                self._tokens.add(session_token)
+            return [{'Authenticate': {'status': 0, 'session_token': session_token}}]
+
+        with self._lock:
+            if token not in self._tokens:
+                return [{'status': -1, 'info': 'Not authenticated'}]
+            self.transactions += 1
+            self.commands += len(commands)
+            entities, new_blobs, refs = {}, {}, {}
+            blob_index = 0
+            response = []
+            for command in commands:
+                (name, args), = command.items()
+                if name == 'AddEntity':
+                    uid = args['properties']['uid']
+                    if uid in self.fail_uids:
+                        return [{'status': -1, 'info': f'AddEntity failed for {uid}'}]
+                    refs[args.get('_ref')] = uid
+                    if uid in self.entities or uid in entities:
+                        response.append({name: {'status': 2, 'info': 'Object exists'}})
+                    else:
+                        entities[uid] = args['properties']
+                        response.append({name: {'status': 0}})
+                elif name == 'AddBlob':
+                    if blob_index >= len(blobs):
+                        return [{'status': -1, 'info': 'AddBlob without a blob'}]
+                    uid = args['properties']['uid']
+                    connected = refs.get((args.get('connect') or {}).get('ref'))
+                    if uid not in self.blobs:
+                        new_blobs[uid] = (args['properties'], blobs[blob_index], connected)
+                    blob_index += 1
+                    response.append({name: {'status': 0}})
+                elif name == 'FindEntity':
+                    uid = args.get('constraints', {}).get('uid', [None, None])[1]
+                    found = self.entities.get(uid)
+                    fields = args.get('results', {}).get('list')
+                    returned = [] if found is None else [
+                        {key: value for key, value in found.items() if not fields or key in fields}
+                    ]
+                    response.append({name: {'status': 0, 'returned': len(returned), 'entities': returned}})
+                else:
+                    return [{'status': -1, 'info': f'Unsupported command {name}'}]
+            self.entities.update(entities)
+            self.blobs.update(new_blobs)
+            return response
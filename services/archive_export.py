@@ -0,0 +1,243 @@
+"""
+Columnar archive export of calls, transcripts and intake answers
+Streams rows from the database in batches and writes compressed Parquet
+files partitioned by day (<output>/<table>/date=YYYY-MM-DD/part-<run>.parquet).
+Each table keeps a watermark in <output>/_export_state.json, so later runs
+export only rows added or changed since the last one. Rows newer than
+EXPORT_SAFETY_LAG_SECONDS are left for the next run: their timestamps are set
+before commit, so a transaction still open could otherwise commit a row
+behind the saved watermark. Requires pyarrow.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import takewhile
+from models import db, Call, Transcript, IntakeAnswer
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for exports
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+STATE_FILENAME = '_export_state.json'
+
+# table -> columns, day partition column, watermark columns (rows after the watermark are exported),
+# and the time column that must be older than the safety lag before a row is exported
+TABLES = {
+    'calls': {
+        'columns': [
+            Call.id, Call.patient_id, Call.status, Call.direction, Call.from_number, Call.to_number,
+            Call.consent_given, Call.consent_timestamp, Call.started_at, Call.answered_at, Call.ended_at,
+            Call.duration_seconds, Call.recording_url, Call.intake_data, Call.memverge_id,
+            Call.aperturedata_id, Call.backend_pushed, Call.version, Call.created_at, Call.updated_at
+        ],
+        'partition': Call.created_at,
+        'watermark': (Call.updated_at, Call.id),
+        'settled': Call.updated_at
+    },
+    'transcripts': {
+        'columns': [
+            Transcript.id, Transcript.call_id, Transcript.sequence, Transcript.speaker, Transcript.text,
+            Transcript.confidence, Transcript.is_final, Transcript.timestamp, Transcript.created_at
+        ],
+        'partition': Transcript.created_at,
+        'watermark': (Transcript.id,),
+        'settled': Transcript.created_at
+    },
+    # Answers are replaced whenever a call's intake data changes, so a changed call's
+    # whole answer set is exported again; readers keep the rows with the highest call_version
+    'answers': {
+        'columns': [
+            IntakeAnswer.id, IntakeAnswer.call_id, IntakeAnswer.section, IntakeAnswer.question_key,
+            IntakeAnswer.value, IntakeAnswer.numeric_value, IntakeAnswer.answered_at,
+            Call.version.label('call_version')
+        ],
+        'join': (Call, Call.id == IntakeAnswer.call_id),
+        'partition': Call.created_at,
+        'watermark': (Call.updated_at, Call.id, IntakeAnswer.id),
+        'settled': Call.updated_at
+    }
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Archive export needs pyarrow (pip install pyarrow)")
+
+
+def arrow_type(column):
+    """Arrow type for a SQLAlchemy column"""
+    python_type = column.type.python_type
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def table_schema(name):
+    return pa.schema([(column.key, arrow_type(column)) for column in TABLES[name]['columns']])
+
+
+def _after(columns, values):
+    """Rows strictly after a watermark, compared as a tuple: (a > x) or (a = x and b > y) ..."""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(db.and_(*equal, column > values[i]))
+    return db.or_(*clauses)
+
+
+def _encode_watermark(values):
+    return [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+
+def _decode_watermark(columns, values):
+    return [
+        datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+        for column, value in zip(columns, values)
+    ]
+
+
+class ArchiveExporter:
+    """
+    Exports tables to day-partitioned Parquet files under an output directory
+
+    Args:
+        output_dir (str): Dataset root (holds the partitions and the watermark state)
+        batch_rows (int): Rows fetched per batch (default: EXPORT_BATCH_ROWS)
+        compression (str): Parquet codec (default: EXPORT_COMPRESSION)
+        safety_lag (float): Seconds a row must have been written before it is exported
+                            (default: EXPORT_SAFETY_LAG_SECONDS)
+    """
+
+    def __init__(self, output_dir, batch_rows=None, compression=None, safety_lag=None):
+        _require_pyarrow()
+        self.output_dir = output_dir
+        self.batch_rows = batch_rows or Config.EXPORT_BATCH_ROWS
+        self.compression = compression or Config.EXPORT_COMPRESSION
+        self.safety_lag = Config.EXPORT_SAFETY_LAG_SECONDS if safety_lag is None else safety_lag
+        self.state_path = os.path.join(output_dir, STATE_FILENAME)
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {'tables': {}}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def export(self, tables=None, full=False):
+        """
+        Export tables incrementally (or from scratch with full=True)
+
+        Returns:
+            dict: table -> {'rows', 'files', 'bytes', 'seconds'}
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        state = self.load_state()
+        run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        results = {}
+        for name in tables or TABLES:
+            previous = None if full else state['tables'].get(name, {}).get('watermark')
+            result, watermark = self.export_table(name, previous, run_id)
+            results[name] = result
+            if watermark is not None:
+                state['tables'][name] = {'watermark': watermark, 'exported_at': datetime.utcnow().isoformat()}
+                self._save_state(state)
+        return results
+
+    def export_table(self, name, watermark, run_id):
+        """
+        Stream one table's rows after the watermark into per-day Parquet files
+
+        Files are written under temporary names and renamed once complete, and
+        the watermark only advances after that, so an interrupted run is
+        simply repeated. A failed run deletes its temporary files.
+
+        The export stops at the first row (in watermark order) written less
+        than safety_lag seconds ago, so the watermark never passes a row that
+        an open transaction may still commit.
+
+        Returns:
+            tuple: (result dict, new watermark or None if there were no rows)
+        """
+        spec = TABLES[name]
+        columns = spec['columns']
+        schema = table_schema(name)
+        keys = [column.key for column in columns]
+        watermark_columns = spec['watermark']
+
+        query = db.select(*columns, spec['partition'].label('_partition'), spec['settled'].label('_settled'),
+                          *[column.label(f'_wm{i}') for i, column in enumerate(watermark_columns)])
+        if 'join' in spec:
+            query = query.join(*spec['join'])
+        if watermark:
+            query = query.where(_after(watermark_columns, _decode_watermark(watermark_columns, watermark)))
+        query = query.order_by(*watermark_columns).execution_options(yield_per=self.batch_rows)
+
+        start = time.perf_counter()
+        bound = datetime.utcnow() - timedelta(seconds=self.safety_lag)
+        writers = {}  # day -> (ParquetWriter, temp path, final path)
+        rows = 0
+        last = None
+        completed = False
+        try:
+            result = db.session.execute(query)
+            for batch in result.partitions():
+                settled = list(takewhile(lambda row: row._settled is None or row._settled < bound, batch))
+                by_day = {}
+                for row in settled:
+                    day = row._partition.date().isoformat() if row._partition else 'unknown'
+                    by_day.setdefault(day, []).append(row)
+                for day, day_rows in by_day.items():
+                    if day not in writers:
+                        writers[day] = self._open_writer(name, day, run_id, schema)
+                    data = {key: [row[i] for row in day_rows] for i, key in enumerate(keys)}
+                    writers[day][0].write_batch(pa.RecordBatch.from_pydict(data, schema=schema))
+                rows += len(settled)
+                last = settled[-1] if settled else last
+                if len(settled) < len(batch):
+                    break
+            result.close()
+            completed = True
+        finally:
+            for writer, tmp, _ in writers.values():
+                writer.close()
+                if not completed and os.path.exists(tmp):
+                    os.remove(tmp)
+
+        size = 0
+        for _, tmp, path in writers.values():
+            os.replace(tmp, path)
+            size += os.path.getsize(path)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Exported {rows} {name} rows to {len(writers)} files in {elapsed:.1f}s")
+
+        new_watermark = None
+        if last is not None:
+            new_watermark = _encode_watermark([getattr(last, f'_wm{i}') for i in range(len(watermark_columns))])
+        return {'rows': rows, 'files': len(writers), 'bytes': size, 'seconds': round(elapsed, 3)}, new_watermark
+
+    def _open_writer(self, name, day, run_id, schema):
+        directory = os.path.join(self.output_dir, name, f'date={day}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'part-{run_id}.parquet')
+        tmp = path + '.tmp'
+        return pq.ParquetWriter(tmp, schema, compression=self.compression), tmp, path
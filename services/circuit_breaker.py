@@ -0,0 +1,219 @@
+"""
+Circuit breakers and bulkheads for external storage targets
+A breaker opens when too many recent pushes to a target failed or were slow,
+then rejects pushes immediately until a cool-down passes and a probe succeeds.
+A bulkhead caps how many pushes to one target can be in flight at once, so a
+slow target cannot tie up every worker.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CallRejected(Exception):
+    """A push was not attempted; retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(CallRejected):
+    """The target's circuit is open"""
+
+
+class BulkheadFullError(CallRejected):
+    """The target already has the maximum number of pushes in flight"""
+
+
+class CircuitBreaker:
+    """
+    Failure-rate and slow-call circuit breaker with a bulkhead for one target
+
+    Outcomes of the last `window` calls are kept. Once at least `min_calls`
+    are recorded, the circuit opens if the share of failures reaches
+    `failure_rate` or the share of calls slower than `slow_call_seconds`
+    reaches `slow_call_rate`. After `open_seconds` it lets `half_open_probes`
+    calls through; if they all succeed it closes, otherwise it opens again.
+
+    Args:
+        name (str): Target name (for logs and snapshots)
+        max_concurrent (int): Bulkhead size (in-flight calls)
+    """
+
+    def __init__(self, name, failure_rate=None, slow_call_seconds=None, slow_call_rate=None, window=None,
+                 min_calls=None, open_seconds=None, half_open_probes=None, max_concurrent=None,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_rate = Config.CIRCUIT_FAILURE_RATE if failure_rate is None else failure_rate
+        self.slow_call_seconds = Config.CIRCUIT_SLOW_CALL_SECONDS if slow_call_seconds is None else slow_call_seconds
+        self.slow_call_rate = Config.CIRCUIT_SLOW_CALL_RATE if slow_call_rate is None else slow_call_rate
+        self.min_calls = min_calls or Config.CIRCUIT_MIN_CALLS
+        self.open_seconds = Config.CIRCUIT_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.half_open_probes = half_open_probes or Config.CIRCUIT_HALF_OPEN_PROBES
+        self.max_concurrent = max_concurrent or Config.BULKHEAD_MAX_CONCURRENT
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window or Config.CIRCUIT_WINDOW)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes_started = 0
+        self._probes_passed = 0
+        self._in_flight = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    # Admission
+
+    def acquire(self):
+        """
+        Reserve a slot for one call
+
+        Returns:
+            bool: True if the call is a half-open probe
+
+        Raises:
+            CircuitOpenError: The circuit is open (or half-open with probes in flight)
+            BulkheadFullError: max_concurrent calls are already in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            probe = state == HALF_OPEN
+            if state == OPEN or (probe and self._probes_started >= self.half_open_probes):
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is open", self._retry_after())
+            if self._in_flight >= self.max_concurrent:
+                self.rejected += 1
+                raise BulkheadFullError(f"{self.name} has {self._in_flight} pushes in flight", 1.0)
+            self._in_flight += 1
+            if probe:
+                self._probes_started += 1
+            return probe
+
+    def record(self, success, elapsed, probe=False):
+        """Release the slot taken by acquire() and record the call's outcome"""
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            self._in_flight -= 1
+            if probe:
+                if self._state != HALF_OPEN:
+                    return
+                if success and not slow:
+                    self._probes_passed += 1
+                    if self._probes_passed >= self.half_open_probes:
+                        logger.info(f"Circuit for {self.name} closed after successful probe")
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                else:
+                    self._open(f"probe {'was slow' if success else 'failed'}")
+                return
+
+            self._outcomes.append((not success, slow))
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(failed for failed, _ in self._outcomes) / len(self._outcomes)
+                slow_calls = sum(slow for _, slow in self._outcomes) / len(self._outcomes)
+                if failures >= self.failure_rate:
+                    self._open(f"failure rate {failures:.0%}")
+                elif slow_calls >= self.slow_call_rate:
+                    self._open(f"slow call rate {slow_calls:.0%}")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run fn through the breaker and bulkhead
+
+        A falsy result counts as a failure, matching the StorageService push
+        functions, which return None or False when a push did not go through.
+
+        Raises:
+            CallRejected: The call was not attempted
+        """
+        probe = self.acquire()
+        start = self.clock()
+        success = False
+        try:
+            result = fn(*args, **kwargs)
+            success = bool(result)
+            return result
+        finally:
+            self.record(success, self.clock() - start, probe)
+
+    # State
+
+    def _current_state(self):
+        """State, moving open -> half-open once the cool-down has passed (caller holds the lock)"""
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_started = 0
+            self._probes_passed = 0
+        return self._state
+
+    def _open(self, reason):
+        if self._state != OPEN:
+            self.times_opened += 1
+        logger.warning(f"Circuit for {self.name} opened: {reason}")
+        self._state = OPEN
+        self._opened_at = self.clock()
+
+    def _retry_after(self):
+        if self._state != OPEN:
+            return 1.0
+        return max(self.open_seconds - (self.clock() - self._opened_at), 1.0)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def snapshot(self):
+        """State and counters for /health and the outbox metrics"""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            return {
+                'state': state,
+                'calls_in_window': calls,
+                'failure_rate': round(sum(f for f, _ in self._outcomes) / calls, 3) if calls else 0.0,
+                'slow_call_rate': round(sum(s for _, s in self._outcomes) / calls, 3) if calls else 0.0,
+                'in_flight': self._in_flight,
+                'max_concurrent': self.max_concurrent,
+                'retry_after_seconds': round(self._retry_after(), 1) if state == OPEN else None,
+                'rejected': self.rejected,
+                'times_opened': self.times_opened
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(target):
+    """Shared breaker for a storage target (memverge, aperturedata, backend)"""
+    with _breakers_lock:
+        breaker = _breakers.get(target)
+        if breaker is None:
+            breaker = _breakers[target] = CircuitBreaker(target)
+        return breaker
+
+
+def breaker_states(targets=()):
+    """Snapshots by target of the given targets' breakers and any others in use"""
+    for target in targets:
+        get_breaker(target)
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {target: breaker.snapshot() for target, breaker in sorted(breakers.items())}
+
+
+def reset_breakers():
+    """Forget all breaker state (used by tests)"""
+    with _breakers_lock:
+        _breakers.clear()
@@ -0,0 +1,266 @@
+"""
+Cohort analytics over DTMF intake answers
+Loads answers from the intake_answers table into columnar NumPy arrays and computes
+distributions, percentiles and cross-tabs in vectorized passes
+"""
+
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from sqlalchemy import select
+from models import db, Call, IntakeAnswer
+
+logger = logging.getLogger(__name__)
+
+# DTMF questions loaded into columns, with the codes each one accepts
+COLUMNS = {
+    'symptom_duration': range(1, 5),
+    'pain_level': range(0, 11),
+    'last_meal': range(1, 5),
+    'heart_disease': range(1, 3),
+    'diabetes': range(1, 3),
+    'cancer': range(1, 3)
+}
+COLUMN_NAMES = list(COLUMNS)
+CODE_STARTS = np.array([codes.start for codes in COLUMNS.values()])
+CODE_STOPS = np.array([codes.stop for codes in COLUMNS.values()])
+FAMILY_HISTORY_FLAGS = ['heart_disease', 'diabetes', 'cancer']
+PERCENTILES = [25, 50, 75, 90]
+
+# Marker for unanswered or non-numeric answers
+MISSING = -1
+YES = 1
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(moment):
+    """Convert a naive UTC datetime to epoch seconds"""
+    return int((moment - EPOCH).total_seconds())
+
+
+class CohortArrays:
+    """
+    Columnar cache of intake answers
+
+    Attributes:
+        call_ids (np.ndarray): Sorted call IDs, one per row
+        started_at (np.ndarray): Call start as epoch seconds (0 if unknown)
+        values (np.ndarray): int16 matrix of answers, one column per COLUMN_NAMES entry
+        watermark (int): Highest IntakeAnswer.id loaded so far
+    """
+
+    def __init__(self):
+        self.call_ids = np.empty(0, dtype=np.int64)
+        self.started_at = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, len(COLUMN_NAMES)), dtype=np.int16)
+        self.watermark = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.call_ids)
+
+    def refresh(self):
+        """
+        Append answers written since the last refresh
+
+        Calls whose answers were re-synced replace their existing row.
+
+        Returns:
+            int: Number of calls added or updated
+        """
+        with self._lock:
+            # Core execution on the session's connection skips ORM row processing;
+            # filtering on the primary key alone lets the database range-scan new rows
+            connection = db.session.connection()
+            rows = connection.execute(
+                select(
+                    IntakeAnswer.id,
+                    IntakeAnswer.call_id,
+                    IntakeAnswer.question_key,
+                    IntakeAnswer.numeric_value
+                ).where(IntakeAnswer.id > self.watermark)
+            ).all()
+
+            if not rows:
+                return 0
+
+            answer_ids, call_ids, keys, numeric = zip(*rows)
+            column_lookup = {name: i for i, name in enumerate(COLUMN_NAMES)}
+            column_index = np.fromiter((column_lookup.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+            numeric = np.fromiter((np.nan if v is None else v for v in numeric), dtype=np.float64, count=len(numeric))
+            call_ids = np.asarray(call_ids, dtype=np.int64)
+            watermark = max(answer_ids)
+
+            # Voice answers (chief_complaint, *_detail) are not loaded into columns; their
+            # numeric values can be anything, so filter before narrowing to int16
+            loaded = column_index >= 0
+            call_ids, column_index, numeric = call_ids[loaded], column_index[loaded], numeric[loaded]
+            valid = (numeric >= CODE_STARTS[column_index]) & (numeric < CODE_STOPS[column_index])
+            numeric = np.where(valid, numeric, MISSING).astype(np.int16)
+            delta_ids = np.unique(call_ids)
+
+            # Start times are fetched once per call rather than joined per answer
+            started = dict(connection.execute(
+                select(Call.id, Call.started_at).where(Call.id.in_(
+                    select(IntakeAnswer.call_id).where(IntakeAnswer.id > self.watermark)
+                ))
+            ).all())
+
+            self.watermark = watermark
+            if not len(delta_ids):
+                return 0
+
+            self._merge(
+                call_ids,
+                column_index,
+                numeric,
+                delta_ids,
+                np.fromiter(
+                    (to_epoch(started[c]) if started.get(c) else 0 for c in delta_ids.tolist()),
+                    dtype=np.int64,
+                    count=len(delta_ids)
+                )
+            )
+            return len(delta_ids)
+
+    def _merge(self, call_ids, column_index, values, delta_ids, delta_started):
+        """Pivot long-format answers into rows (one per delta_ids entry) and merge them into the cache"""
+        row_index = np.searchsorted(delta_ids, call_ids)
+        delta_values = np.full((len(delta_ids), len(COLUMN_NAMES)), MISSING, dtype=np.int16)
+        delta_values[row_index, column_index] = values
+
+        # Find rows for calls already cached
+        position = np.searchsorted(self.call_ids, delta_ids)
+        if len(self.call_ids):
+            existing = self.call_ids[np.minimum(position, len(self.call_ids) - 1)] == delta_ids
+        else:
+            existing = np.zeros(len(delta_ids), dtype=bool)
+
+        # Append new calls, keeping call_ids sorted. New arrays are built rather than
+        # updated in place, so a snapshot() taken before the merge stays unchanged
+        new = ~existing
+        call_ids = np.concatenate([self.call_ids, delta_ids[new]])
+        values = np.concatenate([self.values, delta_values[new]])
+        started_at = np.concatenate([self.started_at, delta_started[new]])
+        values[position[existing]] = delta_values[existing]
+        started_at[position[existing]] = delta_started[existing]
+        if len(call_ids) > 1 and np.any(np.diff(call_ids) < 0):
+            order = np.argsort(call_ids, kind='stable')
+            call_ids, values, started_at = call_ids[order], values[order], started_at[order]
+        self.call_ids, self.values, self.started_at = call_ids, values, started_at
+
+    def snapshot(self):
+        """
+        Consistent view of the cached rows
+
+        Returns:
+            tuple: (started_at, values) arrays of the same length
+        """
+        with self._lock:
+            return self.started_at, self.values
+
+    def reset(self):
+        """Drop all cached arrays"""
+        with self._lock:
+            self.__init__()
+
+
+# Process-wide cache, appended to incrementally
+_cache = CohortArrays()
+
+
+def get_cache():
+    """Get the shared cohort cache, refreshed with newly completed calls"""
+    _cache.refresh()
+    return _cache
+
+
+def distribution(column, codes):
+    """Count of each answer code in a column (missing values excluded)"""
+    valid = column[(column >= codes.start) & (column < codes.stop)]
+    counts = np.bincount(valid - codes.start, minlength=len(codes))
+    return {str(code): int(count) for code, count in zip(codes, counts)}
+
+
+def crosstab(rows, columns, row_codes, column_codes):
+    """
+    Cross-tabulate two answer columns in one pass
+
+    Returns:
+        dict: {row_code: {column_code: count}}
+    """
+    valid = (rows >= row_codes.start) & (rows < row_codes.stop) & \
+        (columns >= column_codes.start) & (columns < column_codes.stop)
+    flat = (rows[valid] - row_codes.start).astype(np.int64) * len(column_codes) + \
+        (columns[valid] - column_codes.start)
+    table = np.bincount(flat, minlength=len(row_codes) * len(column_codes)).reshape(
+        len(row_codes), len(column_codes)
+    )
+    return {
+        str(r): {str(c): int(table[i, j]) for j, c in enumerate(column_codes)}
+        for i, r in enumerate(row_codes)
+    }
+
+
+def summarize(cache, since=None, until=None, crosstab_pair=None):
+    """
+    Compute cohort statistics over the cached arrays
+
+    Args:
+        cache (CohortArrays): Columnar answers
+        since (datetime): Only calls started at or after this time
+        until (datetime): Only calls started before this time
+        crosstab_pair (tuple): Optional (row_key, column_key) to cross-tabulate
+
+    Returns:
+        dict: Distributions, pain percentiles, family history rates and optional cross-tab
+    """
+    started_at, values = cache.snapshot()
+    mask = np.ones(len(started_at), dtype=bool)
+    if since:
+        mask &= started_at >= to_epoch(since)
+    if until:
+        mask &= started_at < to_epoch(until)
+    values = values[mask]
+
+    def col(name):
+        return values[:, COLUMN_NAMES.index(name)]
+
+    pain = col('pain_level')
+    pain = pain[pain >= 0].astype(np.float64)
+    flags = values[:, [COLUMN_NAMES.index(name) for name in FAMILY_HISTORY_FLAGS]]
+    answered_counts = (flags != MISSING).sum(axis=0)
+    yes_counts = (flags == YES).sum(axis=0)
+
+    result = {
+        'intakes': int(mask.sum()),
+        'distributions': {name: distribution(col(name), codes) for name, codes in COLUMNS.items()},
+        'pain_level': {
+            'answered': int(len(pain)),
+            'mean': round(float(pain.mean()), 2) if len(pain) else None,
+            'percentiles': {
+                f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(pain, PERCENTILES))
+            } if len(pain) else {}
+        },
+        'family_history': {
+            name: {
+                'answered': int(answered_counts[i]),
+                'yes': int(yes_counts[i]),
+                'yes_rate': round(float(yes_counts[i] / answered_counts[i] * 100), 2) if answered_counts[i] > 0 else 0
+            }
+            for i, name in enumerate(FAMILY_HISTORY_FLAGS)
+        }
+    }
+    result['family_history']['any'] = {'yes': int((flags == YES).any(axis=1).sum())}
+
+    if crosstab_pair:
+        row_key, column_key = crosstab_pair
+        result['crosstab'] = {
+            'rows': row_key,
+            'columns': column_key,
+            'counts': crosstab(col(row_key), col(column_key), COLUMNS[row_key], COLUMNS[column_key])
+        }
+
+    return result
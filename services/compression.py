@@ -0,0 +1,91 @@
+"""
+gzip compression for JSON API responses
+Bodies under COMPRESS_MIN_SIZE are sent as-is; compression work is capped by a
+per-process byte budget, and compressed bodies with a strong ETag are cached
+"""
+
+import gzip
+import logging
+import threading
+import time
+from flask import request
+from services.response_cache import LRUResponseCache
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CompressionBudget:
+    """
+    Token bucket of input bytes per second
+
+    When the bucket is empty responses go out uncompressed, so a burst of large
+    responses costs bandwidth rather than request latency.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.tokens = float(bytes_per_second)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, size):
+        """Spend size bytes of budget; returns False if none is left"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Bodies larger than the whole bucket are allowed when it is full (it goes into debt)
+            if self.tokens < min(size, self.rate):
+                return False
+            self.tokens -= size
+            return True
+
+
+class ResponseCompressor:
+    """after_request hook that gzips JSON responses"""
+
+    def __init__(self, min_size=None, level=None, budget_bytes_per_second=None, cache_size=256):
+        self.min_size = Config.COMPRESS_MIN_SIZE if min_size is None else min_size
+        self.level = Config.COMPRESS_LEVEL if level is None else level
+        self.budget = CompressionBudget(budget_bytes_per_second or Config.COMPRESS_BUDGET_BYTES_PER_SEC)
+        self.cache = LRUResponseCache(max_entries=cache_size)
+        self.skipped_over_budget = 0
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        """Compress the response body in place when worthwhile"""
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        etag, weak = response.get_etag()
+        cache_key = etag if etag and not weak else None
+        compressed = self.cache.get(cache_key) if cache_key else None
+        if compressed is None:
+            if not self.budget.take(len(body)):
+                self.skipped_over_budget += 1
+                return response
+            compressed = gzip.compress(body, compresslevel=self.level, mtime=0)
+            if cache_key:
+                self.cache.set(cache_key, compressed, Config.RESPONSE_CACHE_TTL)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = 'gzip'
+        if etag:
+            # The encoded bytes differ from the identity representation
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compressor = ResponseCompressor()
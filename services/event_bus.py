@@ -0,0 +1,280 @@
+"""
+In-process event bus for live call updates
+Webhook handlers publish status transitions, answers and transcript segments;
+SSE endpoints subscribe per call or to the global feed
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, CallEvent
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Sentinel queued to a subscriber that fell behind and was dropped
+DROPPED = object()
+
+
+class Event:
+    """A published event, encoded for SSE once and shared by every subscriber"""
+
+    __slots__ = ('id', 'event_type', 'call_id', 'data', '_encoded')
+
+    def __init__(self, event_id, event_type, call_id, data):
+        self.id = event_id
+        self.event_type = event_type
+        self.call_id = call_id
+        self.data = data
+        self._encoded = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'type': self.event_type,
+            'call_id': self.call_id,
+            'data': self.data
+        }
+
+    def encode(self):
+        """SSE wire format (computed once per event)"""
+        if self._encoded is None:
+            self._encoded = (
+                f"id: {self.id}\nevent: {self.event_type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+            ).encode('utf-8')
+        return self._encoded
+
+
+class Subscription:
+    """A subscriber's bounded queue, optionally filtered to one call"""
+
+    def __init__(self, call_id=None, max_pending=Config.EVENT_BUFFER_SIZE):
+        self.call_id = call_id
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.dropped = False
+
+    def matches(self, event):
+        return self.call_id is None or event.call_id == self.call_id
+
+    def offer(self, event):
+        """Queue an event without blocking; drop the subscriber if it is full"""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped = True
+            # Make room so the consumer wakes up and sees it was dropped
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(DROPPED)
+
+    def get(self, timeout):
+        """Next event, DROPPED, or None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """
+    Publish/subscribe bus with a bounded replay buffer
+
+    Backends:
+        memory:   events are numbered and dispatched in-process
+        database: events are written to call_events and each worker polls for
+                  new rows while it has subscribers, so all workers see the same
+                  ordered ids (used for Last-Event-ID resume)
+    """
+
+    def __init__(self, backend=None, buffer_size=None):
+        self.backend = backend or Config.EVENT_BUS_BACKEND
+        self.buffer = deque(maxlen=buffer_size or Config.EVENT_BUFFER_SIZE)
+        self.subscribers = set()
+        self.last_id = 0
+        self._lock = threading.Lock()
+        self._app = None
+        self._poller = None
+        self._initialized = False
+        self._last_prune = 0.0
+        self._seen = set()  # ids dispatched within the poll look-back window
+
+    def init_app(self, app):
+        """Remember the app so the database poller can open app contexts"""
+        self._app = app
+
+    # Publishing
+
+    def publish(self, event_type, call_id=None, data=None):
+        """
+        Publish an event (call after the related change is committed)
+
+        Args:
+            event_type (str): e.g. call.status, call.answer, call.transcript
+            call_id (int): Call the event belongs to
+            data (dict): JSON-serializable payload
+        """
+        data = data or {}
+        try:
+            if self.backend == 'database':
+                row = CallEvent(call_id=call_id, event_type=event_type, payload=json.dumps(data, default=str))
+                db.session.add(row)
+                db.session.commit()
+            else:
+                with self._lock:
+                    self._dispatch(Event(self.last_id + 1, event_type, call_id, data))
+        except Exception as e:
+            logger.error(f"Error publishing {event_type} event: {str(e)}")
+            db.session.rollback()
+
+    def publish_status(self, call):
+        """Publish a call.status event for a committed Call"""
+        self.publish('call.status', call.id, {
+            'call_id': call.id,
+            'status': call.status,
+            'consent_given': call.consent_given,
+            'duration_seconds': call.duration_seconds,
+            'version': call.version
+        })
+
+    def _dispatch(self, event):
+        """Append to the ring buffer and fan out (caller holds the lock)"""
+        self.last_id = max(self.last_id, event.id)
+        self.buffer.append(event)
+        for subscriber in self.subscribers:
+            if subscriber.matches(event):
+                subscriber.offer(event)
+
+    # Subscribing
+
+    def subscribe(self, call_id=None, last_event_id=None):
+        """
+        Register a subscriber, replaying buffered events after last_event_id
+
+        Returns:
+            tuple: (Subscription, bool) - the bool is False when last_event_id is
+                   older than the buffer; nothing is replayed and the client
+                   must refetch state
+        """
+        if self.backend == 'database' and not self._initialized:
+            # Start from the newest stored event; older history is not replayed
+            latest = db.session.query(db.func.max(CallEvent.id)).scalar() or 0
+            existing = db.session.scalars(
+                db.select(CallEvent.id).where(CallEvent.id > latest - Config.EVENT_POLL_LOOKBACK)
+            ).all()
+            with self._lock:
+                if not self._initialized:
+                    self.last_id = latest
+                    self._seen = set(existing)
+                    self._initialized = True
+
+        subscription = Subscription(call_id)
+        complete = True
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self.buffer[0].id if self.buffer else self.last_id + 1
+                complete = last_event_id >= oldest - 1
+                if complete:
+                    for event in self.buffer:
+                        if event.id > last_event_id and subscription.matches(event):
+                            subscription.offer(event)
+            self.subscribers.add(subscription)
+
+        if self.backend == 'database':
+            self._ensure_poller()
+        return subscription, complete
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+    def stream(self, subscription, complete=True, heartbeat=None):
+        """
+        Generate SSE bytes for a subscription until the client goes away
+
+        Sends a 'reset' event when replay was incomplete or the subscriber was
+        dropped for falling behind, so the client refetches full state.
+        """
+        heartbeat = heartbeat or Config.EVENT_HEARTBEAT_SECONDS
+        try:
+            yield b'retry: 3000\n\n'
+            if not complete:
+                yield f"id: {self.last_id}\nevent: reset\ndata: {{}}\n\n".encode('utf-8')
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield b': keepalive\n\n'
+                elif event is DROPPED:
+                    yield b'event: reset\ndata: {}\n\n'
+                    break
+                else:
+                    yield event.encode()
+        finally:
+            self.unsubscribe(subscription)
+
+    # Database backend
+
+    def _ensure_poller(self):
+        """Start the polling thread if it is not running (it exits when subscribers go away)"""
+        with self._lock:
+            if self._poller is not None:
+                return
+            app = self._app or current_app._get_current_object()
+            self._poller = threading.Thread(target=self._poll_loop, args=(app,), daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self, app):
+        """Fetch new call_events rows and dispatch them while there are subscribers"""
+        with app.app_context():
+            while True:
+                with self._lock:
+                    if not self.subscribers:
+                        self._poller = None
+                        return
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    logger.error(f"Error polling call events: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                time.sleep(Config.EVENT_POLL_INTERVAL)
+
+    def poll_once(self):
+        """
+        Dispatch rows not seen yet (database backend); returns how many
+
+        Ids are assigned at insert but become visible at commit, so a lower id
+        can appear after a higher one. Each poll re-reads EVENT_POLL_LOOKBACK
+        ids below the last seen id and skips the ones already dispatched.
+        """
+        floor = self.last_id - Config.EVENT_POLL_LOOKBACK
+        rows = CallEvent.query.filter(CallEvent.id > floor).order_by(CallEvent.id).limit(1000).all()
+        dispatched = 0
+        with self._lock:
+            for row in rows:
+                if row.id in self._seen:
+                    continue
+                self._seen.add(row.id)
+                self._dispatch(Event(row.id, row.event_type, row.call_id, json.loads(row.payload)))
+                dispatched += 1
+            floor = self.last_id - Config.EVENT_POLL_LOOKBACK
+            self._seen = {event_id for event_id in self._seen if event_id > floor}
+
+        if time.time() - self._last_prune > 60:
+            self._last_prune = time.time()
+            cutoff = datetime.utcnow() - timedelta(seconds=Config.EVENT_RETENTION_SECONDS)
+            CallEvent.query.filter(CallEvent.created_at < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+        return dispatched
+
+
+event_bus = EventBus()
@@ -0,0 +1,204 @@
+"""
+Intake answer service
+Keeps the normalized intake_answers table in sync with Call.intake_data and runs
+clinical filters (e.g. pain_level >= 8, allergies = 1) in the database
+"""
+
+import logging
+from datetime import datetime
+from models import db, Call, IntakeAnswer
+
+logger = logging.getLogger(__name__)
+
+# Sections of the formatted intake data that hold answers
+ANSWER_SECTIONS = ['hpi', 'ample', 'family_history']
+
+# Supported filter operators
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value
+}
+NUMERIC_OPERATORS = {'gt', 'gte', 'lt', 'lte'}
+
+
+def _parse_numeric(value):
+    """Return the value as a float, or None if it is not numeric"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_answered_at(value):
+    """Parse an ISO answer timestamp, tolerating missing or malformed values"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_filter(expression):
+    """
+    Parse a filter expression of the form question_key:operator:value
+
+    Args:
+        expression (str): e.g. "pain_level:gte:8"
+
+    Returns:
+        tuple: (question_key, operator, value)
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    parts = expression.split(':', 2)
+    if len(parts) != 3 or not parts[0]:
+        raise ValueError(f"Invalid filter '{expression}'. Use question_key:operator:value")
+
+    question_key, operator, value = parts
+    if operator not in OPERATORS:
+        raise ValueError(f"Invalid operator '{operator}'. Use one of: {', '.join(OPERATORS)}")
+    if operator in NUMERIC_OPERATORS and _parse_numeric(value) is None:
+        raise ValueError(f"Operator '{operator}' requires a numeric value")
+
+    return question_key, operator, value
+
+
+class IntakeAnswerService:
+    """Service for writing and querying normalized intake answers"""
+
+    @staticmethod
+    def build_answers(call_id, intake_data):
+        """
+        Flatten formatted intake data into IntakeAnswer rows
+
+        Args:
+            call_id (int): Call ID
+            intake_data (dict): Output of IntakeService.format_intake_data
+
+        Returns:
+            list: Unsaved IntakeAnswer objects
+        """
+        answers = []
+        for section in ANSWER_SECTIONS:
+            for question_key, response in (intake_data.get(section) or {}).items():
+                if not isinstance(response, dict):
+                    response = {'value': response}
+                value = response.get('value')
+                answers.append(IntakeAnswer(
+                    call_id=call_id,
+                    section=section,
+                    question_key=question_key,
+                    value=str(value) if value is not None else None,
+                    numeric_value=_parse_numeric(value),
+                    answered_at=_parse_answered_at(response.get('timestamp'))
+                ))
+        return answers
+
+    @staticmethod
+    def sync_answers(call, intake_data):
+        """
+        Replace the normalized answers for a call (does not commit)
+
+        Called wherever Call.set_intake_data is, so the JSON blob and the
+        answer rows are written in the same transaction.
+
+        Args:
+            call (Call): Call the answers belong to
+            intake_data (dict): Formatted intake data
+
+        Returns:
+            int: Number of answers written
+        """
+        IntakeAnswer.query.filter_by(call_id=call.id).delete(synchronize_session=False)
+        answers = IntakeAnswerService.build_answers(call.id, intake_data)
+        db.session.add_all(answers)
+        return len(answers)
+
+    @staticmethod
+    def search(filters, since=None, until=None, limit=100):
+        """
+        Find calls whose answers match every filter
+
+        Args:
+            filters (list): (question_key, operator, value) tuples, combined with AND
+            since (datetime): Only calls started at or after this time
+            until (datetime): Only calls started before this time
+            limit (int): Maximum number of calls returned
+
+        Returns:
+            list: Dictionaries with call summary and the matched answers
+        """
+        query = db.session.query(Call.id, Call.patient_id, Call.started_at)
+
+        for question_key, operator, value in filters:
+            if operator in NUMERIC_OPERATORS:
+                condition = OPERATORS[operator](IntakeAnswer.numeric_value, float(value))
+            else:
+                condition = OPERATORS[operator](IntakeAnswer.value, value)
+            matching = db.session.query(IntakeAnswer.call_id).filter(
+                IntakeAnswer.question_key == question_key,
+                condition
+            )
+            query = query.filter(Call.id.in_(matching))
+
+        if since:
+            query = query.filter(Call.started_at >= since)
+        if until:
+            query = query.filter(Call.started_at < until)
+
+        calls = query.order_by(Call.started_at.desc()).limit(limit).all()
+        if not calls:
+            return []
+
+        # Fetch only the answers referenced by the filters, in one query
+        keys = {f[0] for f in filters}
+        answers = {}
+        if keys:
+            rows = IntakeAnswer.query.filter(
+                IntakeAnswer.call_id.in_([c.id for c in calls]),
+                IntakeAnswer.question_key.in_(keys)
+            ).all()
+            for row in rows:
+                answers.setdefault(row.call_id, {})[row.question_key] = row.value
+
+        return [
+            {
+                'call_id': c.id,
+                'patient_id': c.patient_id,
+                'started_at': c.started_at.isoformat() if c.started_at else None,
+                'answers': answers.get(c.id, {})
+            }
+            for c in calls
+        ]
+
+    @staticmethod
+    def rebuild(batch_size=500):
+        """
+        Rebuild the answer table from Call.intake_data for existing calls
+
+        Returns:
+            int: Number of calls processed
+        """
+        processed = 0
+        last_id = 0
+        while True:
+            calls = Call.query.filter(
+                Call.id > last_id,
+                Call.intake_data.isnot(None)
+            ).order_by(Call.id).limit(batch_size).all()
+            if not calls:
+                break
+            for call in calls:
+                IntakeAnswerService.sync_answers(call, call.get_intake_data())
+            db.session.commit()
+            processed += len(calls)
+            last_id = calls[-1].id
+
+        logger.info(f"Rebuilt intake answers for {processed} calls")
+        return processed
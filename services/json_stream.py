@@ -0,0 +1,120 @@
+"""
+Incremental JSON encoding for large push payloads
+Encodes a payload piece by piece, streaming arrays from any iterator (such as
+a cursor over transcript rows), so a request body can be sent with chunked
+transfer encoding without building the whole document in memory.
+"""
+
+import json
+from models import db, Transcript
+from config import Config
+
+
+class TranscriptRows:
+    """
+    A call's transcript segments as dicts, in sequence order, fetched from the
+    database batch_size rows at a time
+
+    Each iteration runs a fresh query, so one instance can be read more than
+    once (e.g. to hash the transcripts, then to send them). Iterate inside an
+    application context.
+
+    Args:
+        call_id (int): Call whose transcripts to read
+        batch_size (int): Rows per fetch (default: STORAGE_STREAM_BATCH_SIZE)
+    """
+
+    def __init__(self, call_id, batch_size=None):
+        self.call_id = call_id
+        self.batch_size = batch_size or Config.STORAGE_STREAM_BATCH_SIZE
+
+    def __iter__(self):
+        query = (
+            db.select(Transcript)
+            .where(Transcript.call_id == self.call_id)
+            .order_by(Transcript.sequence, Transcript.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        for transcript in db.session.execute(query).scalars():
+            yield transcript.to_dict()
+
+
+def _is_streamed(value):
+    """Iterables other than lists, tuples, dicts and strings are streamed as arrays"""
+    return not isinstance(value, (str, bytes, list, tuple, dict)) and hasattr(value, '__iter__')
+
+
+def _contains_streamed(value):
+    if isinstance(value, dict):
+        return any(_contains_streamed(member) for member in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_contains_streamed(element) for element in value)
+    return _is_streamed(value)
+
+
+def iter_json_pieces(value):
+    """
+    Yield the JSON text of value in pieces
+
+    Containers holding streamed iterables are encoded element by element, so
+    those iterables are read lazily; everything else (such as one NDJSON row)
+    is encoded whole. The concatenated output equals
+    json.dumps(value, default=str) with streamed iterables read as lists.
+    """
+    if not _contains_streamed(value):
+        yield json.dumps(value, default=str)
+    elif isinstance(value, dict):
+        yield '{'
+        for i, (key, member) in enumerate(value.items()):
+            yield (', ' if i else '') + json.dumps(str(key)) + ': '
+            yield from iter_json_pieces(member)
+        yield '}'
+    else:
+        yield '['
+        for i, element in enumerate(value):
+            if i:
+                yield ', '
+            yield from iter_json_pieces(element)
+        yield ']'
+
+
+def _chunked(pieces, chunk_size):
+    """Join text pieces into UTF-8 chunks of about chunk_size bytes"""
+    chunk_size = chunk_size or Config.STORAGE_STREAM_CHUNK_SIZE
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def iter_json(value, chunk_size=None):
+    """
+    Encode value as UTF-8 JSON chunks of about chunk_size bytes
+
+    Pass the result as a request body (requests.post(data=...)) to send it
+    with chunked transfer encoding.
+
+    Args:
+        value: Payload; iterables other than lists, tuples and dicts become arrays
+        chunk_size (int): Target chunk size (default: STORAGE_STREAM_CHUNK_SIZE)
+
+    Yields:
+        bytes: The encoded document
+    """
+    return _chunked(iter_json_pieces(value), chunk_size)
+
+
+def iter_ndjson(values, chunk_size=None):
+    """Encode each value as one line of NDJSON, in chunks as iter_json does"""
+    def pieces():
+        for value in values:
+            yield from iter_json_pieces(value)
+            yield '\n'
+    return _chunked(pieces(), chunk_size)
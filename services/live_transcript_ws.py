@@ -0,0 +1,320 @@
+"""
+WebSocket live-transcript channel
+Streams transcript segments (with coalesced interim text), intake answers and status
+changes for a call to any number of viewers over the `websockets` server
+
+Runs as its own process (see ws_server.py) and receives events from the event bus,
+so EVENT_BUS_BACKEND must be 'database' to see webhooks handled by other processes.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from urllib.parse import urlparse
+import websockets
+from websockets.exceptions import ConnectionClosed
+from models import db, Call, Transcript, IntakeAnswer
+from services.event_bus import event_bus, DROPPED
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to viewers that cannot keep up (RFC 6455 "try again later")
+CLOSE_TOO_SLOW = 1013
+
+
+def encode(message):
+    """Serialize a message once; the same string is sent to every viewer"""
+    return json.dumps(message, default=str, separators=(',', ':'))
+
+
+def load_snapshot(app, call_id):
+    """
+    Load the current state of a call from the database
+
+    Returns:
+        dict: status, final transcript segments and stored answers, or None if the call does not exist
+    """
+    with app.app_context():
+        try:
+            call = db.session.get(Call, call_id)
+            if call is None:
+                return None
+            transcripts = Transcript.query.filter_by(call_id=call_id, is_final=True).order_by(Transcript.sequence).all()
+            answers = IntakeAnswer.query.filter_by(call_id=call_id).all()
+            return {
+                'status': call.status,
+                'transcripts': [t.to_dict() for t in transcripts],
+                'answers': {a.question_key: a.value for a in answers}
+            }
+        finally:
+            db.session.remove()
+
+
+class Viewer:
+    """One WebSocket connection with a bounded outgoing queue"""
+
+    def __init__(self, websocket, max_pending=None):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=max_pending or Config.WS_MAX_PENDING)
+        self.call_ids = set()
+        self.dropped = False
+
+    def offer(self, message):
+        """Queue a message; a viewer whose queue is full is disconnected"""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            logger.warning("Dropping slow WebSocket viewer")
+            asyncio.ensure_future(self.websocket.close(code=CLOSE_TOO_SLOW, reason='Consumer too slow'))
+
+    async def write_loop(self):
+        """Send queued messages; send() waits for the socket to drain, which is the backpressure"""
+        while True:
+            message = await self.queue.get()
+            await self.websocket.send(message)
+
+
+class CallChannel:
+    """
+    Viewers of one call, plus the call state needed to bring new viewers up to date
+
+    Interim (non-final) transcript text is coalesced: at most one interim
+    message per WS_INTERIM_INTERVAL carrying the latest text.
+    """
+
+    def __init__(self, call_id, loop):
+        self.call_id = call_id
+        self.loop = loop
+        self.viewers = set()
+        self.state = None
+        self.last_transcript_id = 0
+        self.loaded = asyncio.Event()
+        self.failed = False
+        self.backlog = []
+        self.pending_interim = None
+        self.interim_handle = None
+        self._snapshot = None
+
+    def set_state(self, state):
+        """Apply the loaded snapshot, then any events that arrived while loading"""
+        self.state = state
+        if state is not None:
+            self.last_transcript_id = max((t['id'] for t in state['transcripts'] if t.get('id')), default=0)
+        self.loaded.set()
+        backlog, self.backlog = self.backlog, []
+        if state is not None:
+            for event in backlog:
+                self.apply(event)
+
+    def snapshot_message(self):
+        """Encoded snapshot, cached until the state changes"""
+        if self._snapshot is None:
+            self._snapshot = encode(dict(type='snapshot', call_id=self.call_id, **self.state))
+        return self._snapshot
+
+    def broadcast(self, message):
+        encoded = encode(message)
+        for viewer in self.viewers:
+            viewer.offer(encoded)
+
+    def apply(self, event):
+        """Update state from an event bus event and fan it out"""
+        if not self.loaded.is_set():
+            self.backlog.append(event)
+            return
+        if self.state is None:
+            return
+
+        data = event.data
+        if event.event_type == 'call.transcript':
+            if not data.get('is_final', True):
+                self.pending_interim = data.get('text')
+                if self.interim_handle is None:
+                    self.interim_handle = self.loop.call_later(Config.WS_INTERIM_INTERVAL, self.flush_interim)
+                return
+            if data.get('id') is not None and data['id'] <= self.last_transcript_id:
+                return  # Already part of the snapshot
+            self.last_transcript_id = data.get('id') or self.last_transcript_id
+            self.cancel_interim()
+            self.state['transcripts'].append(data)
+            message = {'type': 'transcript', 'call_id': self.call_id, 'segment': data}
+        elif event.event_type == 'call.answer':
+            self.state['answers'][data.get('question_key')] = data.get('value')
+            message = {
+                'type': 'answer',
+                'call_id': self.call_id,
+                'question_key': data.get('question_key'),
+                'value': data.get('value')
+            }
+        elif event.event_type == 'call.status':
+            self.state['status'] = data.get('status')
+            message = {'type': 'status', 'call_id': self.call_id, 'status': data.get('status')}
+        else:
+            return
+
+        self._snapshot = None
+        self.broadcast(message)
+
+    def flush_interim(self):
+        self.interim_handle = None
+        if self.pending_interim is not None:
+            text, self.pending_interim = self.pending_interim, None
+            self.broadcast({'type': 'interim', 'call_id': self.call_id, 'text': text})
+
+    def cancel_interim(self):
+        if self.interim_handle is not None:
+            self.interim_handle.cancel()
+            self.interim_handle = None
+        self.pending_interim = None
+
+
+class TranscriptHub:
+    """Multiplexes event bus events to per-call channels of WebSocket viewers"""
+
+    def __init__(self, app=None, snapshot_loader=None):
+        self.app = app
+        self.snapshot_loader = snapshot_loader or (lambda call_id: load_snapshot(self.app, call_id))
+        self.channels = {}
+        self.loop = None
+
+    # Event intake (runs on the event loop)
+
+    def dispatch(self, event):
+        """Route an event to the channel for its call, if anyone is watching"""
+        channel = self.channels.get(event.call_id)
+        if channel is not None:
+            channel.apply(event)
+
+    # Viewer management
+
+    async def subscribe(self, viewer, call_id):
+        channel = self.channels.get(call_id)
+        if channel is None:
+            channel = self.channels[call_id] = CallChannel(call_id, self.loop)
+            try:
+                state = await self.loop.run_in_executor(None, self.snapshot_loader, call_id)
+            except BaseException:
+                # Wake viewers waiting on this load; the next subscriber starts a fresh channel
+                if self.channels.get(call_id) is channel:
+                    del self.channels[call_id]
+                channel.failed = True
+                channel.loaded.set()
+                raise
+            channel.set_state(state)
+        else:
+            await channel.loaded.wait()
+            if channel.failed:
+                viewer.offer(encode({'type': 'error', 'call_id': call_id, 'message': 'Call unavailable'}))
+                return
+
+        if channel.state is None:
+            if not channel.viewers:
+                self.channels.pop(call_id, None)
+            viewer.offer(encode({'type': 'error', 'call_id': call_id, 'message': 'Call not found'}))
+            return
+
+        viewer.offer(channel.snapshot_message())
+        channel.viewers.add(viewer)
+        viewer.call_ids.add(call_id)
+
+    def unsubscribe(self, viewer, call_id):
+        viewer.call_ids.discard(call_id)
+        channel = self.channels.get(call_id)
+        if channel is None:
+            return
+        channel.viewers.discard(viewer)
+        if not channel.viewers and channel.loaded.is_set():
+            channel.cancel_interim()
+            del self.channels[call_id]
+
+    async def handle_message(self, viewer, raw):
+        """Client messages: {"action": "subscribe"|"unsubscribe", "call_id": N} or {"action": "ping"}"""
+        try:
+            message = json.loads(raw)
+            action = message.get('action')
+            if action == 'ping':
+                viewer.offer(encode({'type': 'pong'}))
+                return
+            call_id = int(message['call_id'])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            viewer.offer(encode({'type': 'error', 'message': 'Invalid message'}))
+            return
+
+        if action == 'subscribe':
+            await self.subscribe(viewer, call_id)
+        elif action == 'unsubscribe':
+            self.unsubscribe(viewer, call_id)
+            viewer.offer(encode({'type': 'unsubscribed', 'call_id': call_id}))
+        else:
+            viewer.offer(encode({'type': 'error', 'message': f'Unknown action: {action}'}))
+
+    async def handler(self, websocket, path=None):
+        """
+        WebSocket connection handler
+
+        Connecting to /calls/<id> subscribes to that call immediately; further
+        calls can be added with subscribe/unsubscribe messages.
+        """
+        viewer = Viewer(websocket)
+        writer = asyncio.ensure_future(viewer.write_loop())
+        try:
+            parts = urlparse(path or getattr(websocket, 'path', '') or '').path.strip('/').split('/')
+            if len(parts) == 2 and parts[0] == 'calls' and parts[1].isdigit():
+                await self.subscribe(viewer, int(parts[1]))
+            async for raw in websocket:
+                await self.handle_message(viewer, raw)
+        except ConnectionClosed:
+            pass
+        finally:
+            writer.cancel()
+            for call_id in list(viewer.call_ids):
+                self.unsubscribe(viewer, call_id)
+
+    # Event bus bridge
+
+    def start_bridge(self):
+        """Forward event bus events to the loop from a background thread"""
+        thread = threading.Thread(target=self._bridge_loop, daemon=True)
+        thread.start()
+        return thread
+
+    def _bridge_loop(self):
+        relevant = {'call.transcript', 'call.answer', 'call.status'}
+        last_event_id = None
+        with self.app.app_context():
+            while True:
+                subscription, _ = event_bus.subscribe(last_event_id=last_event_id)
+                while True:
+                    event = subscription.get(timeout=1)
+                    if event is None:
+                        continue
+                    if event is DROPPED:
+                        logger.warning("WebSocket bridge fell behind the event bus; resubscribing")
+                        event_bus.unsubscribe(subscription)
+                        break
+                    last_event_id = event.id
+                    if event.event_type in relevant and event.call_id in self.channels:
+                        self.loop.call_soon_threadsafe(self.dispatch, event)
+
+    async def serve(self, host=None, port=None):
+        """Run the WebSocket server until cancelled"""
+        self.loop = asyncio.get_running_loop()
+        if self.app is not None:
+            if event_bus.backend != 'database':
+                logger.warning("EVENT_BUS_BACKEND is not 'database'; only events from this process will be seen")
+            self.start_bridge()
+        host = host or Config.WS_HOST
+        port = port or Config.WS_PORT
+        async with websockets.serve(self.handler, host, port, max_queue=16):
+            logger.info(f"Live transcript WebSocket server listening on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+def run(app, host=None, port=None):
+    """Blocking entry point used by ws_server.py"""
+    asyncio.run(TranscriptHub(app).serve(host, port))
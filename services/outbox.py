@@ -0,0 +1,661 @@
+"""
+Transactional outbox for external pushes
+Call completion writes one outbox_jobs row per enabled target in the same
+transaction; background workers deliver them with per-target concurrency,
+exponential backoff and dead-lettering. Delivery is at least once, so every
+attempt carries the job's idempotency key. Payloads are content-hashed, and a
+payload a target has already acknowledged is not pushed to it again.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Call, OutboxJob, PushState
+from services.storage_service import StorageService
+from services.json_stream import TranscriptRows
+from services.circuit_breaker import CallRejected, breaker_states, get_breaker
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'in_progress', 'delivered', 'skipped', 'dead')
+
+# Call fields that change as a side effect of pushing or saving, not with the call's content
+VOLATILE_CALL_FIELDS = frozenset({
+    'memverge_id', 'aperturedata_id', 'backend_pushed', 'backend_pushed_at', 'updated_at', 'version'
+})
+
+
+def _apply_memverge(call, result):
+    call.memverge_id = result
+
+
+def _apply_aperturedata(call, result):
+    call.aperturedata_id = result
+
+
+def _apply_backend(call, result):
+    call.backend_pushed = True
+    call.backend_pushed_at = datetime.utcnow()
+
+
+def _cold_on_completion():
+    """With tiering, calls reach ApertureData when demoted from MemVerge rather than at completion"""
+    return Config.APERTUREDATA_ENABLED and not (Config.TIERING_ENABLED and Config.MEMVERGE_ENABLED)
+
+
+# target -> (is enabled, push function, record the result on the Call)
+TARGETS = {
+    'memverge': (lambda: Config.MEMVERGE_ENABLED, StorageService.push_to_memverge, _apply_memverge),
+    'aperturedata': (_cold_on_completion, StorageService.push_to_aperturedata, _apply_aperturedata),
+    'backend': (lambda: bool(Config.BACKEND_API_URL), StorageService.push_to_backend, _apply_backend)
+}
+
+
+# target -> (is enabled, batch push function, max items, max delay in ms) for targets
+# that take several calls per request; the push returns key -> (accepted, id or error)
+BATCHES = {
+    'aperturedata': (lambda: Config.APERTUREDATA_BATCH_MAX_ITEMS > 1,
+                     lambda items: StorageService.push_batch_to_aperturedata(items),
+                     lambda: Config.APERTUREDATA_BATCH_MAX_ITEMS, lambda: Config.APERTUREDATA_BATCH_MAX_DELAY_MS),
+    'backend': (lambda: Config.BACKEND_BATCH_ENABLED,
+                lambda items: StorageService.push_batch_to_backend(items),
+                lambda: Config.BACKEND_BATCH_MAX_ITEMS, lambda: Config.BACKEND_BATCH_MAX_DELAY_MS)
+}
+
+# Targets that accept a push with unchanged sections left out
+PARTIAL_UPDATES = {
+    'backend': lambda: Config.BACKEND_PARTIAL_UPDATES
+}
+
+
+class PushFailed(Exception):
+    """A target did not accept a push"""
+
+
+def enabled_targets():
+    return [target for target, (enabled, _, _) in TARGETS.items() if enabled()]
+
+
+def canonical_json(value):
+    """Serialize with sorted keys and no whitespace, so equal content always gives equal bytes"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def payload_hashes(call_data, transcript_data):
+    """
+    Hash a push payload per section and overall
+
+    Volatile call fields (push results, updated_at, version) are left out, so
+    writing back a push result does not make the call look changed.
+    Transcripts are hashed segment by segment, so transcript_data can be a
+    cursor; the hash equals that of the canonical JSON of the whole list.
+
+    Returns:
+        tuple: (content hash, {'call': hash, 'transcripts': hash})
+    """
+    call_content = {key: value for key, value in call_data.items() if key not in VOLATILE_CALL_FIELDS}
+    transcripts = hashlib.sha256(b'[')
+    for i, segment in enumerate(transcript_data):
+        if i:
+            transcripts.update(b',')
+        transcripts.update(canonical_json(segment).encode('utf-8'))
+    transcripts.update(b']')
+    sections = {
+        'call': hashlib.sha256(canonical_json(call_content).encode('utf-8')).hexdigest(),
+        'transcripts': transcripts.hexdigest()
+    }
+    return hashlib.sha256(canonical_json(sections).encode('utf-8')).hexdigest(), sections
+
+
+def backoff_delay(attempts, base=None, maximum=None):
+    """
+    Seconds to wait before retrying after a job's nth failed attempt
+
+    Doubles per attempt up to the maximum, with jitter so jobs that failed
+    together (e.g. during an outage) do not retry in lockstep.
+    """
+    base = Config.OUTBOX_BACKOFF_BASE_SECONDS if base is None else base
+    maximum = Config.OUTBOX_BACKOFF_MAX_SECONDS if maximum is None else maximum
+    delay = min(maximum, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Outbox:
+    """
+    Enqueues push jobs and runs the workers that deliver them
+
+    Workers claim a due job with a conditional UPDATE, so several threads or
+    processes can drain the same table. A claimed job is leased for
+    OUTBOX_LEASE_SECONDS; if its worker dies, the job becomes due again when
+    the lease expires.
+    """
+
+    def __init__(self, concurrency=None):
+        self.concurrency = concurrency or Config.OUTBOX_CONCURRENCY
+        self._app = None
+        self._lock = threading.Lock()
+        self._threads = []
+        self._wakeups = {target: threading.Event() for target in TARGETS}
+        self._stopping = threading.Event()
+        self._last_prune = 0.0
+        self._metrics_lock = threading.Lock()
+        self._requests = {target: 0 for target in TARGETS}  # Push requests sent
+        self._items = {target: 0 for target in TARGETS}  # Jobs carried by those requests
+        self._delays = {target: deque(maxlen=1000) for target in TARGETS}  # Enqueue -> delivered seconds
+        self._skipped = {target: 0 for target in TARGETS}  # Pushes skipped as already acknowledged
+
+    def init_app(self, app):
+        """Remember the app so worker threads can open app contexts"""
+        self._app = app
+
+    # Enqueueing
+
+    def enqueue_push(self, call, transcript_data=None):
+        """
+        Add push jobs for a call to the current session (the caller commits)
+
+        One job per enabled target, skipping targets that already acknowledged
+        this exact content or have it queued. Keys include the call version, so
+        a repeated webhook does not enqueue the same push twice.
+
+        Jobs store the call but not its transcripts: these are hashed here and
+        streamed from the database at delivery, so a long call is never held in
+        memory or copied into the outbox. A delivery therefore sends the
+        transcripts as they are then.
+
+        Args:
+            call (Call): The call (must have an id; flush first if it is new)
+            transcript_data (list): Transcript segments to hash (default: read from the database)
+
+        Returns:
+            list: The OutboxJob rows added
+        """
+        targets = enabled_targets()
+        if not targets:
+            return []
+
+        db.session.flush()  # Bring call.version up to date with pending changes
+        call_data = call.to_dict()
+        if transcript_data is None:
+            transcript_data = TranscriptRows(call.id)
+        content_hash, sections = payload_hashes(call_data, transcript_data)
+        keys = {target: f"{target}:call:{call.id}:v{call.version}" for target in targets}
+        existing = {
+            key for (key,) in db.session.query(OutboxJob.idempotency_key)
+            .filter(OutboxJob.idempotency_key.in_(keys.values()))
+        }
+        acknowledged = {
+            target for (target,) in db.session.query(PushState.target)
+            .filter(PushState.call_id == call.id, PushState.content_hash == content_hash)
+        }
+        queued = {
+            target for (target,) in db.session.query(OutboxJob.target).filter(
+                OutboxJob.call_id == call.id,
+                OutboxJob.content_hash == content_hash,
+                OutboxJob.status.in_(('pending', 'in_progress'))
+            )
+        }
+        payload = json.dumps({'call': call_data}, default=str)
+
+        jobs = []
+        for target, key in keys.items():
+            if target in acknowledged or target in queued:
+                self._count_skip(target)
+                continue
+            if key in existing:
+                continue
+            job = OutboxJob(target=target, call_id=call.id, idempotency_key=key, payload=payload,
+                            content_hash=content_hash, section_hashes=json.dumps(sections))
+            db.session.add(job)
+            jobs.append(job)
+        return jobs
+
+    def resync(self, call_ids):
+        """
+        Queue pushes of the current data for calls (manual re-sync or backfill)
+
+        Unchanged calls are skipped per target, so re-syncing is cheap.
+
+        Returns:
+            dict: Jobs enqueued and calls not found
+        """
+        enqueued, missing = 0, []
+        for call_id in call_ids:
+            call = db.session.get(Call, call_id)
+            if call is None:
+                missing.append(call_id)
+                continue
+            enqueued += len(self.enqueue_push(call))
+        db.session.commit()
+        if enqueued:
+            self.wake()
+        return {'enqueued': enqueued, 'missing': missing}
+
+    def wake(self):
+        """Tell workers new jobs were committed (starts them on first use)"""
+        if Config.OUTBOX_WORKERS_ENABLED:
+            self.start()
+        for event in self._wakeups.values():
+            event.set()
+
+    # Delivering
+
+    def _due(self, target, now):
+        return db.and_(
+            OutboxJob.target == target,
+            db.or_(
+                db.and_(OutboxJob.status == 'pending', OutboxJob.next_attempt_at <= now),
+                db.and_(OutboxJob.status == 'in_progress', OutboxJob.locked_until < now)
+            )
+        )
+
+    def claim(self, target):
+        """
+        Claim the next due job for a target
+
+        Returns:
+            OutboxJob: The claimed job, or None if none is due
+        """
+        jobs = self.claim_many(target, 1)
+        return jobs[0] if jobs else None
+
+    def claim_many(self, target, limit):
+        """
+        Claim up to limit due jobs for a target, oldest due first
+
+        Each claim is tagged with a fresh token, so jobs another worker claimed
+        between the select and the update are not returned.
+
+        Returns:
+            list: Claimed OutboxJob rows
+        """
+        now = datetime.utcnow()
+        ids = [
+            row.id for row in db.session.query(OutboxJob.id)
+            .filter(self._due(target, now))
+            .order_by(OutboxJob.next_attempt_at, OutboxJob.id)
+            .limit(limit)
+        ]
+        if not ids:
+            db.session.commit()
+            return []
+
+        token = uuid.uuid4().hex
+        OutboxJob.query.filter(OutboxJob.id.in_(ids), self._due(target, now)).update({
+            'status': 'in_progress',
+            'attempts': OutboxJob.attempts + 1,
+            'locked_until': now + timedelta(seconds=Config.OUTBOX_LEASE_SECONDS),
+            'claimed_by': token
+        }, synchronize_session=False)
+        db.session.commit()
+        return OutboxJob.query.filter_by(claimed_by=token).order_by(OutboxJob.id).all()
+
+    def deliver(self, job):
+        """Attempt one delivery and record the outcome"""
+        _, push, apply = TARGETS[job.target]
+        state = self._push_state(job)
+        if self._already_acknowledged(job, state):
+            self._mark_skipped(job)
+            db.session.commit()
+            return True
+
+        payload = json.loads(job.payload)
+        self._count_request(job.target, 1)
+        try:
+            result = get_breaker(job.target).call(
+                push, payload['call'], self._transcripts_to_send(job, state, payload),
+                idempotency_key=job.idempotency_key
+            )
+            if not result:
+                raise PushFailed(f"{job.target} did not accept the push")
+        except CallRejected as e:
+            self._defer(job, e)
+            return False
+        except Exception as e:
+            self._record_failure(job, e)
+            return False
+
+        self._mark_delivered(job, result, apply)
+        db.session.commit()
+        logger.info(f"Delivered outbox job {job.id} to {job.target} after {job.attempts} attempt(s)")
+        return True
+
+    def deliver_batch(self, jobs):
+        """
+        Deliver jobs for one target in one request; only items the target did not acknowledge are retried
+
+        Returns:
+            int: Number of jobs delivered
+        """
+        target = jobs[0].target
+        _, _, apply = TARGETS[target]
+        _, push_batch, _, _ = BATCHES[target]
+        pushing = []
+        items = []
+        for job in jobs:
+            state = self._push_state(job)
+            if self._already_acknowledged(job, state):
+                self._mark_skipped(job)
+                continue
+            payload = json.loads(job.payload)
+            pushing.append(job)
+            items.append((job.idempotency_key, payload['call'], self._transcripts_to_send(job, state, payload)))
+        if not pushing:
+            db.session.commit()
+            return 0
+        jobs = pushing
+        self._count_request(target, len(jobs))
+        try:
+            acks = get_breaker(target).call(push_batch, items)
+            if acks is None:
+                raise PushFailed(f"{target} did not accept the batch")
+        except CallRejected as e:
+            for job in jobs:
+                self._defer(job, e)
+            return 0
+        except Exception as e:
+            acks = {job.idempotency_key: (False, str(e)) for job in jobs}
+
+        delivered = 0
+        for job in jobs:
+            accepted, detail = acks.get(job.idempotency_key, (False, 'Not acknowledged by the receiver'))
+            if accepted:
+                self._mark_delivered(job, detail or True, apply)
+                delivered += 1
+            else:
+                self._record_failure(job, PushFailed(detail or f'{target} rejected the item'))
+        db.session.commit()
+        logger.info(f"Delivered {delivered}/{len(jobs)} outbox jobs to {target} in one batch")
+        return delivered
+
+    def _push_state(self, job):
+        if job.call_id is None:
+            return None
+        return PushState.query.filter_by(target=job.target, call_id=job.call_id).first()
+
+    @staticmethod
+    def _already_acknowledged(job, state):
+        return state is not None and job.content_hash is not None and state.content_hash == job.content_hash
+
+    @staticmethod
+    def _transcripts_to_send(job, state, payload):
+        """
+        Transcripts to push: a cursor over the call's rows (or those stored in the
+        payload by older jobs), or None to leave them out when the target takes
+        partial updates and they are unchanged
+        """
+        transcripts = payload['transcripts'] if 'transcripts' in payload else TranscriptRows(job.call_id)
+        partial = PARTIAL_UPDATES.get(job.target)
+        if partial is None or not partial() or state is None or not job.section_hashes:
+            return transcripts
+        previous = json.loads(state.section_hashes or '{}')
+        if previous.get('transcripts') == json.loads(job.section_hashes).get('transcripts'):
+            return None
+        return transcripts
+
+    def _mark_delivered(self, job, result, apply):
+        """Record a successful delivery on the job, its call and the target's push state (the caller commits)"""
+        job.status = 'delivered'
+        job.delivered_at = datetime.utcnow()
+        job.locked_until = None
+        job.last_error = None
+        job.result = None if result is True else str(result)
+        call = db.session.get(Call, job.call_id) if job.call_id else None
+        if call is not None:
+            apply(call, result)
+        if job.call_id is not None and job.content_hash:
+            state = self._push_state(job)
+            if state is None:
+                state = PushState(target=job.target, call_id=job.call_id)
+                db.session.add(state)
+            state.content_hash = job.content_hash
+            state.section_hashes = job.section_hashes
+            state.acknowledged_at = job.delivered_at
+        with self._metrics_lock:
+            self._delays[job.target].append((job.delivered_at - job.created_at).total_seconds())
+
+    def _mark_skipped(self, job):
+        """Close a job whose payload the target already acknowledged (the caller commits)"""
+        job.status = 'skipped'
+        job.delivered_at = datetime.utcnow()
+        job.locked_until = None
+        job.attempts -= 1
+        self._count_skip(job.target)
+        logger.info(f"Skipped outbox job {job.id}: {job.target} already has this content")
+
+    def _count_skip(self, target):
+        with self._metrics_lock:
+            self._skipped[target] += 1
+
+    def _count_request(self, target, items):
+        with self._metrics_lock:
+            self._requests[target] += 1
+            self._items[target] += items
+
+    def _defer(self, job, rejection):
+        """Put back a job the target's breaker or bulkhead turned away, without using up an attempt"""
+        job.status = 'pending'
+        job.attempts -= 1
+        job.locked_until = None
+        job.next_attempt_at = datetime.utcnow() + timedelta(seconds=rejection.retry_after)
+        db.session.commit()
+        logger.info(f"Deferred outbox job {job.id} by {rejection.retry_after:.0f}s: {rejection}")
+
+    def _record_failure(self, job, error):
+        job.last_error = str(error)[:1000]
+        job.locked_until = None
+        if job.attempts >= Config.OUTBOX_MAX_ATTEMPTS:
+            job.status = 'dead'
+            logger.error(f"Outbox job {job.id} to {job.target} dead-lettered after {job.attempts} attempts: {error}")
+        else:
+            job.status = 'pending'
+            job.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+            logger.warning(f"Outbox job {job.id} to {job.target} failed (attempt {job.attempts}), "
+                           f"retrying at {job.next_attempt_at.isoformat()}: {error}")
+        db.session.commit()
+
+    def process_one(self, target):
+        """Claim and deliver one due job (or one batch); returns False when none was due"""
+        batch = BATCHES.get(target)
+        if batch is not None and batch[0]():
+            return self.process_batch(target)
+        job = self.claim(target)
+        if job is None:
+            return False
+        self.deliver(job)
+        return True
+
+    def process_batch(self, target='backend', max_items=None, max_delay=None):
+        """
+        Collect due jobs for a target into one batch and deliver it
+
+        The batch is cut when it holds max_items jobs or max_delay seconds
+        after its first job was claimed, whichever comes first.
+
+        Returns:
+            bool: False when no job was due
+        """
+        _, _, items_limit, delay_ms = BATCHES[target]
+        max_items = max_items or items_limit()
+        max_delay = delay_ms() / 1000 if max_delay is None else max_delay
+        jobs = self.claim_many(target, max_items)
+        if not jobs:
+            return False
+
+        cut_at = time.monotonic() + max_delay
+        wakeup = self._wakeups[target]
+        while len(jobs) < max_items:
+            remaining = cut_at - time.monotonic()
+            if remaining <= 0:
+                break
+            wakeup.wait(remaining)
+            wakeup.clear()
+            jobs.extend(self.claim_many(target, max_items - len(jobs)))
+
+        self.deliver_batch(jobs)
+        return True
+
+    def drain(self, targets=None):
+        """
+        Deliver every job that is currently due (used by tests and the CLI)
+
+        Returns:
+            int: Number of delivery attempts made
+        """
+        attempts = 0
+        for target in targets or TARGETS:
+            while self.process_one(target):
+                attempts += 1
+        return attempts
+
+    # Workers
+
+    def start(self, app=None):
+        """Start OUTBOX_CONCURRENCY worker threads per target (no-op if running)"""
+        with self._lock:
+            if self._threads:
+                return
+            app = app or self._app or current_app._get_current_object()
+            self._stopping.clear()
+            for target in TARGETS:
+                for n in range(self.concurrency):
+                    thread = threading.Thread(
+                        target=self._work, args=(app, target), name=f'outbox-{target}-{n}', daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+            logger.info(f"Started {len(self._threads)} outbox workers")
+
+    def stop(self, timeout=None):
+        """Stop the worker threads after their current delivery"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        for event in self._wakeups.values():
+            event.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _work(self, app, target):
+        """Worker loop: deliver due jobs, then sleep until woken or the poll interval passes"""
+        wakeup = self._wakeups[target]
+        with app.app_context():
+            while not self._stopping.is_set():
+                delivered = False
+                try:
+                    delivered = self.process_one(target)
+                    self._maybe_prune()
+                except Exception as e:
+                    logger.error(f"Error in outbox worker for {target}: {str(e)}")
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                if not delivered:
+                    wakeup.wait(Config.OUTBOX_POLL_INTERVAL)
+                    wakeup.clear()
+
+    def _maybe_prune(self):
+        """Delete delivered and skipped jobs older than OUTBOX_RETENTION_HOURS (at most once a minute)"""
+        with self._lock:
+            if time.time() - self._last_prune < 60:
+                return
+            self._last_prune = time.time()
+        cutoff = datetime.utcnow() - timedelta(hours=Config.OUTBOX_RETENTION_HOURS)
+        OutboxJob.query.filter(
+            OutboxJob.status.in_(('delivered', 'skipped')), OutboxJob.delivered_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    # Operations
+
+    def retry_dead(self, job_id=None):
+        """
+        Move dead-lettered jobs back to pending with a fresh attempt budget
+
+        Args:
+            job_id (int): Only this job (default: all dead jobs)
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        query = OutboxJob.query.filter(OutboxJob.status == 'dead')
+        if job_id is not None:
+            query = query.filter(OutboxJob.id == job_id)
+        count = query.update({
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if count:
+            self.wake()
+        return count
+
+    def stats(self):
+        """
+        Outbox depth and age per target
+
+        Returns:
+            dict: Job counts by status, and the age in seconds of the oldest
+                  undelivered job, per target and overall, plus circuit breaker state
+        """
+        now = datetime.utcnow()
+        targets = {
+            target: dict({status: 0 for status in STATUSES}, oldest_pending_seconds=None)
+            for target in TARGETS
+        }
+        rows = (
+            db.session.query(OutboxJob.target, OutboxJob.status, db.func.count(OutboxJob.id),
+                             db.func.min(OutboxJob.created_at))
+            .group_by(OutboxJob.target, OutboxJob.status)
+            .all()
+        )
+        for target, status, count, oldest in rows:
+            counts = targets.setdefault(target, dict({s: 0 for s in STATUSES}, oldest_pending_seconds=None))
+            counts[status] = count
+            if status in ('pending', 'in_progress') and oldest is not None:
+                age = round((now - oldest).total_seconds(), 1)
+                counts['oldest_pending_seconds'] = max(age, counts['oldest_pending_seconds'] or 0)
+
+        ages = [t['oldest_pending_seconds'] for t in targets.values() if t['oldest_pending_seconds'] is not None]
+        return {
+            'depth': sum(t['pending'] + t['in_progress'] for t in targets.values()),
+            'dead': sum(t['dead'] for t in targets.values()),
+            'oldest_pending_seconds': max(ages) if ages else None,
+            'targets': targets,
+            'delivery': self.delivery_stats(),
+            'circuits': breaker_states(enabled_targets())
+        }
+
+    def delivery_stats(self):
+        """
+        Requests sent by this process, and enqueue-to-delivery delay, per target
+
+        requests_saved counts jobs that rode along in another job's batch
+        request instead of needing their own; skipped counts pushes not made
+        because the target already acknowledged the same content.
+        """
+        with self._metrics_lock:
+            result = {}
+            for target in TARGETS:
+                delays = sorted(self._delays[target])
+                result[target] = {
+                    'requests': self._requests[target],
+                    'items': self._items[target],
+                    'requests_saved': self._items[target] - self._requests[target],
+                    'skipped': self._skipped[target],
+                    'delay_p50_seconds': round(delays[len(delays) // 2], 3) if delays else None,
+                    'delay_p95_seconds': round(delays[int(len(delays) * 0.95)], 3) if delays else None
+                }
+            return result
+
+
+outbox = Outbox()
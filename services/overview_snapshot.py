@@ -0,0 +1,131 @@
+"""
+Shared dashboard overview snapshot
+One producer per process recomputes system statistics and the recent call list at
+most once per tick, and only when the underlying tables changed; every viewer is
+served the same pre-serialized bytes
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, func
+from sqlalchemy.orm import load_only
+from models import db, Patient, Call
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ['initiated', 'ringing', 'answered']
+
+
+def compute_stats():
+    """
+    Compute system statistics
+
+    Returns:
+        dict: Patient and call counts plus consent rate
+    """
+    total_patients = Patient.query.count()
+    total_calls = Call.query.count()
+    completed_calls = Call.query.filter_by(status='completed').count()
+    active_calls = Call.query.filter(Call.status.in_(ACTIVE_STATUSES)).count()
+    consented_calls = Call.query.filter_by(consent_given=True).count()
+
+    return {
+        'total_patients': total_patients,
+        'total_calls': total_calls,
+        'completed_calls': completed_calls,
+        'active_calls': active_calls,
+        'consented_calls': consented_calls,
+        'consent_rate': round(consented_calls / total_calls * 100, 2) if total_calls > 0 else 0
+    }
+
+
+def get_fingerprint():
+    """
+    Cheap change marker for the overview: row counts and newest updated_at of
+    patients and calls (max(updated_at) is an index lookup)
+
+    Returns:
+        tuple: Values that change whenever the overview could change
+    """
+    calls = db.session.execute(select(func.count(Call.id), func.max(Call.updated_at))).one()
+    patients = db.session.execute(select(func.count(Patient.id), func.max(Patient.updated_at))).one()
+    return tuple(calls) + tuple(patients)
+
+
+class OverviewSnapshot:
+    """
+    Pre-serialized overview (stats + recent calls) shared by all viewers
+
+    Within a tick the current bytes are returned without touching the database.
+    After the tick one request checks the fingerprint and rebuilds only if it
+    changed; requests arriving while it does so are served the previous bytes.
+    """
+
+    def __init__(self, tick=None, recent_limit=10):
+        self.tick = Config.OVERVIEW_TICK_SECONDS if tick is None else tick
+        self.recent_limit = recent_limit
+        self._current = None  # (body, etag), replaced atomically
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def build(self):
+        """Serialize the overview payload"""
+        fields = Call.VIEWS['summary']
+        calls = Call.query.options(load_only(*Call.load_columns(fields))) \
+            .order_by(Call.created_at.desc()).limit(self.recent_limit).all()
+        payload = {
+            'stats': compute_stats(),
+            'recent_calls': [call.to_dict(fields) for call in calls],
+            'generated_at': datetime.utcnow().isoformat()
+        }
+        return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+    def get(self):
+        """
+        Get the current overview
+
+        Returns:
+            tuple: (bytes, etag)
+        """
+        current = self._current
+        if current is not None and time.monotonic() - self._checked_at < self.tick:
+            return current
+
+        # Only one request refreshes; others keep serving the previous snapshot
+        if not self._lock.acquire(blocking=current is None):
+            return current
+        try:
+            if self._current is not None and time.monotonic() - self._checked_at < self.tick:
+                return self._current
+            fingerprint = get_fingerprint()
+            if self._current is None or fingerprint != self._fingerprint:
+                body = self.build()
+                etag = 'overview-' + hashlib.sha1(body).hexdigest()[:16]
+                self._current = (body, etag)
+                self._fingerprint = fingerprint
+                self.builds += 1
+            self._checked_at = time.monotonic()
+            return self._current
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Force the next get() to check for changes"""
+        self._checked_at = 0.0
+
+    def reset(self):
+        """Drop the current snapshot"""
+        with self._lock:
+            self._current = None
+            self._fingerprint = None
+            self._checked_at = 0.0
+
+
+overview_snapshot = OverviewSnapshot()
@@ -0,0 +1,203 @@
+"""
+Bulk patient import
+Streams patient records from CSV or NDJSON, normalizes phone numbers to
+E.164, skips patients that already exist (one IN query per batch) and inserts
+the rest with executemany, committing once per batch.
+"""
+
+import csv
+import json
+import logging
+import re
+from datetime import date
+from sqlalchemy.exc import IntegrityError
+from models import db, Patient
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+
+# Accepted input columns (aliases map to the patient field)
+COLUMN_ALIASES = {
+    'phone_number': 'phone_number',
+    'phone': 'phone_number',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'email': 'email',
+    'date_of_birth': 'date_of_birth',
+    'dob': 'date_of_birth'
+}
+
+# Maximum lengths of the free-text fields
+TEXT_FIELDS = {name: Patient.__table__.c[name].type.length for name in ('first_name', 'last_name', 'email')}
+
+_PHONE_PUNCTUATION = re.compile(r'[\s().\-/]')
+
+
+def normalize_phone(value, default_country_code=None):
+    """
+    Normalize a phone number to E.164 (+<country code><number>)
+
+    Spaces, dots, dashes, slashes and parentheses are ignored. Numbers without
+    a leading + or 00 get the default country code, unless they already start
+    with it and are long enough to include it (e.g. 1 202 555 0100).
+
+    Args:
+        value (str): Phone number as entered
+        default_country_code (str): Country code for national numbers (default: IMPORT_DEFAULT_COUNTRY_CODE)
+
+    Returns:
+        str: E.164 phone number
+
+    Raises:
+        ValueError: If the number is empty or not a plausible phone number
+    """
+    country_code = default_country_code or Config.IMPORT_DEFAULT_COUNTRY_CODE
+    number = _PHONE_PUNCTUATION.sub('', str(value or ''))
+    if not number:
+        raise ValueError('phone_number is required')
+    if number.startswith('+'):
+        digits = number[1:]
+    elif number.startswith('00'):
+        digits = number[2:]
+    elif number.startswith(country_code) and len(number) == len(country_code) + 10:
+        digits = number
+    else:
+        digits = country_code + number.lstrip('0')
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        raise ValueError(f"Invalid phone number '{value}'")
+    return '+' + digits
+
+
+def iter_csv_records(stream):
+    """Yield (row number, record dict) from a CSV text stream with a header row"""
+    for row_number, record in enumerate(csv.DictReader(stream), start=2):
+        yield row_number, record
+
+
+def iter_ndjson_records(stream):
+    """Yield (line number, parsed line or None if it is not JSON) from an NDJSON text stream, skipping blank lines"""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def parse_record(record):
+    """
+    Validate one input record into Patient column values
+
+    Raises:
+        ValueError: If the record is invalid
+    """
+    if not isinstance(record, dict):
+        raise ValueError('Not a JSON object')
+    values = {}
+    for column, value in record.items():
+        field = COLUMN_ALIASES.get(str(column).strip().lower()) if column is not None else None
+        if field and field not in values:
+            value = value.strip() if isinstance(value, str) else value
+            values[field] = value if value not in ('', None) else None
+
+    values['phone_number'] = normalize_phone(values.get('phone_number'))
+    values.setdefault('date_of_birth', None)
+    if values['date_of_birth']:
+        try:
+            values['date_of_birth'] = date.fromisoformat(str(values['date_of_birth']))
+        except ValueError:
+            raise ValueError('Invalid date_of_birth format. Use YYYY-MM-DD')
+    for field, length in TEXT_FIELDS.items():
+        value = values.get(field)
+        if value is not None:
+            value = str(value)
+            if len(value) > length:
+                raise ValueError(f'{field} is longer than {length} characters')
+        values[field] = value
+    return values
+
+
+class PatientImporter:
+    """
+    Imports patient records in batches
+
+    Args:
+        batch_size (int): Records per dedup query and transaction (default: IMPORT_BATCH_SIZE)
+        max_errors (int): Row errors listed in the result; the rest are only counted
+    """
+
+    def __init__(self, batch_size=None, max_errors=None):
+        self.batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+        self.max_errors = max_errors if max_errors is not None else Config.IMPORT_MAX_ERRORS
+
+    def import_stream(self, stream, fmt):
+        """
+        Import a CSV or NDJSON text stream
+
+        Args:
+            stream: Text file object (read line by line)
+            fmt (str): 'csv' or 'ndjson'
+
+        Returns:
+            dict: Counts and per-row errors (see import_records)
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+        records = iter_csv_records(stream) if fmt == 'csv' else iter_ndjson_records(stream)
+        return self.import_records(records)
+
+    def import_records(self, records):
+        """
+        Import (row number, record) pairs
+
+        Returns:
+            dict: rows, inserted, skipped (phone number already on file or
+                  earlier in the input), failed, and errors [{row, error}]
+                  for the first max_errors failures
+        """
+        result = {'rows': 0, 'inserted': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+        batch = {}  # phone number -> values, first occurrence wins
+        for row_number, record in records:
+            result['rows'] += 1
+            try:
+                values = parse_record(record)
+            except ValueError as e:
+                result['failed'] += 1
+                if len(result['errors']) < self.max_errors:
+                    result['errors'].append({'row': row_number, 'error': str(e)})
+                continue
+            if values['phone_number'] in batch:
+                result['skipped'] += 1
+                continue
+            batch[values['phone_number']] = values
+            if len(batch) >= self.batch_size:
+                self._flush(batch, result)
+                batch = {}
+        if batch:
+            self._flush(batch, result)
+        logger.info(f"Imported {result['inserted']} of {result['rows']} patients "
+                    f"({result['skipped']} skipped, {result['failed']} failed)")
+        return result
+
+    def _flush(self, batch, result):
+        """Insert a batch's new patients in one transaction"""
+        for attempt in range(2):
+            existing = set(db.session.scalars(
+                db.select(Patient.phone_number).where(Patient.phone_number.in_(list(batch)))
+            ))
+            rows = [values for phone, values in batch.items() if phone not in existing]
+            try:
+                if rows:
+                    db.session.execute(db.insert(Patient), rows)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Another writer added one of these numbers since the check: check again
+                db.session.rollback()
+                if attempt:
+                    raise
+        result['skipped'] += len(batch) - len(rows)
+        result['inserted'] += len(rows)
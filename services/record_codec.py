@@ -0,0 +1,263 @@
+"""
+Compression codecs for at-rest records
+zstd (with an optional trained dictionary for small records) when the
+zstandard package is installed, zlib with a preset dictionary otherwise.
+Codecs keep byte and time counters for ratio and throughput reporting.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from config import Config
+
+try:
+    import zstandard
+except ImportError:  # Optional: falls back to zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODECS = ('none', 'zstd', 'zlib')
+
+# zlib only uses the last 32 KB of a preset dictionary
+ZLIB_MAX_DICTIONARY = 32 * 1024
+DICTIONARY_DIRNAME = 'dictionaries'
+CURRENT_DICTIONARY = 'CURRENT'
+
+
+def resolve_codec_name(name=None):
+    """
+    Resolve a configured codec name, falling back to zlib when zstandard is missing
+
+    Raises:
+        ValueError: If the name is not a known codec
+    """
+    name = name or Config.STORAGE_COMPRESSION
+    if name not in CODECS:
+        raise ValueError(f"Unknown compression codec '{name}' (expected one of: {', '.join(CODECS)})")
+    if name == 'zstd' and zstandard is None:
+        logger.warning("zstandard is not installed; using zlib compression")
+        return 'zlib'
+    return name
+
+
+class RecordCodec:
+    """
+    Compresses and decompresses individual records
+
+    Args:
+        name (str): zstd or zlib
+        level (int): Compression level (default: STORAGE_COMPRESSION_LEVEL)
+        dictionary (bytes): Optional dictionary trained on similar records
+        dictionary_id (str): Identifier stored with data compressed using the dictionary
+    """
+
+    def __init__(self, name, level=None, dictionary=None, dictionary_id=None):
+        if name not in ('zstd', 'zlib'):
+            raise ValueError(f"Unsupported codec '{name}'")
+        self.name = name
+        self.level = Config.STORAGE_COMPRESSION_LEVEL if level is None else level
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary_id
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.encode_seconds = 0.0
+        self.decoded_bytes = 0
+        self.decode_seconds = 0.0
+
+    # zstd contexts are not thread-safe, so each thread gets its own
+    def _zstd(self):
+        if not hasattr(self._local, 'compressor'):
+            zdict = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=zdict)
+            self._local.decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+        return self._local.compressor, self._local.decompressor
+
+    def compress(self, data):
+        """Compress one record (bytes)"""
+        start = time.perf_counter()
+        if self.name == 'zstd':
+            compressed = self._zstd()[0].compress(data)
+        elif self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+            compressed = compressor.compress(data) + compressor.flush()
+        else:
+            compressed = zlib.compress(data, self.level)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+            self.encode_seconds += elapsed
+        return compressed
+
+    def decompress(self, data):
+        """Decompress one record"""
+        start = time.perf_counter()
+        if self.name == 'zstd':
+            # Records are written with the content size, so no output bound is needed
+            raw = self._zstd()[1].decompress(data)
+        elif self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+            raw = decompressor.decompress(data) + decompressor.flush()
+        else:
+            raw = zlib.decompress(data)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.decoded_bytes += len(raw)
+            self.decode_seconds += elapsed
+        return raw
+
+    def stream_reader(self, fileobj):
+        """
+        Incrementally decompress a file object holding one compressed stream
+
+        Returns:
+            io.BufferedReader: Readable stream of decompressed bytes
+        """
+        if self.name == 'zstd':
+            return io.BufferedReader(self._zstd()[1].stream_reader(fileobj, read_across_frames=True))
+        return io.BufferedReader(_ZlibStreamReader(fileobj, self.dictionary))
+
+    def stats(self):
+        """Compression ratio and encode/decode throughput so far"""
+        with self._stats_lock:
+            return {
+                'codec': self.name,
+                'dictionary': self.dictionary_id,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+                'encode_mb_per_second': (
+                    round(self.bytes_in / self.encode_seconds / 1e6, 1) if self.encode_seconds else None
+                ),
+                'decode_mb_per_second': (
+                    round(self.decoded_bytes / self.decode_seconds / 1e6, 1) if self.decode_seconds else None
+                )
+            }
+
+
+class _ZlibStreamReader(io.RawIOBase):
+    """Raw reader that decompresses a zlib stream chunk by chunk"""
+
+    def __init__(self, fileobj, dictionary=None, chunk_size=64 * 1024):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        self.buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while not self.buffer:
+            if self.decompressor.eof:
+                return 0
+            chunk = self.fileobj.read(self.chunk_size)
+            self.buffer = self.decompressor.decompress(chunk) if chunk else self.decompressor.flush()
+            if not chunk and not self.buffer:
+                return 0
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+def train_dictionary(samples, name=None, size=None):
+    """
+    Build a dictionary from sample records
+
+    zstd trains a real dictionary; zlib uses the samples themselves (most recent
+    last) as a preset dictionary, which captures the repeated JSON keys.
+
+    Args:
+        samples (list): Sample records (bytes)
+        name (str): Codec name (default: configured codec)
+        size (int): Target dictionary size in bytes
+
+    Returns:
+        bytes: Dictionary contents
+    """
+    name = resolve_codec_name(name)
+    size = size or Config.STORAGE_DICTIONARY_SIZE
+    if name == 'zstd':
+        return zstandard.train_dictionary(size, samples).as_bytes()
+    return b''.join(samples)[-min(size, ZLIB_MAX_DICTIONARY):]
+
+
+class DictionaryStore:
+    """Trained dictionaries kept under <root>/dictionaries, addressed by content hash"""
+
+    def __init__(self, root):
+        self.path = Path(root) / DICTIONARY_DIRNAME
+        self._cache = {}
+        self._current = None
+
+    def save(self, dictionary):
+        """Store a dictionary and make it current; returns its id"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        dictionary_id = hashlib.sha256(dictionary).hexdigest()[:16]
+        (self.path / f'{dictionary_id}.dict').write_bytes(dictionary)
+        tmp_path = self.path / f'{CURRENT_DICTIONARY}.tmp'
+        tmp_path.write_text(dictionary_id)
+        os.replace(tmp_path, self.path / CURRENT_DICTIONARY)
+        self._cache[dictionary_id] = dictionary
+        self._current = dictionary_id
+        return dictionary_id
+
+    def current_id(self):
+        """Id of the dictionary for new data (read once; other processes pick up a new one on restart)"""
+        if self._current is None:
+            try:
+                self._current = (self.path / CURRENT_DICTIONARY).read_text().strip()
+            except FileNotFoundError:
+                self._current = ''
+        return self._current or None
+
+    def load(self, dictionary_id):
+        if dictionary_id not in self._cache:
+            self._cache[dictionary_id] = (self.path / f'{dictionary_id}.dict').read_bytes()
+        return self._cache[dictionary_id]
+
+
+class CodecRegistry:
+    """
+    Codecs for one storage root
+
+    New data is written with the configured codec and the current dictionary;
+    older data names the codec and dictionary it was written with.
+    """
+
+    def __init__(self, root, name=None, level=None):
+        self.name = resolve_codec_name(name)
+        self.level = level
+        self.dictionaries = DictionaryStore(root)
+        self._codecs = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, dictionary_id=None):
+        """Codec for reading data written with name and dictionary_id"""
+        key = (name, dictionary_id)
+        with self._lock:
+            codec = self._codecs.get(key)
+            if codec is None:
+                dictionary = self.dictionaries.load(dictionary_id) if dictionary_id else None
+                codec = self._codecs[key] = RecordCodec(name, self.level, dictionary, dictionary_id)
+            return codec
+
+    def writer(self):
+        """Codec for new data, or None when compression is disabled"""
+        if self.name == 'none':
+            return None
+        return self.get(self.name, self.dictionaries.current_id())
+
+    def train(self, samples):
+        """Train a dictionary for the configured codec and make it current"""
+        dictionary = train_dictionary(samples, self.name if self.name != 'none' else None)
+        return self.dictionaries.save(dictionary)
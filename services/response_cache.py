@@ -0,0 +1,123 @@
+"""
+Conditional GET and response caching for call resources
+Call.version drives strong ETags; completed calls are served from a small LRU cache
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from flask import request, make_response, jsonify, abort
+from sqlalchemy import select
+from models import db, Call
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Calls in these states no longer change through the intake flow
+FINAL_STATUSES = {'completed', 'failed'}
+
+
+class LRUResponseCache:
+    """Thread-safe LRU cache of serialized response bodies with per-entry TTL"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        """Store a value for ttl seconds, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+response_cache = LRUResponseCache(max_entries=Config.RESPONSE_CACHE_SIZE)
+
+
+def get_call_version(call_id):
+    """
+    Fetch (version, status) for a call with a single Core query
+
+    Returns:
+        tuple: (version, status) or None if the call does not exist
+    """
+    row = db.session.execute(
+        select(Call.version, Call.status).where(Call.id == call_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def make_etag(resource, call_id, version):
+    """Build a strong ETag for one representation of a call resource"""
+    variant = hashlib.sha1(request.query_string).hexdigest()[:8]
+    return f'{resource}-{call_id}-v{version}-{variant}'
+
+
+def conditional_call_response(resource, call_id, build):
+    """
+    Serve a call resource with ETag validation and caching
+
+    1. Look up the call version (no ORM load) and answer If-None-Match with 304.
+    2. Serve completed calls from the LRU cache.
+    3. Otherwise call build() for the JSON payload and cache it if the call is final.
+
+    Args:
+        resource (str): Resource name (call, intake-data, transcripts)
+        call_id (int): Call ID
+        build (callable): Returns the JSON-serializable payload
+
+    Returns:
+        Response: 200 with body and ETag, or 304
+    """
+    current = get_call_version(call_id)
+    if current is None:
+        abort(404)
+    version, status = current
+
+    etag = make_etag(resource, call_id, version)
+    # Weak comparison: gzip-encoded responses carry the weak form of the ETag
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        cache_key = (resource, call_id, version, request.query_string)
+        body = response_cache.get(cache_key) if status in FINAL_STATUSES else None
+        if body is None:
+            body = jsonify(build()).get_data()
+            if status in FINAL_STATUSES:
+                response_cache.set(cache_key, body, Config.RESPONSE_CACHE_TTL)
+        response = make_response(body)
+        response.mimetype = 'application/json'
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -0,0 +1,263 @@
+"""
+Rollup service for time-bucketed call analytics
+Maintains minute, hour and day aggregates so time-series queries read buckets instead of calls
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, CallRollup
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Ordered from finest to coarsest
+GRANULARITIES = ['minute', 'hour', 'day']
+
+# Last time compaction ran in this process (epoch seconds)
+_last_compaction = 0.0
+
+
+def truncate(moment, granularity):
+    """
+    Truncate a datetime to the start of its bucket
+
+    Args:
+        moment (datetime): Timestamp to truncate
+        granularity (str): minute, hour or day
+
+    Returns:
+        datetime: Bucket start
+    """
+    if granularity == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class RollupService:
+    """Service for maintaining and querying call rollup tables"""
+
+    COUNTERS = [
+        'calls_total',
+        'calls_answered',
+        'calls_consented',
+        'calls_completed',
+        'duration_total_seconds',
+        'duration_count'
+    ]
+
+    @staticmethod
+    def counters_for_call(call):
+        """
+        Build the counter increments contributed by a single call
+
+        Args:
+            call (Call): Completed call
+
+        Returns:
+            dict: Counter name to increment
+        """
+        has_duration = call.duration_seconds is not None
+        return {
+            'calls_total': 1,
+            'calls_answered': 1 if call.answered_at else 0,
+            'calls_consented': 1 if call.consent_given else 0,
+            'calls_completed': 1 if call.status == 'completed' else 0,
+            'duration_total_seconds': call.duration_seconds if has_duration else 0,
+            'duration_count': 1 if has_duration else 0
+        }
+
+    @staticmethod
+    def _increment(granularity, bucket_start, counters):
+        """
+        Atomically add counters to a bucket, creating it if needed
+
+        Uses UPDATE ... SET x = x + n so concurrent workers never lose increments.
+        Does not commit.
+        """
+        values = {
+            getattr(CallRollup, name): getattr(CallRollup, name) + amount
+            for name, amount in counters.items()
+        }
+        values[CallRollup.updated_at] = datetime.utcnow()
+
+        updated = CallRollup.query.filter_by(
+            granularity=granularity,
+            bucket_start=bucket_start
+        ).update(values, synchronize_session=False)
+
+        if updated:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(CallRollup(
+                    granularity=granularity,
+                    bucket_start=bucket_start,
+                    **counters
+                ))
+        except IntegrityError:
+            # Another worker created the bucket first - add to it instead
+            CallRollup.query.filter_by(
+                granularity=granularity,
+                bucket_start=bucket_start
+            ).update(values, synchronize_session=False)
+
+    @staticmethod
+    def record_call(call):
+        """
+        Add a completed call to its minute bucket
+
+        Each call is recorded at most once; the bucket is keyed by call start time.
+
+        Args:
+            call (Call): Completed call
+
+        Returns:
+            bool: True if the call was recorded, False if it already was
+        """
+        if call.rollup_recorded:
+            return False
+
+        started_at = call.started_at or call.created_at or datetime.utcnow()
+        RollupService._increment(
+            'minute',
+            truncate(started_at, 'minute'),
+            RollupService.counters_for_call(call)
+        )
+        call.rollup_recorded = True
+        db.session.commit()
+
+        RollupService.maybe_compact()
+        return True
+
+    @staticmethod
+    def compact(now=None):
+        """
+        Fold expired fine buckets into the next coarser granularity
+
+        Minute buckets older than ROLLUP_MINUTE_RETENTION_HOURS become hour buckets,
+        and hour buckets older than ROLLUP_HOUR_RETENTION_DAYS become day buckets.
+        The fine buckets are deleted and folded in one transaction per granularity,
+        so processes compacting concurrently do not double-count.
+
+        Args:
+            now (datetime): Reference time (defaults to utcnow)
+
+        Returns:
+            dict: Number of buckets compacted per source granularity
+        """
+        now = now or datetime.utcnow()
+        cutoffs = {
+            'minute': truncate(now - timedelta(hours=Config.ROLLUP_MINUTE_RETENTION_HOURS), 'hour'),
+            'hour': truncate(now - timedelta(days=Config.ROLLUP_HOUR_RETENTION_DAYS), 'day')
+        }
+        results = {}
+
+        for fine, coarse in [('minute', 'hour'), ('hour', 'day')]:
+            # DELETE ... RETURNING claims the rows: a process compacting at the same
+            # time gets back only rows it deleted itself, so nothing is counted twice
+            rows = db.session.execute(
+                db.delete(CallRollup).where(
+                    CallRollup.granularity == fine,
+                    CallRollup.bucket_start < cutoffs[fine]
+                ).returning(CallRollup.bucket_start, *[getattr(CallRollup, name) for name in RollupService.COUNTERS]),
+                execution_options={'synchronize_session': False}
+            ).all()
+
+            merged = {}
+            for row in rows:
+                bucket = merged.setdefault(
+                    truncate(row.bucket_start, coarse),
+                    {name: 0 for name in RollupService.COUNTERS}
+                )
+                for name in RollupService.COUNTERS:
+                    bucket[name] += getattr(row, name)
+
+            for bucket_start, counters in merged.items():
+                RollupService._increment(coarse, bucket_start, counters)
+
+            db.session.commit()
+            results[fine] = len(rows)
+
+        if any(results.values()):
+            logger.info(f"Compacted rollups: {results}")
+        return results
+
+    @staticmethod
+    def maybe_compact():
+        """Run compaction if ROLLUP_COMPACTION_INTERVAL has elapsed in this process"""
+        global _last_compaction
+
+        if time.time() - _last_compaction < Config.ROLLUP_COMPACTION_INTERVAL:
+            return
+        _last_compaction = time.time()
+
+        try:
+            RollupService.compact()
+        except Exception as e:
+            logger.error(f"Error compacting rollups: {str(e)}")
+            db.session.rollback()
+
+    @staticmethod
+    def timeseries(granularity, start, end):
+        """
+        Get aggregated metrics per bucket for a time range
+
+        Reads buckets at the requested granularity plus any finer buckets that
+        have not been compacted yet, so cost is proportional to bucket count.
+
+        Args:
+            granularity (str): minute, hour or day
+            start (datetime): Range start (inclusive)
+            end (datetime): Range end (exclusive)
+
+        Returns:
+            list: Bucket dictionaries ordered by bucket_start
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        levels = GRANULARITIES[:GRANULARITIES.index(granularity) + 1]
+        rows = CallRollup.query.filter(
+            CallRollup.granularity.in_(levels),
+            CallRollup.bucket_start >= truncate(start, granularity),
+            CallRollup.bucket_start < end
+        ).all()
+
+        merged = {}
+        for row in rows:
+            bucket = merged.setdefault(
+                truncate(row.bucket_start, granularity),
+                {name: 0 for name in RollupService.COUNTERS}
+            )
+            for name in RollupService.COUNTERS:
+                bucket[name] += getattr(row, name)
+
+        return [
+            RollupService.format_bucket(bucket_start, merged[bucket_start])
+            for bucket_start in sorted(merged)
+        ]
+
+    @staticmethod
+    def format_bucket(bucket_start, counters):
+        """Convert raw counters into the rates exposed by the API"""
+        total = counters['calls_total']
+        return {
+            'bucket_start': bucket_start.isoformat() if bucket_start else None,
+            'calls': total,
+            'answered_calls': counters['calls_answered'],
+            'consented_calls': counters['calls_consented'],
+            'completed_calls': counters['calls_completed'],
+            'answer_rate': round(counters['calls_answered'] / total * 100, 2) if total > 0 else 0,
+            'consent_rate': round(counters['calls_consented'] / total * 100, 2) if total > 0 else 0,
+            'avg_duration_seconds': (
+                round(counters['duration_total_seconds'] / counters['duration_count'], 2)
+                if counters['duration_count'] > 0 else None
+            )
+        }
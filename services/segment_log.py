@@ -0,0 +1,444 @@
+"""
+Append-only segmented record log for local call persistence
+Records are compact JSON lines in date-sharded segment files
+(<root>/YYYY-MM-DD/seg-00001.jsonl) that roll over at a size limit. Each segment
+has a sidecar offset index (.idx, one JSON line per record); reads memory-map the
+segment and slice out a single record.
+
+With STORAGE_COMPRESSION enabled, new segments are written as .zseg files: a
+header frame naming the codec and dictionary, then one length-prefixed
+compressed frame per record.
+
+Only one writer process per log is supported. The writer holds a shared flock
+on its active segment; recovery (truncating a torn record, rewriting an index)
+only touches a segment it can lock exclusively, so a concurrent
+`cli.py storage rebuild-index` leaves the segment being written alone.
+"""
+
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from services.durability import GroupCommitter, fsync_directory, validate_mode
+from services.record_codec import CodecRegistry
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.jsonl'
+COMPRESSED_SUFFIX = '.zseg'
+DATA_SUFFIXES = (SEGMENT_SUFFIX, COMPRESSED_SUFFIX)
+INDEX_SUFFIX = '.idx'
+
+# Length prefix of each frame in a compressed segment
+FRAME = struct.Struct('>I')
+
+
+def segment_number(path):
+    return int(path.name.split('.')[0].split('-')[1])
+
+
+@contextmanager
+def exclusive_lock(path):
+    """
+    Try to lock a segment exclusively for recovery
+
+    Yields:
+        bool: False if a writer holds the segment open, in which case it must not be modified
+    """
+    with open(path, 'rb') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            locked = False
+        else:
+            locked = True
+        yield locked
+
+
+class SegmentLog:
+    """
+    Date-sharded append-only log of JSON records
+
+    Every record has a kind (intake, transcript, metadata), a call_id and a
+    timestamp; the catalog of index entries is kept in memory for lookups.
+
+    Durability (STORAGE_DURABILITY) applies to segment data only: the .idx files
+    are rebuilt from the segments after a crash, so they are never fsynced.
+    In group mode one fsync of the active segment covers every append made
+    during the flush window.
+    """
+
+    def __init__(self, root, max_segment_bytes=None, max_open_maps=64, durability=None, group_window=None,
+                 compression=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes or Config.SEGMENT_MAX_BYTES
+        self.durability = validate_mode(durability or Config.STORAGE_DURABILITY)
+        self.codecs = CodecRegistry(self.root, compression)
+        self._committer = GroupCommitter(self._sync_active, group_window)
+        self.max_open_maps = max_open_maps
+        self.catalog = []
+        self._lock = threading.Lock()
+        self._maps = OrderedDict()  # segment path -> mmap
+        self._maps_lock = threading.Lock()
+        self._segment_codecs = {}  # compressed segment path -> RecordCodec
+        self._active = None  # (date, segment path, data file, index file, codec)
+        self._load()
+
+    # Writing
+
+    def append(self, kind, call_id, data, timestamp=None):
+        """
+        Append a record
+
+        Args:
+            kind (str): Record kind, e.g. intake, transcript, metadata
+            call_id (str): Call identifier
+            data: JSON-serializable payload
+            timestamp (datetime): Record time (default: now, UTC)
+
+        Returns:
+            dict: Index entry (segment, offset, size, ...) locating the record
+        """
+        timestamp = timestamp or datetime.utcnow()
+        record = json.dumps(
+            {'kind': kind, 'call_id': str(call_id), 'ts': timestamp.isoformat(), 'data': data},
+            separators=(',', ':'), default=str
+        ).encode('utf-8')
+
+        with self._lock:
+            segment, data_file, index_file, codec = self._writable_segment(timestamp, len(record) + 1)
+            if codec is None:
+                payload = record + b'\n'
+                offset = data_file.tell()
+                data_file.write(payload)
+            else:
+                payload = codec.compress(record)
+                offset = data_file.tell() + FRAME.size
+                data_file.write(FRAME.pack(len(payload)) + payload)
+            data_file.flush()
+            entry = {
+                'kind': kind,
+                'call_id': str(call_id),
+                'ts': timestamp.isoformat(),
+                'segment': segment,
+                'offset': offset,
+                'size': len(payload)
+            }
+            if self.durability == 'per-write':
+                os.fsync(data_file.fileno())
+            index_file.write(self._index_line(entry))
+            index_file.flush()
+            self._add(entry)
+
+        if self.durability == 'group':
+            self._committer.submit()
+        return entry
+
+    def _sync_active(self, items=None):
+        """Group flush: fsync the active segment (earlier segments were synced at rollover)"""
+        with self._lock:
+            if self._active is None:
+                return
+            fd = os.dup(self._active[2].fileno())
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _writable_segment(self, timestamp, size):
+        """
+        Open segment for the record's date, rolling over when it would exceed the
+        size limit or the codec/dictionary for new data changed
+        """
+        date = timestamp.strftime('%Y-%m-%d')
+        codec = self.codecs.writer()
+        if self._active is not None:
+            active_date, segment, data_file, index_file, active_codec = self._active
+            fits = data_file.tell() == 0 or data_file.tell() + size <= self.max_segment_bytes
+            if active_date == date and fits and active_codec is codec:
+                return segment, data_file, index_file, codec
+            if self.durability != 'none':
+                os.fsync(data_file.fileno())
+            data_file.close()
+            index_file.close()
+            self._active = None
+
+        shard = self.root / date
+        if not shard.exists():
+            shard.mkdir()
+            if self.durability != 'none':
+                fsync_directory(self.root)
+
+        # Continue the newest segment if it has the same format and room, otherwise start the next one
+        suffix = SEGMENT_SUFFIX if codec is None else COMPRESSED_SUFFIX
+        existing = sorted((p for p in shard.glob('seg-*') if p.suffix in DATA_SUFFIXES), key=segment_number)
+        number = segment_number(existing[-1]) if existing else 1
+        path = shard / f'seg-{number:05d}{suffix}'
+        if existing and (existing[-1] != path or codec is not None
+                         or path.stat().st_size + size > self.max_segment_bytes):
+            # Compressed segments are never reopened: their header fixes the dictionary
+            path = shard / f'seg-{number + 1:05d}{suffix}'
+
+        segment = path.relative_to(self.root).as_posix()
+        created = not path.exists()
+        data_file = open(path, 'ab')
+        fcntl.flock(data_file, fcntl.LOCK_SH)  # Released on close; keeps recovery off this segment
+        index_file = open(path.with_suffix(INDEX_SUFFIX), 'a')
+        if codec is not None and created:
+            header = json.dumps({'codec': codec.name, 'dictionary': codec.dictionary_id}).encode('utf-8')
+            data_file.write(FRAME.pack(len(header)) + header)
+            data_file.flush()
+            self._segment_codecs[segment] = codec
+        if created and self.durability != 'none':
+            fsync_directory(shard)
+        self._active = (date, segment, data_file, index_file, codec)
+        return segment, data_file, index_file, codec
+
+    @staticmethod
+    def _index_line(entry):
+        return json.dumps({k: entry[k] for k in ('kind', 'call_id', 'ts', 'offset', 'size')},
+                          separators=(',', ':')) + '\n'
+
+    def close(self):
+        """Close the active segment and all memory maps"""
+        with self._lock:
+            if self._active is not None:
+                self._active[2].close()
+                self._active[3].close()
+                self._active = None
+        with self._maps_lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+    # Reading
+
+    def read(self, entry):
+        """Read one record's payload via a memory map of its segment"""
+        end = entry['offset'] + entry['size']
+        with self._maps_lock:
+            mapped = self._maps.get(entry['segment'])
+            if mapped is None or len(mapped) < end:
+                # New segment, or the active segment grew past the mapped length
+                if mapped is not None:
+                    mapped.close()
+                with open(self.root / entry['segment'], 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[entry['segment']] = mapped
+                while len(self._maps) > self.max_open_maps:
+                    self._maps.popitem(last=False)[1].close()
+            self._maps.move_to_end(entry['segment'])
+            payload = mapped[entry['offset']:end]
+
+        if entry['segment'].endswith(COMPRESSED_SUFFIX):
+            payload = self._codec_for(entry['segment']).decompress(payload)
+        return json.loads(payload)['data']
+
+    def _codec_for(self, segment):
+        """Codec named in a compressed segment's header"""
+        codec = self._segment_codecs.get(segment)
+        if codec is None:
+            with open(self.root / segment, 'rb') as f:
+                header = json.loads(f.read(FRAME.unpack(f.read(FRAME.size))[0]))
+            codec = self._segment_codecs[segment] = self.codecs.get(header['codec'], header.get('dictionary'))
+        return codec
+
+    def iter_records(self, kind=None):
+        """
+        Stream every record in write order, one frame or line at a time
+
+        Segments are read sequentially rather than mapped, so memory use is
+        bounded by the largest record, not the archive size.
+
+        Yields:
+            dict: Records with kind, call_id, ts and data
+        """
+        for path in self._segments():
+            for _, _, record in self._frames(path):
+                if kind is None or record['kind'] == kind:
+                    yield record
+
+    def find(self, kind=None, call_id=None, since=None, until=None):
+        """
+        Matching index entries, newest first
+
+        Args:
+            kind (str): Only records of this kind
+            call_id (str): Only records for this call
+            since (datetime): Only records at or after this time
+            until (datetime): Only records before this time
+
+        Returns:
+            list: Index entries
+        """
+        call_id = str(call_id) if call_id is not None else None
+        with self._lock:
+            catalog = list(self.catalog)
+        return [
+            entry for entry in reversed(catalog)
+            if (kind is None or entry['kind'] == kind)
+            and (call_id is None or entry['call_id'] == call_id)
+            and (since is None or entry['_ts'] >= since)
+            and (until is None or entry['_ts'] < until)
+        ]
+
+    # Index maintenance
+
+    def _add(self, entry):
+        entry['_ts'] = datetime.fromisoformat(entry['ts'])
+        self.catalog.append(entry)
+
+    def _segments(self):
+        return sorted(
+            (p for p in self.root.glob('*/seg-*') if p.suffix in DATA_SUFFIXES),
+            key=lambda p: (p.parent.name, segment_number(p))
+        )
+
+    def _load(self):
+        """Load all segment indexes, recovering entries the index is missing after a crash"""
+        for path in self._segments():
+            segment = path.relative_to(self.root).as_posix()
+            entries = []
+            index_path = path.with_suffix(INDEX_SUFFIX)
+            if index_path.exists():
+                with open(index_path) as f:
+                    for line in f:
+                        if line.endswith('\n'):
+                            entries.append(dict(json.loads(line), segment=segment))
+            indexed_end = entries[-1]['offset'] + entries[-1]['size'] if entries else 0
+            if indexed_end < path.stat().st_size:
+                with exclusive_lock(path) as locked:
+                    recovered = self._scan(path, segment, indexed_end, truncate=locked)
+                    entries.extend(recovered)
+                    if recovered and locked:
+                        with open(index_path, 'w') as f:
+                            f.writelines(self._index_line(entry) for entry in entries)
+                        logger.warning(f"Recovered {len(recovered)} unindexed records in {segment}")
+            for entry in entries:
+                self._add(entry)
+        self.catalog.sort(key=lambda e: e['_ts'])
+
+    def _frames(self, path, start=0):
+        """
+        Read records sequentially from start
+
+        Yields:
+            tuple: (offset, size, record) for each complete record; stops at a torn write
+        """
+        with open(path, 'rb') as f:
+            if path.suffix == SEGMENT_SUFFIX:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        return
+                    yield offset, len(line), json.loads(line)
+                    offset += len(line)
+                return
+
+            codec = self._codec_for(path.relative_to(self.root).as_posix())
+            header_size = FRAME.unpack(f.read(FRAME.size))[0]
+            f.seek(max(start, FRAME.size + header_size))
+            while True:
+                prefix = f.read(FRAME.size)
+                if len(prefix) < FRAME.size:
+                    return
+                size = FRAME.unpack(prefix)[0]
+                payload = f.read(size)
+                if len(payload) < size:
+                    return
+                yield f.tell() - size, size, json.loads(codec.decompress(payload))
+
+    def _scan(self, path, segment, start=0, truncate=True):
+        """
+        Index records from start to the last complete record
+
+        A torn final write is truncated when truncate is set; otherwise it is
+        left for the writer that may still be appending it.
+        """
+        entries = []
+        end = start
+        for offset, size, record in self._frames(path, start):
+            entries.append({
+                'kind': record['kind'],
+                'call_id': record['call_id'],
+                'ts': record['ts'],
+                'segment': segment,
+                'offset': offset,
+                'size': size
+            })
+            end = offset + size
+        if path.suffix == COMPRESSED_SUFFIX and not entries:
+            # Keep the header frame
+            with open(path, 'rb') as f:
+                header = f.read(FRAME.size)
+                end = max(start, FRAME.size + FRAME.unpack(header)[0] if len(header) == FRAME.size else 0)
+        if truncate and end < path.stat().st_size:
+            logger.warning(f"Truncating partial record at {segment}:{end}")
+            os.truncate(path, end)
+        return entries
+
+    def rebuild_index(self):
+        """
+        Regenerate every segment index by scanning the segments
+
+        Segments another process is writing to are scanned but their files are left as is.
+
+        Returns:
+            int: Number of records indexed
+        """
+        self.close()
+        with self._lock:
+            self.catalog = []
+            for path in self._segments():
+                segment = path.relative_to(self.root).as_posix()
+                with exclusive_lock(path) as locked:
+                    entries = self._scan(path, segment, truncate=locked)
+                    if locked:
+                        tmp_path = path.with_suffix(INDEX_SUFFIX + '.tmp')
+                        with open(tmp_path, 'w') as f:
+                            f.writelines(self._index_line(entry) for entry in entries)
+                        os.replace(tmp_path, path.with_suffix(INDEX_SUFFIX))
+                    else:
+                        logger.warning(f"Left {segment} as is: another process is writing to it")
+                for entry in entries:
+                    self._add(entry)
+            self.catalog.sort(key=lambda e: e['_ts'])
+            return len(self.catalog)
+
+    # Compression
+
+    def train_dictionary(self, kind=None, samples=1000):
+        """
+        Train a compression dictionary on recent records and use it for new segments
+
+        Args:
+            kind (str): Only sample records of this kind
+            samples (int): Number of most recent records to sample
+
+        Returns:
+            str: Dictionary id
+        """
+        entries = self.find(kind=kind)[:samples]
+        records = [
+            json.dumps({'kind': e['kind'], 'call_id': e['call_id'], 'ts': e['ts'], 'data': self.read(e)},
+                       separators=(',', ':'), default=str).encode('utf-8')
+            for e in reversed(entries)
+        ]
+        if not records:
+            raise ValueError('No records to train a dictionary on')
+        return self.codecs.train(records)
+
+    def compression_stats(self):
+        """Ratio and throughput of the codec used for new records"""
+        codec = self.codecs.writer()
+        return codec.stats() if codec is not None else {'codec': 'none'}
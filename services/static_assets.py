@@ -0,0 +1,111 @@
+"""
+Fingerprinted, precompressed static assets
+build_assets() copies each file in static/ to static/dist/ under a content-hashed
+name and writes .gz (and .br when brotli is installed) siblings plus a manifest;
+templates link assets through asset_url() so they can be cached forever
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from flask import url_for
+
+try:
+    import brotli
+except ImportError:  # Optional: .br files are skipped without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+DIST_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Only text assets are worth precompressing
+COMPRESSIBLE_EXTENSIONS = {'.js', '.css', '.svg', '.json', '.html', '.txt'}
+
+# Per-encoding file suffix, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def fingerprint_name(filename, content):
+    """Insert a content hash before the extension: app.js -> app.3f2a9c1d0b7e.js"""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """
+    Fingerprint and precompress every asset in static_dir
+
+    Args:
+        static_dir (str): Source directory; output goes to <static_dir>/dist
+
+    Returns:
+        dict: Manifest mapping logical names to fingerprinted names
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        dirnames[:] = [d for d in dirnames if os.path.join(dirpath, d) != dist_dir]
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                content = f.read()
+
+            hashed = fingerprint_name(logical, content)
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+
+            if os.path.splitext(filename)[1] in COMPRESSIBLE_EXTENSIONS:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+
+            manifest[logical] = hashed
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Built {len(manifest)} static assets into {dist_dir}")
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    """Load the build manifest, or an empty dict if assets have not been built"""
+    try:
+        with open(os.path.join(static_dir, DIST_DIRNAME, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_app(app, static_dir=STATIC_DIR):
+    """
+    Register the asset_url() template helper
+
+    Without a build manifest (development), assets are linked from /static as-is.
+    """
+    manifest = load_manifest(static_dir)
+    if not manifest:
+        logger.info("No static asset manifest found; serving unfingerprinted assets")
+
+    def asset_url(filename):
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets.serve_asset', filename=hashed)
+
+    app.extensions['static_assets'] = {
+        'manifest': manifest,
+        'dist_dir': os.path.join(static_dir, DIST_DIRNAME)
+    }
+    app.add_template_global(asset_url)
@@ -4,23 +4,67 @@ Storage service for pushing data to MemVerge (hot) and ApertureData (cold) stora
 
 import logging
 import requests
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from services.circuit_breaker import CallRejected, get_breaker
+from services.json_stream import iter_json, iter_ndjson
+from services.aperturedata_client import get_aperturedata_writer
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# (target, result key, is enabled, StorageService method) for push_all
+PUSH_TARGETS = (
+    ('memverge', 'memverge_id', lambda: Config.MEMVERGE_ENABLED, 'push_to_memverge'),
+    ('aperturedata', 'aperturedata_id', lambda: Config.APERTUREDATA_ENABLED, 'push_to_aperturedata'),
+    ('backend', 'backend_pushed', lambda: bool(Config.BACKEND_API_URL), 'push_to_backend')
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_push_executor():
+    """Shared thread pool for concurrent pushes (STORAGE_PUSH_WORKERS threads)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.STORAGE_PUSH_WORKERS, thread_name_prefix='storage-push')
+        return _executor
+
+
+def _backend_payload(call_data, transcript_data):
+    """Backend push body; transcript_data None leaves transcripts out and lists them as unchanged"""
+    payload = {'call': call_data, 'intake_data': call_data.get('intake_data')}
+    if transcript_data is None:
+        payload['unchanged_sections'] = ['transcripts']
+    else:
+        payload['transcripts'] = transcript_data
+    return payload
+
+
+def _timed(target, push, call_data, transcript_data):
+    start = time.monotonic()
+    result = get_breaker(target).call(push, call_data, transcript_data)
+    return result, time.monotonic() - start
+
 
 class StorageService:
     """Service for managing data storage to external systems"""
     
     @staticmethod
-    def push_to_memverge(call_data, transcript_data):
+    def push_to_memverge(call_data, transcript_data, idempotency_key=None):
         """
         Push data to MemVerge hot storage
         
+        The body is streamed with chunked transfer encoding, so transcript_data
+        can be a cursor (TranscriptRows) that is read as it is sent.
+        
         Args:
             call_data (dict): Call information
-            transcript_data (list): List of transcript segments
+            transcript_data (list): Transcript segments (any iterable)
+            idempotency_key (str): Sent as Idempotency-Key so a retried push is stored once
             
         Returns:
             str: MemVerge object ID or None
@@ -40,12 +84,14 @@ class StorageService:
                 'Authorization': f'Bearer {Config.MEMVERGE_API_KEY}',
                 'Content-Type': 'application/json'
             }
+            if idempotency_key:
+                headers['Idempotency-Key'] = idempotency_key
             
             response = requests.post(
                 f'{Config.MEMVERGE_ENDPOINT}/api/v1/objects',
-                json=payload,
+                data=iter_json(payload),
                 headers=headers,
-                timeout=30
+                timeout=Config.STORAGE_PUSH_TIMEOUT
             )
             
             if response.status_code in [200, 201]:
@@ -62,54 +108,132 @@ class StorageService:
             return None
     
     @staticmethod
-    def push_to_aperturedata(call_data, transcript_data):
+    def push_to_aperturedata(call_data, transcript_data, idempotency_key=None):
         """
         Push data to ApertureData cold storage
         
         Args:
             call_data (dict): Call information
-            transcript_data (list): List of transcript segments
+            transcript_data (list): Transcript segments (any iterable)
+            idempotency_key (str): Entity uid, so a retried push is stored once
             
         Returns:
-            str: ApertureData object ID or None
+            str: ApertureData entity uid or None
         """
         if not Config.APERTUREDATA_ENABLED:
             logger.info("ApertureData storage is disabled")
             return None
         
-        try:
-            # ApertureData typically uses a different protocol (gRPC or custom)
-            # This is a simplified REST-like implementation
-            # In production, you would use the ApertureData Python client
-            
-            payload = {
-                'entity_type': 'patient_call',
-                'properties': call_data,
-                'transcripts': transcript_data
-            }
-            
-            # Simulated ApertureData connection
-            # In production, use: from aperturedb import Connector
-            logger.info(f"Would push to ApertureData: {Config.APERTUREDATA_HOST}:{Config.APERTUREDATA_PORT}")
+        acks = StorageService.push_batch_to_aperturedata([(idempotency_key, call_data, transcript_data)])
+        if acks is None:
+            return None
+        accepted, detail = acks.get(idempotency_key, (False, 'Not acknowledged'))
+        if not accepted:
+            logger.error(f"Failed to push to ApertureData: {detail}")
+            return None
+        logger.info(f"Data pushed to ApertureData: {detail}")
+        return detail
+    
+    @staticmethod
+    def push_batch_to_aperturedata(items):
+        """
+        Push several calls to ApertureData in batched, pipelined transactions
+        
+        Each call becomes a PatientCall entity with its recording attached as
+        a blob; see services/aperturedata_client.py.
+        
+        Args:
+            items (list): (idempotency_key, call_data, transcript_data) tuples
             
-            # Placeholder for actual implementation
-            aperturedata_id = f"aperture_{call_data.get('id', 'unknown')}"
-            logger.info(f"Data would be pushed to ApertureData: {aperturedata_id}")
+        Returns:
+            dict: idempotency_key -> (accepted, entity uid if accepted else error),
+                  or None if ApertureData could not be reached (counted by the circuit breaker)
+        """
+        try:
+            return get_aperturedata_writer().write(items)
+        except Exception as e:
+            logger.error(f"Error pushing to ApertureData: {str(e)}")
+            return None
+    
+    @staticmethod
+    def fetch_from_memverge(object_id):
+        """
+        Read a call pushed to MemVerge
+        
+        Args:
+            object_id (str): MemVerge object ID (Call.memverge_id)
             
-            return aperturedata_id
+        Returns:
+            dict: {'call': ..., 'transcripts': [...]} or None if missing or unavailable
+        """
+        try:
+            response = requests.get(
+                f'{Config.MEMVERGE_ENDPOINT}/api/v1/objects/{object_id}',
+                headers={'Authorization': f'Bearer {Config.MEMVERGE_API_KEY}'},
+                timeout=Config.STORAGE_PUSH_TIMEOUT
+            )
+            if response.status_code == 200:
+                result = response.json()
+                return {'call': result.get('call'), 'transcripts': result.get('transcripts', [])}
+            if response.status_code != 404:
+                logger.error(f"Failed to read {object_id} from MemVerge: {response.status_code}")
+            return None
+        except Exception as e:
+            logger.error(f"Error reading from MemVerge: {str(e)}")
+            return None
+    
+    @staticmethod
+    def delete_from_memverge(object_id):
+        """
+        Delete a call from MemVerge (already-deleted objects count as deleted)
+        
+        Returns:
+            bool: Success status
+        """
+        try:
+            response = requests.delete(
+                f'{Config.MEMVERGE_ENDPOINT}/api/v1/objects/{object_id}',
+                headers={'Authorization': f'Bearer {Config.MEMVERGE_API_KEY}'},
+                timeout=Config.STORAGE_PUSH_TIMEOUT
+            )
+            if response.status_code in [200, 202, 204, 404]:
+                return True
+            logger.error(f"Failed to delete {object_id} from MemVerge: {response.status_code}")
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting from MemVerge: {str(e)}")
+            return False
+    
+    @staticmethod
+    def fetch_from_aperturedata(object_id):
+        """
+        Read a call pushed to ApertureData
+        
+        Args:
+            object_id (str): Entity uid (Call.aperturedata_id)
             
+        Returns:
+            dict: {'call': ..., 'transcripts': [...]} or None if missing or unavailable
+        """
+        try:
+            return get_aperturedata_writer().fetch(object_id)
         except Exception as e:
-            logger.error(f"Error pushing to ApertureData: {str(e)}")
+            logger.error(f"Error reading from ApertureData: {str(e)}")
             return None
     
     @staticmethod
-    def push_to_backend(call_data, transcript_data):
+    def push_to_backend(call_data, transcript_data, idempotency_key=None):
         """
         Push data to configured backend API
         
+        The body is streamed with chunked transfer encoding, so transcript_data
+        can be a cursor (TranscriptRows) that is read as it is sent.
+        
         Args:
             call_data (dict): Call information
-            transcript_data (list): List of transcript segments
+            transcript_data (list): Transcript segments (any iterable), or None if unchanged
+                since the last acknowledged push (sent as a partial update)
+            idempotency_key (str): Sent as Idempotency-Key so a retried push is stored once
             
         Returns:
             bool: Success status
@@ -119,11 +243,7 @@ class StorageService:
             return False
         
         try:
-            payload = {
-                'call': call_data,
-                'transcripts': transcript_data,
-                'intake_data': call_data.get('intake_data')
-            }
+            payload = _backend_payload(call_data, transcript_data)
             
             headers = {
                 'Content-Type': 'application/json'
@@ -131,12 +251,14 @@ class StorageService:
             
             if Config.BACKEND_API_KEY:
                 headers['Authorization'] = f'Bearer {Config.BACKEND_API_KEY}'
+            if idempotency_key:
+                headers['Idempotency-Key'] = idempotency_key
             
             response = requests.post(
                 Config.BACKEND_API_URL,
-                json=payload,
+                data=iter_json(payload),
                 headers=headers,
-                timeout=30
+                timeout=Config.STORAGE_PUSH_TIMEOUT
             )
             
             if response.status_code in [200, 201]:
@@ -151,33 +273,138 @@ class StorageService:
             return False
     
     @staticmethod
-    def push_all(call_data, transcript_data):
+    def push_batch_to_backend(items, batch_format=None):
         """
-        Push data to all configured storage systems
+        Push several calls to the backend API in one request
+        
+        The body is a JSON array of the payloads push_to_backend sends, each with
+        its idempotency_key, or NDJSON (one payload per line) when
+        BACKEND_BATCH_FORMAT is ndjson. The receiver acknowledges each item:
+        
+            {"results": [{"idempotency_key": "...", "ok": true},
+                         {"idempotency_key": "...", "ok": false, "error": "..."}]}
+        
+        A 2xx response without per-item results acknowledges every item.
+        
+        Args:
+            items (list): (idempotency_key, call_data, transcript_data) tuples; the body
+                is streamed, so transcript_data can be a cursor as for push_to_backend
+            batch_format (str): json or ndjson (default: BACKEND_BATCH_FORMAT)
+            
+        Returns:
+            dict: idempotency_key -> (accepted, error), or None if the request failed
+        """
+        if not Config.BACKEND_API_URL:
+            logger.info("Backend API URL not configured")
+            return None
+        
+        batch_format = batch_format or Config.BACKEND_BATCH_FORMAT
+        try:
+            payloads = [
+                {'idempotency_key': key, **_backend_payload(call_data, transcript_data)}
+                for key, call_data, transcript_data in items
+            ]
+            
+            headers = {}
+            if Config.BACKEND_API_KEY:
+                headers['Authorization'] = f'Bearer {Config.BACKEND_API_KEY}'
+            if batch_format == 'ndjson':
+                headers['Content-Type'] = 'application/x-ndjson'
+                body = iter_ndjson(payloads)
+            else:
+                headers['Content-Type'] = 'application/json'
+                body = iter_json(payloads)
+            
+            response = requests.post(
+                Config.BACKEND_API_URL,
+                data=body,
+                headers=headers,
+                timeout=Config.STORAGE_PUSH_TIMEOUT
+            )
+            
+            if response.status_code not in [200, 201, 202, 207]:
+                logger.error(f"Failed to push batch to backend: {response.status_code} - {response.text}")
+                return None
+            
+            try:
+                results = response.json().get('results') if response.content else None
+            except (ValueError, AttributeError):
+                results = None
+            if results is None:
+                acks = {payload['idempotency_key']: (True, None) for payload in payloads}
+            else:
+                acks = {
+                    result.get('idempotency_key'): (bool(result.get('ok')), result.get('error'))
+                    for result in results
+                }
+            
+            accepted = sum(ok for ok, _ in acks.values())
+            logger.info(f"Batch of {len(payloads)} pushed to backend API, {accepted} acknowledged")
+            return acks
+            
+        except Exception as e:
+            logger.error(f"Error pushing batch to backend: {str(e)}")
+            return None
+    
+    @staticmethod
+    def push_all(call_data, transcript_data, timeout=None, deadline=None):
+        """
+        Push data to all configured storage systems concurrently
+        
+        Used by StorageIntegration.save_complete_call_data (app_enhanced.py's
+        /test-storage); call hangups deliver through the outbox instead.
+        Pushes run on the shared pool, so that request takes about as long as
+        the slowest target rather than the sum of all of them. A push still
+        running after its timeout or the overall deadline is left to finish in
+        the background and its result is not recorded. Each push goes through
+        the target's circuit breaker; a target whose circuit is open is skipped
+        immediately.
         
         Args:
             call_data (dict): Call information
             transcript_data (list): List of transcript segments
+            timeout (float): Seconds to wait for each target (default: STORAGE_PUSH_TIMEOUT)
+            deadline (float): Seconds to wait for all targets (default: STORAGE_PUSH_DEADLINE)
             
         Returns:
-            dict: Results from each storage system
+            dict: Results from each storage system, plus per-target seconds
+                  ('timings') and targets that did not finish in time ('incomplete')
         """
+        timeout = Config.STORAGE_PUSH_TIMEOUT if timeout is None else timeout
+        deadline = Config.STORAGE_PUSH_DEADLINE if deadline is None else deadline
         results = {
             'memverge_id': None,
             'aperturedata_id': None,
-            'backend_pushed': False
+            'backend_pushed': False,
+            'timings': {},
+            'incomplete': []
         }
         
-        # Push to MemVerge (hot storage)
-        if Config.MEMVERGE_ENABLED:
-            results['memverge_id'] = StorageService.push_to_memverge(call_data, transcript_data)
-        
-        # Push to ApertureData (cold storage)
-        if Config.APERTUREDATA_ENABLED:
-            results['aperturedata_id'] = StorageService.push_to_aperturedata(call_data, transcript_data)
+        start = time.monotonic()
+        executor = get_push_executor()
+        futures = [
+            (target, key, executor.submit(_timed, target, getattr(StorageService, method), call_data, transcript_data))
+            for target, key, enabled, method in PUSH_TARGETS
+            if enabled()
+        ]
         
-        # Push to backend API
-        if Config.BACKEND_API_URL:
-            results['backend_pushed'] = StorageService.push_to_backend(call_data, transcript_data)
+        for target, key, future in futures:
+            remaining = min(timeout, deadline) - (time.monotonic() - start)
+            try:
+                value, elapsed = future.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                logger.warning(f"Push to {target} did not finish within {min(timeout, deadline)}s")
+                results['incomplete'].append(target)
+                continue
+            except CallRejected as e:
+                logger.warning(f"Skipped push to {target}: {str(e)}")
+                results['incomplete'].append(target)
+                continue
+            except Exception as e:
+                logger.error(f"Error pushing to {target}: {str(e)}")
+                results['incomplete'].append(target)
+                continue
+            results[key] = value
+            results['timings'][target] = round(elapsed, 3)
         
         return results
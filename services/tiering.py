@@ -0,0 +1,316 @@
+"""
+Hot/cold storage tiering for call data
+Completed calls are pushed to hot storage (MemVerge). A periodic run demotes
+calls nobody has read for TIERING_DEMOTE_AFTER_DAYS, and the least recently
+read calls beyond the hot size caps, to cold storage (ApertureData): each is
+copied, read back and verified, and only then evicted from hot storage.
+Call.memverge_id and Call.aperturedata_id record where a call lives, and
+reads go through whichever tier holds it.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Call, CallAccess, Transcript
+from services.storage_service import StorageService
+from services.json_stream import TranscriptRows
+from services.outbox import payload_hashes
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class MemVergeStore:
+    """Hot tier backed by MemVerge"""
+    name = 'memverge'
+
+    def put(self, call_data, transcript_data, idempotency_key=None):
+        return StorageService.push_to_memverge(call_data, transcript_data, idempotency_key=idempotency_key)
+
+    def get(self, object_id):
+        return StorageService.fetch_from_memverge(object_id)
+
+    def delete(self, object_id):
+        return StorageService.delete_from_memverge(object_id)
+
+
+class ApertureDataStore:
+    """Cold tier backed by ApertureData"""
+    name = 'aperturedata'
+
+    def put(self, call_data, transcript_data, idempotency_key=None):
+        return StorageService.push_to_aperturedata(call_data, transcript_data, idempotency_key=idempotency_key)
+
+    def get(self, object_id):
+        return StorageService.fetch_from_aperturedata(object_id)
+
+    def delete(self, object_id):
+        return False  # Cold copies are never evicted
+
+
+class InMemoryStore:
+    """
+    Stand-in for a storage service, for tests and local runs
+
+    Args:
+        name (str): Tier name, also used as the object id prefix
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.objects = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def put(self, call_data, transcript_data, idempotency_key=None):
+        with self._lock:
+            object_id = f'{self.name}_{self._next_id}'
+            self._next_id += 1
+            self.objects[object_id] = {'call': dict(call_data), 'transcripts': list(transcript_data)}
+            return object_id
+
+    def get(self, object_id):
+        with self._lock:
+            return self.objects.get(object_id)
+
+    def delete(self, object_id):
+        with self._lock:
+            self.objects.pop(object_id, None)
+            return True
+
+
+class TieringEngine:
+    """
+    Tracks reads of call data and moves idle calls from hot to cold storage
+
+    Args:
+        hot: Hot tier store (default: MemVerge)
+        cold: Cold tier store (default: ApertureData)
+    """
+
+    def __init__(self, hot=None, cold=None):
+        self.hot = hot or MemVergeStore()
+        self.cold = cold or ApertureDataStore()
+        self._lock = threading.Lock()
+        self._accesses = {}  # call_id -> (last read, reads) not yet written
+        self._flush_timer = None  # Writes the buffer TIERING_ACCESS_FLUSH_SECONDS after its first read
+        self.last_run = None
+
+    # Access tracking
+
+    def record_access(self, call_id):
+        """
+        Note a read of a call's data
+
+        Reads are buffered per process and written in one transaction once
+        TIERING_ACCESS_FLUSH_SIZE calls are buffered or the oldest buffered read
+        is TIERING_ACCESS_FLUSH_SECONDS old, whichever comes first, so each
+        web worker's reads reach the database (and a separate `cli.py tiering
+        run`) within that time. Call inside an application context.
+        """
+        if not Config.TIERING_ENABLED:
+            return
+        now = datetime.utcnow()
+        with self._lock:
+            _, reads = self._accesses.get(call_id, (None, 0))
+            self._accesses[call_id] = (now, reads + 1)
+            full = len(self._accesses) >= Config.TIERING_ACCESS_FLUSH_SIZE
+            if not full and self._flush_timer is None:
+                self._flush_timer = threading.Timer(Config.TIERING_ACCESS_FLUSH_SECONDS, self._flush_in_app,
+                                                    args=(current_app._get_current_object(),))
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if full:
+            self.flush_accesses()
+
+    def _flush_in_app(self, app):
+        with app.app_context():
+            self.flush_accesses()
+            db.session.remove()
+
+    def flush_accesses(self):
+        """Write buffered reads to call_accesses; returns the number of calls updated"""
+        with self._lock:
+            accesses, self._accesses = self._accesses, {}
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if not accesses:
+            return 0
+        try:
+            # Calls deleted since they were read would fail the foreign key
+            known = set(db.session.scalars(db.select(Call.id).where(Call.id.in_(accesses))))
+            accesses = {call_id: access for call_id, access in accesses.items() if call_id in known}
+            existing = {
+                access.call_id: access
+                for access in CallAccess.query.filter(CallAccess.call_id.in_(accesses))
+            }
+            for call_id, (accessed_at, reads) in accesses.items():
+                access = existing.get(call_id)
+                if access is None:
+                    db.session.add(CallAccess(call_id=call_id, last_accessed_at=accessed_at, read_count=reads))
+                else:
+                    access.last_accessed_at = max(access.last_accessed_at, accessed_at)
+                    access.read_count += reads
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error recording call accesses: {str(e)}")
+            db.session.rollback()
+            return 0
+        return len(accesses)
+
+    # Reads
+
+    def read(self, call_id):
+        """
+        Read a call's stored data from whichever tier holds it (hot first)
+
+        Returns:
+            tuple: (tier name, {'call': ..., 'transcripts': [...]}), or (None, None)
+        """
+        call = db.session.get(Call, call_id)
+        if call is None:
+            return None, None
+        self.record_access(call_id)
+        for store, object_id in ((self.hot, call.memverge_id), (self.cold, call.aperturedata_id)):
+            if object_id:
+                data = store.get(object_id)
+                if data is not None:
+                    return store.name, data
+        return None, None
+
+    # Policy
+
+    def plan(self, now=None):
+        """
+        Calls to demote, least recently read first
+
+        A call is demoted when nobody has read it for TIERING_DEMOTE_AFTER_DAYS
+        (counting from when it ended if it was never read), or when it is among
+        the least recently read calls beyond TIERING_HOT_MAX_CALLS or
+        TIERING_HOT_MAX_BYTES. Sizes are estimated from transcript and intake
+        text lengths.
+
+        Returns:
+            list: Call ids
+        """
+        now = now or datetime.utcnow()
+        sizes = (
+            db.session.query(Transcript.call_id, db.func.sum(db.func.length(Transcript.text)).label('size'))
+            .group_by(Transcript.call_id)
+            .subquery()
+        )
+        last_activity = db.func.coalesce(CallAccess.last_accessed_at, Call.ended_at, Call.created_at)
+        rows = (
+            db.session.query(
+                Call.id, last_activity,
+                db.func.coalesce(sizes.c.size, 0) + db.func.coalesce(db.func.length(Call.intake_data), 0)
+            )
+            .outerjoin(CallAccess, CallAccess.call_id == Call.id)
+            .outerjoin(sizes, sizes.c.call_id == Call.id)
+            .filter(Call.memverge_id.isnot(None))
+            .order_by(last_activity, Call.id)
+            .all()
+        )
+
+        cutoff = now - timedelta(days=Config.TIERING_DEMOTE_AFTER_DAYS)
+        hot_calls = len(rows)
+        hot_bytes = sum(size for _, _, size in rows)
+        demote = []
+        for call_id, active_at, size in rows:
+            over_cap = (
+                (Config.TIERING_HOT_MAX_CALLS and hot_calls > Config.TIERING_HOT_MAX_CALLS)
+                or (Config.TIERING_HOT_MAX_BYTES and hot_bytes > Config.TIERING_HOT_MAX_BYTES)
+            )
+            if not over_cap and active_at >= cutoff:
+                break
+            demote.append(call_id)
+            hot_calls -= 1
+            hot_bytes -= size
+        return demote
+
+    # Demotion
+
+    def demote(self, call_ids):
+        """
+        Move calls from hot to cold storage, TIERING_BATCH_SIZE calls per transaction
+
+        Each call is written to the cold tier from the database, read back and
+        compared by content hash, and only then deleted from the hot tier. A
+        call that fails any step stays hot and is retried on the next run.
+
+        Returns:
+            dict: Counts of demoted and failed calls
+        """
+        demoted, failed = 0, 0
+        batch_size = max(Config.TIERING_BATCH_SIZE, 1)
+        for start in range(0, len(call_ids), batch_size):
+            calls = Call.query.filter(Call.id.in_(call_ids[start:start + batch_size])).all()
+            for call in calls:
+                if call.memverge_id and self._demote_call(call):
+                    demoted += 1
+                else:
+                    failed += 1
+            db.session.commit()
+        return {'demoted': demoted, 'failed': failed}
+
+    def _demote_call(self, call):
+        call_data = call.to_dict()
+        transcripts = TranscriptRows(call.id)
+        expected, _ = payload_hashes(call_data, transcripts)
+
+        cold_id = self.cold.put(call_data, transcripts, idempotency_key=f'tiering:call:{call.id}:v{call.version}')
+        if not cold_id:
+            logger.warning(f"Call {call.id} not demoted: {self.cold.name} did not accept it")
+            return False
+        copy = self.cold.get(cold_id)
+        if copy is None or payload_hashes(copy['call'], copy['transcripts'])[0] != expected:
+            logger.warning(f"Call {call.id} not demoted: copy in {self.cold.name} could not be verified")
+            return False
+        call.aperturedata_id = cold_id
+
+        if not self.hot.delete(call.memverge_id):
+            logger.warning(f"Call {call.id} copied to {self.cold.name} but not evicted from {self.hot.name}")
+            return False
+        call.memverge_id = None
+        return True
+
+    def run_once(self, dry_run=False):
+        """
+        Flush this process's recorded reads, then demote the calls the policy selects
+
+        Args:
+            dry_run (bool): Only report what would be demoted
+
+        Returns:
+            dict: Calls planned, demoted and failed
+        """
+        self.flush_accesses()
+        planned = self.plan()
+        result = {'planned': len(planned), 'demoted': 0, 'failed': 0}
+        if planned and not dry_run:
+            result.update(self.demote(planned))
+            logger.info(f"Tiering run: demoted {result['demoted']} of {len(planned)} calls")
+        if not dry_run:
+            self.last_run = dict(result, finished_at=datetime.utcnow().isoformat())
+        return result
+
+    def stats(self):
+        """Calls per tier, calls due for demotion and the last run's outcome"""
+        hot = db.session.query(db.func.count(Call.id)).filter(Call.memverge_id.isnot(None)).scalar()
+        cold_only = db.session.query(db.func.count(Call.id)).filter(
+            Call.memverge_id.is_(None), Call.aperturedata_id.isnot(None)
+        ).scalar()
+        return {
+            'enabled': Config.TIERING_ENABLED,
+            'hot': hot,
+            'cold_only': cold_only,
+            'due_for_demotion': len(self.plan()),
+            'pending_accesses': len(self._accesses),
+            'last_run': self.last_run
+        }
+
+
+# Global instance
+tiering = TieringEngine()
@@ -2,18 +2,18 @@
 
 // Configuration
 const API_BASE_URL = window.location.origin;
-const POLL_INTERVAL = 5000; // 5 seconds - configurable for different environments
+const POLL_INTERVAL = 5000; // 5 seconds - fallback when EventSource is unavailable
 const E164_REGEX = /^\+[1-9]\d{1,14}$/; // E.164 phone number format
 
 // State
 let currentCall = null;
 let pollTimer = null;
+let callEvents = null;
 
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Dashboard initialized');
-    loadStats();
-    loadRecentCalls();
+    loadOverview();
     setupEventListeners();
 });
 
@@ -29,8 +29,7 @@ function setupEventListeners() {
     const refreshBtns = document.querySelectorAll('.btn-refresh');
     refreshBtns.forEach(btn => {
         btn.addEventListener('click', function() {
-            loadStats();
-            loadRecentCalls();
+            loadOverview();
         });
     });
 }
@@ -73,11 +72,11 @@ async function handleCallSubmit(event) {
             phoneInput.value = '';
             
             // Start monitoring the call
-            currentCall = data.call;
+            currentCall = { id: data.call_id, status: data.status };
             startCallMonitoring(currentCall.id);
             
-            // Refresh call list
-            loadRecentCalls();
+            // Refresh stats and call list
+            loadOverview();
         } else {
             showAlert(`Failed to initiate call: ${data.error || 'Unknown error'}`, 'error');
         }
@@ -89,17 +88,18 @@ async function handleCallSubmit(event) {
     }
 }
 
-// Load statistics
-async function loadStats() {
+// Load stats and recent calls from the shared overview snapshot
+async function loadOverview() {
     try {
-        const response = await fetch(`${API_BASE_URL}/api/stats`);
+        const response = await fetch(`${API_BASE_URL}/api/overview`);
         const data = await response.json();
         
         if (response.ok) {
-            updateStatsDisplay(data);
+            updateStatsDisplay(data.stats);
+            displayRecentCalls(data.recent_calls || []);
         }
     } catch (error) {
-        console.error('Error loading stats:', error);
+        console.error('Error loading overview:', error);
     }
 }
 
@@ -116,20 +116,6 @@ function updateStatsDisplay(data) {
     if (totalPatientsEl) totalPatientsEl.textContent = data.total_patients || 0;
 }
 
-// Load recent calls
-async function loadRecentCalls() {
-    try {
-        const response = await fetch(`${API_BASE_URL}/api/calls?limit=10`);
-        const data = await response.json();
-        
-        if (response.ok) {
-            displayRecentCalls(data.calls || []);
-        }
-    } catch (error) {
-        console.error('Error loading recent calls:', error);
-    }
-}
-
 // Display recent calls
 function displayRecentCalls(calls) {
     const tableBody = document.getElementById('recent-calls-body');
@@ -160,33 +146,56 @@ function viewCallDetails(callId) {
 
 // Start call monitoring
 function startCallMonitoring(callId) {
-    if (pollTimer) {
-        clearInterval(pollTimer);
-    }
+    stopCallMonitoring();
     
     console.log(`Starting monitoring for call ${callId}`);
     
-    pollTimer = setInterval(async () => {
-        try {
-            const response = await fetch(`${API_BASE_URL}/api/calls/${callId}`);
-            const data = await response.json();
+    // Fall back to polling where Server-Sent Events are unavailable
+    if (!window.EventSource) {
+        startCallPolling(callId);
+        return;
+    }
+    
+    callEvents = new EventSource(`${API_BASE_URL}/api/calls/${callId}/events`);
+    
+    const refresh = () => refreshMonitoredCall(callId);
+    callEvents.addEventListener('call.status', refresh);
+    callEvents.addEventListener('reset', refresh);
+    callEvents.addEventListener('call.transcript', () => loadTranscripts(callId));
+    callEvents.onerror = (error) => console.error('Call event stream error:', error);
+    
+    refresh();
+}
+
+// Fetch the monitored call and stop listening once it has ended
+async function refreshMonitoredCall(callId) {
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/calls/${callId}?view=summary`);
+        const call = await response.json();
+        
+        if (response.ok) {
+            updateCallMonitor(call);
             
-            if (response.ok && data.call) {
-                updateCallMonitor(data.call);
-                
-                // Stop polling if call is completed
-                if (data.call.status === 'completed' || data.call.status === 'failed') {
-                    stopCallMonitoring();
-                }
+            if (call.status === 'completed' || call.status === 'failed') {
+                stopCallMonitoring();
             }
-        } catch (error) {
-            console.error('Error polling call status:', error);
         }
-    }, POLL_INTERVAL);
+    } catch (error) {
+        console.error('Error refreshing call status:', error);
+    }
+}
+
+// Poll call status (browsers without EventSource)
+function startCallPolling(callId) {
+    pollTimer = setInterval(() => refreshMonitoredCall(callId), POLL_INTERVAL);
 }
 
 // Stop call monitoring
 function stopCallMonitoring() {
+    if (callEvents) {
+        callEvents.close();
+        callEvents = null;
+    }
     if (pollTimer) {
         clearInterval(pollTimer);
         pollTimer = null;
@@ -307,8 +316,9 @@ function escapeHtml(text) {
 
 // Export for use in other scripts
 window.DashboardAPI = {
-    loadStats,
-    loadRecentCalls,
+    loadOverview,
+    loadStats: loadOverview,
+    loadRecentCalls: loadOverview,
     loadTranscripts,
     startCallMonitoring,
     stopCallMonitoring,
@@ -0,0 +1,160 @@
+// Telnyx Patient Intake Agent - Dashboard page (templates/dashboard.html)
+
+// Load stats and recent calls from the shared overview snapshot
+function loadOverview() {
+    fetch('/api/overview')
+        .then(response => {
+            if (!response.ok) throw new Error('Failed to load overview');
+            return response.json();
+        })
+        .then(data => {
+            renderStats(data.stats);
+            renderRecentCalls(data.recent_calls);
+        })
+        .catch(error => {
+            console.error('Error loading overview:', error);
+            document.getElementById('totalPatients').textContent = 'Error';
+            document.getElementById('recentCalls').innerHTML = '<p>Error loading calls</p>';
+        });
+}
+
+function renderStats(data) {
+    document.getElementById('totalPatients').textContent = data.total_patients;
+    document.getElementById('totalCalls').textContent = data.total_calls;
+    document.getElementById('completedCalls').textContent = data.completed_calls;
+    document.getElementById('activeCalls').textContent = data.active_calls;
+    document.getElementById('consentRate').textContent = data.consent_rate + '%';
+}
+
+function renderRecentCalls(calls) {
+    const container = document.getElementById('recentCalls');
+
+    if (calls.length === 0) {
+        container.innerHTML = '<p>No calls yet. Initiate your first call above!</p>';
+        return;
+    }
+
+    let html = '<table><thead><tr><th>ID</th><th>To</th><th>Status</th><th>Consent</th><th>Duration</th><th>Started</th></tr></thead><tbody>';
+
+    calls.forEach(call => {
+        const statusClass = call.status === 'completed' ? 'success' : call.status === 'failed' ? 'danger' : 'info';
+        const consentClass = call.consent_given ? 'success' : 'warning';
+
+        html += `<tr>
+            <td>${call.id}</td>
+            <td>${call.to_number}</td>
+            <td><span class="badge badge-${statusClass}">${call.status}</span></td>
+            <td><span class="badge badge-${consentClass}">${call.consent_given ? 'Yes' : 'No'}</span></td>
+            <td>${call.duration_seconds ? call.duration_seconds + 's' : 'N/A'}</td>
+            <td>${new Date(call.created_at).toLocaleString()}</td>
+        </tr>`;
+    });
+
+    html += '</tbody></table>';
+    container.innerHTML = html;
+}
+
+// Modal functions
+function openNewCallModal() {
+    document.getElementById('newCallModal').classList.add('active');
+}
+
+function closeNewCallModal() {
+    document.getElementById('newCallModal').classList.remove('active');
+    document.getElementById('newCallForm').reset();
+}
+
+function openNewPatientModal() {
+    document.getElementById('newPatientModal').classList.add('active');
+}
+
+function closeNewPatientModal() {
+    document.getElementById('newPatientModal').classList.remove('active');
+    document.getElementById('newPatientForm').reset();
+}
+
+// Form submissions
+document.getElementById('newCallForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const data = {
+        phone_number: document.getElementById('phoneNumber').value
+    };
+
+    const patientId = document.getElementById('patientId').value;
+    if (patientId) {
+        data.patient_id = parseInt(patientId);
+    }
+
+    fetch('/api/calls', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.success) {
+            alert('Call initiated successfully! Call ID: ' + result.call_id);
+            closeNewCallModal();
+            loadOverview();
+        } else {
+            alert('Error: ' + (result.error || 'Failed to initiate call'));
+        }
+    })
+    .catch(error => {
+        alert('Error: ' + error.message);
+    });
+});
+
+document.getElementById('newPatientForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const data = {
+        phone_number: document.getElementById('patientPhone').value,
+        first_name: document.getElementById('patientFirstName').value,
+        last_name: document.getElementById('patientLastName').value,
+        email: document.getElementById('patientEmail').value
+    };
+
+    fetch('/api/patients', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.id) {
+            alert('Patient created successfully! ID: ' + result.id);
+            closeNewPatientModal();
+            loadOverview();
+        } else {
+            alert('Error: ' + (result.error || 'Failed to create patient'));
+        }
+    })
+    .catch(error => {
+        alert('Error: ' + error.message);
+    });
+});
+
+// Load data on page load
+loadOverview();
+
+// Refresh when calls change (Server-Sent Events), falling back to polling
+if (window.EventSource) {
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+        // Coalesce bursts of events into one refresh
+        if (refreshTimer) return;
+        refreshTimer = setTimeout(() => {
+            refreshTimer = null;
+            loadOverview();
+        }, 500);
+    };
+    const events = new EventSource('/api/events');
+    events.addEventListener('call.status', scheduleRefresh);
+    events.addEventListener('reset', scheduleRefresh);
+} else {
+    setInterval(() => {
+        loadOverview();
+    }, 30000);
+}
@@ -6,9 +6,14 @@ Provides unified interface for local JSON persistence, MemVerge, and ApertureDat
 import json
 import os
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 from services.storage_service import StorageService
+from services.segment_log import SegmentLog
+from services.durability import AtomicFileWriter
+from services.record_codec import RecordCodec, resolve_codec_name
+from config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +21,231 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# Append-only manifest of intake notes, one JSON line per note
+INDEX_FILENAME = "intake_index.jsonl"
+
+# Suffix appended to .json for files compressed with STORAGE_COMPRESSION
+ENCODING_SUFFIXES = {'zstd': '.zst', 'zlib': '.zz'}
+
+
+class IntakeNoteIndex:
+    """
+    In-memory view of the intake note manifest
+    
+    Each entry records call_id, saved_at, path (relative to the data directory),
+    offset and size, so a note can be read without listing or parsing other files.
+    The manifest is append-only; refresh() reads only lines added since the last call.
+    """
+    
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / INDEX_FILENAME
+        self.entries = []
+        self._positions = {}  # path -> index into entries (a rewritten file replaces its entry)
+        self._read_offset = 0
+        self._lock = threading.Lock()
+    
+    def append(self, entry):
+        """Append an entry to the manifest file and load it into the in-memory list"""
+        line = json.dumps(entry, separators=(',', ':')) + "\n"
+        with self._lock:
+            self._refresh_locked()
+            with open(self.path, 'a') as f:
+                f.write(line)
+            # Read back from the previous offset: another process may have appended before this line
+            self._refresh_locked()
+    
+    def refresh(self):
+        """Load manifest lines written since the last refresh (e.g. by another process)"""
+        with self._lock:
+            self._refresh_locked()
+    
+    def _refresh_locked(self):
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._read_offset:
+            # Manifest was rebuilt; start over
+            self.entries, self._positions, self._read_offset = [], {}, 0
+        if size == self._read_offset:
+            return
+        
+        with open(self.path, 'rb') as f:
+            f.seek(self._read_offset)
+            chunk = f.read(size - self._read_offset)
+        # Ignore a trailing partial line from a concurrent writer
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                self._add(json.loads(line))
+        self._read_offset += len(complete)
+    
+    def _add(self, entry):
+        entry['_saved_at'] = datetime.fromisoformat(entry['saved_at'])
+        position = self._positions.get(entry['path'])
+        if position is None:
+            self._positions[entry['path']] = len(self.entries)
+            self.entries.append(entry)
+        else:
+            self.entries[position] = entry
+    
+    def find(self, call_id=None, since=None, until=None):
+        """
+        Matching entries, newest first
+        
+        Args:
+            call_id (str): Only notes for this call
+            since (datetime): Only notes saved at or after this time
+            until (datetime): Only notes saved before this time
+            
+        Returns:
+            list: Manifest entries
+        """
+        self.refresh()
+        call_id = str(call_id) if call_id is not None else None
+        return [
+            entry for entry in reversed(self.entries)
+            if (call_id is None or entry['call_id'] == call_id)
+            and (since is None or entry['_saved_at'] >= since)
+            and (until is None or entry['_saved_at'] < until)
+        ]
+    
+    def read(self, entry):
+        """Read one note using its offset and size, decompressing it as it streams in"""
+        with open(self.data_dir / entry['path'], 'rb') as f:
+            if entry.get('encoding'):
+                return json.load(get_file_codec(entry['encoding']).stream_reader(f))
+            f.seek(entry['offset'])
+            return json.loads(f.read(entry['size']))
+    
+    def read_many(self, entries):
+        """Read notes, skipping files removed since they were indexed"""
+        notes = []
+        for entry in entries:
+            try:
+                notes.append(self.read(entry))
+            except FileNotFoundError:
+                logger.warning(f"Indexed intake note {entry['path']} is missing; run `cli.py storage rebuild-index`")
+        return notes
+    
+    def rebuild(self):
+        """
+        Regenerate the manifest from the intake_*.json[.zst|.zz] files on disk
+        
+        Returns:
+            int: Number of notes indexed
+        """
+        encodings = {suffix: name for name, suffix in ENCODING_SUFFIXES.items()}
+        entries = []
+        for filepath in sorted(self.data_dir.glob("intake_*.json*")):
+            if filepath.name == INDEX_FILENAME:
+                continue
+            # intake_{call_id}_{YYYYmmdd}_{HHMMSS}.json; call ids may contain underscores
+            stem, _, suffix = filepath.name.partition('.json')
+            try:
+                if suffix and suffix not in encodings:
+                    raise ValueError(suffix)
+                call_id, day, time_of_day = stem[len("intake_"):].rsplit('_', 2)
+                saved_at = datetime.strptime(f"{day}_{time_of_day}", '%Y%m%d_%H%M%S')
+            except ValueError:
+                logger.warning(f"Skipping unrecognized intake note file {filepath.name}")
+                continue
+            entry = {
+                'call_id': call_id,
+                'saved_at': saved_at.isoformat(),
+                'path': filepath.name,
+                'offset': 0,
+                'size': filepath.stat().st_size
+            }
+            if suffix:
+                entry['encoding'] = encodings[suffix]
+            entries.append(entry)
+        entries.sort(key=lambda e: e['saved_at'])
+        
+        with self._lock:
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            os.replace(tmp_path, self.path)
+            self.entries, self._positions, self._read_offset = [], {}, 0
+            self._refresh_locked()
+        
+        logger.info(f"Rebuilt intake note index with {len(entries)} notes")
+        return len(entries)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_file_writer = None
+_file_codecs = {}
+_file_codecs_lock = threading.Lock()
+
+
+def get_file_writer():
+    """Shared atomic writer for local JSON files (durability from STORAGE_DURABILITY)"""
+    global _file_writer
+    if _file_writer is None:
+        _file_writer = AtomicFileWriter()
+    return _file_writer
+
+
+def get_file_codec(name=None):
+    """
+    Shared whole-file codec for local JSON files
+    
+    Args:
+        name (str): Codec name (default: STORAGE_COMPRESSION)
+        
+    Returns:
+        RecordCodec: Codec, or None when compression is disabled
+    """
+    name = resolve_codec_name(name)
+    if name == 'none':
+        return None
+    with _file_codecs_lock:
+        codec = _file_codecs.get(name)
+        if codec is None:
+            codec = _file_codecs[name] = RecordCodec(name)
+        return codec
+
+
+def write_json_file(filename, data):
+    """
+    Atomically write data as a JSON file in DATA_DIR, compressed when STORAGE_COMPRESSION is set
+    
+    Compressed files get a codec suffix (intake_x.json.zst) so readers know to decompress.
+    
+    Returns:
+        tuple: (file path, bytes written, codec name or None)
+    """
+    codec = get_file_codec()
+    if codec is None:
+        content = json.dumps(data, indent=2, default=str).encode('utf-8')
+        encoding = None
+    else:
+        # Indentation only helps humans reading the file, so compressed files are compact
+        content = codec.compress(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'))
+        encoding = codec.name
+        filename += ENCODING_SUFFIXES[encoding]
+    filepath = DATA_DIR / filename
+    get_file_writer().write(filepath, content)
+    return filepath, len(content), encoding
+
+
+def get_intake_index(data_dir=None):
+    """Get the shared index for a data directory (defaults to DATA_DIR)"""
+    data_dir = Path(data_dir or DATA_DIR)
+    with _indexes_lock:
+        index = _indexes.get(data_dir)
+        if index is None:
+            index = _indexes[data_dir] = IntakeNoteIndex(data_dir)
+            if not index.path.exists():
+                # Notes written before the manifest existed
+                index.rebuild()
+        return index
+
 
 class LocalJSONStorage:
     """Local JSON file persistence"""
@@ -33,11 +263,20 @@ class LocalJSONStorage:
             str: File path where data was saved
         """
         try:
-            filename = f"intake_{call_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = DATA_DIR / filename
+            saved_at = datetime.utcnow()
+            filename = f"intake_{call_id}_{saved_at.strftime('%Y%m%d_%H%M%S')}.json"
+            filepath, size, encoding = write_json_file(filename, intake_data)
             
-            with open(filepath, 'w') as f:
-                json.dump(intake_data, f, indent=2, default=str)
+            entry = {
+                'call_id': str(call_id),
+                'saved_at': saved_at.isoformat(),
+                'path': filepath.name,
+                'offset': 0,
+                'size': size
+            }
+            if encoding:
+                entry['encoding'] = encoding
+            get_intake_index().append(entry)
             
             logger.info(f"Saved intake note to {filepath}")
             return str(filepath)
@@ -60,10 +299,7 @@ class LocalJSONStorage:
         """
         try:
             filename = f"transcript_{call_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = DATA_DIR / filename
-            
-            with open(filepath, 'w') as f:
-                json.dump(transcript_data, f, indent=2, default=str)
+            filepath, _, _ = write_json_file(filename, transcript_data)
             
             logger.info(f"Saved transcript to {filepath}")
             return str(filepath)
@@ -86,10 +322,7 @@ class LocalJSONStorage:
         """
         try:
             filename = f"call_metadata_{call_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-            filepath = DATA_DIR / filename
-            
-            with open(filepath, 'w') as f:
-                json.dump(metadata, f, indent=2, default=str)
+            filepath, _, _ = write_json_file(filename, metadata)
             
             logger.info(f"Saved call metadata to {filepath}")
             return str(filepath)
@@ -99,22 +332,142 @@ class LocalJSONStorage:
             return None
     
     @staticmethod
-    def get_intake_notes():
+    def find_intake_notes(call_id=None, since=None, until=None):
         """
-        Get all intake notes from local storage
+        Look up intake notes in the manifest without reading them
         
+        Args:
+            call_id (str): Only notes for this call
+            since (datetime): Only notes saved at or after this time
+            until (datetime): Only notes saved before this time
+            
+        Returns:
+            list: Manifest entries (call_id, saved_at, path, offset, size), newest first
+        """
+        return get_intake_index().find(call_id, since, until)
+    
+    @staticmethod
+    def get_intake_notes(call_id=None, since=None, until=None, offset=0, limit=None):
+        """
+        Get intake notes from local storage, newest first
+        
+        Only the notes on the requested page are read from disk.
+        
+        Args:
+            call_id (str): Only notes for this call
+            since (datetime): Only notes saved at or after this time
+            until (datetime): Only notes saved before this time
+            offset (int): Number of matching notes to skip
+            limit (int): Maximum number of notes to return (None for all)
+            
         Returns:
             list: List of intake note data
         """
         try:
-            notes = []
-            for filepath in DATA_DIR.glob("intake_*.json"):
-                with open(filepath, 'r') as f:
-                    notes.append(json.load(f))
-            return notes
+            index = get_intake_index()
+            entries = index.find(call_id, since, until)
+            end = None if limit is None else offset + limit
+            return index.read_many(entries[offset:end])
         except Exception as e:
             logger.error(f"Error reading intake notes: {str(e)}")
             return []
+    
+    @staticmethod
+    def get_intake_notes_page(call_id=None, since=None, until=None, offset=0, limit=50):
+        """
+        Get one page of intake notes, newest first
+        
+        Returns:
+            tuple: (total matching notes, list of notes on the page)
+        """
+        index = get_intake_index()
+        entries = index.find(call_id, since, until)
+        return len(entries), index.read_many(entries[offset:offset + limit])
+    
+    @staticmethod
+    def rebuild_index():
+        """
+        Rebuild the intake note manifest from files in the data directory
+        
+        Returns:
+            int: Number of notes indexed
+        """
+        return get_intake_index().rebuild()
+
+
+class SegmentLogStorage:
+    """
+    Local persistence in an append-only segmented log
+    
+    Same interface as LocalJSONStorage, but each record is one compact JSON line
+    appended to a date-sharded segment under data/segments instead of a new file.
+    """
+    
+    def __init__(self, root=None, max_segment_bytes=None):
+        self.log = SegmentLog(root or DATA_DIR / "segments", max_segment_bytes)
+    
+    def _save(self, kind, call_id, data):
+        try:
+            entry = self.log.append(kind, call_id, data)
+            locator = f"{self.log.root / entry['segment']}#{entry['offset']}"
+            logger.info(f"Saved {kind} record to {locator}")
+            return locator
+        except Exception as e:
+            logger.error(f"Error saving {kind} record to segment log: {str(e)}")
+            return None
+    
+    def save_intake_note(self, call_id, intake_data):
+        """Append an intake note; returns its segment locator"""
+        return self._save('intake', call_id, intake_data)
+    
+    def save_transcript(self, call_id, transcript_data):
+        """Append a transcript; returns its segment locator"""
+        return self._save('transcript', call_id, transcript_data)
+    
+    def save_call_metadata(self, call_id, metadata):
+        """Append call metadata; returns its segment locator"""
+        return self._save('metadata', call_id, metadata)
+    
+    def find_intake_notes(self, call_id=None, since=None, until=None):
+        """Index entries for matching intake notes, newest first"""
+        return self.log.find('intake', call_id, since, until)
+    
+    def get_intake_notes(self, call_id=None, since=None, until=None, offset=0, limit=None):
+        """Get intake notes, newest first, reading only the requested page"""
+        try:
+            entries = self.find_intake_notes(call_id, since, until)
+            end = None if limit is None else offset + limit
+            return [self.log.read(entry) for entry in entries[offset:end]]
+        except Exception as e:
+            logger.error(f"Error reading intake notes: {str(e)}")
+            return []
+    
+    def get_intake_notes_page(self, call_id=None, since=None, until=None, offset=0, limit=50):
+        """
+        Get one page of intake notes, newest first
+        
+        Returns:
+            tuple: (total matching notes, list of notes on the page)
+        """
+        entries = self.find_intake_notes(call_id, since, until)
+        return len(entries), [self.log.read(entry) for entry in entries[offset:offset + limit]]
+    
+    def rebuild_index(self):
+        """Rebuild segment indexes by scanning the segments"""
+        return self.log.rebuild_index()
+
+
+def create_local_storage(backend=None):
+    """
+    Create the local persistence backend
+    
+    Args:
+        backend (str): 'json' (one file per record) or 'segments' (default: LOCAL_STORAGE_BACKEND)
+    """
+    backend = backend or Config.LOCAL_STORAGE_BACKEND
+    if backend == 'segments':
+        return SegmentLogStorage()
+    return LocalJSONStorage()
 
 
 class StorageIntegration:
@@ -126,8 +479,8 @@ class StorageIntegration:
     - Backend API push (optional)
     """
     
-    def __init__(self):
-        self.local_storage = LocalJSONStorage()
+    def __init__(self, local_storage=None):
+        self.local_storage = local_storage or create_local_storage()
         self.storage_service = StorageService()
     
     def save_complete_call_data(self, call_data, transcript_data, intake_data):
@@ -183,6 +536,22 @@ class StorageIntegration:
             list: List of intake notes
         """
         return self.local_storage.get_intake_notes()
+    
+    def get_intake_notes_page(self, call_id=None, since=None, until=None, offset=0, limit=50):
+        """
+        Retrieve one page of intake notes, newest first
+        
+        Args:
+            call_id (str): Only notes for this call
+            since (datetime): Only notes saved at or after this time
+            until (datetime): Only notes saved before this time
+            offset (int): Number of matching notes to skip
+            limit (int): Page size
+            
+        Returns:
+            tuple: (total matching notes, list of notes on the page)
+        """
+        return self.local_storage.get_intake_notes_page(call_id, since, until, offset, limit)
 
 
 # MemVerge Stub
@@ -258,6 +627,7 @@ class ApertureDataStorage:
 __all__ = [
     'StorageIntegration',
     'LocalJSONStorage',
+    'SegmentLogStorage',
     'MemVergeStorage',
     'ApertureDataStorage'
 ]
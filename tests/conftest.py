@@ -0,0 +1,67 @@
+"""
+Shared test fixtures
+
+The app fixture builds a Flask app on an in-memory database. Test modules
+adjust it by overriding these fixtures:
+    blueprints: Blueprints to register (default: none)
+    config: Config attributes to set with monkeypatch before the app is created
+    app: Request the shared app and add data or reset caches around it
+
+Local storage always writes to a fresh temporary directory (see data_dir).
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from config import Config
+from models import db
+import storage_integration
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path_factory, monkeypatch):
+    """Point local storage at a per-test directory instead of the repo's data/"""
+    path = tmp_path_factory.mktemp('data')
+    monkeypatch.setattr(storage_integration, 'DATA_DIR', path)
+    return path
+
+
+@pytest.fixture
+def blueprints():
+    """Blueprints registered on the test app"""
+    return []
+
+
+@pytest.fixture
+def config():
+    """Config overrides for the test, as {attribute: value}"""
+    return {}
+
+
+@pytest.fixture
+def app(monkeypatch, blueprints, config):
+    """Create application with an in-memory database"""
+    for name, value in config.items():
+        monkeypatch.setattr(Config, name, value)
+
+    test_app = Flask(__name__)
+    test_app.config['TESTING'] = True
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(test_app)
+    for blueprint in blueprints:
+        test_app.register_blueprint(blueprint)
+    with test_app.app_context():
+        db.create_all()
+        yield test_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create test client"""
+    return app.test_client()
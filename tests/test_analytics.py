@@ -0,0 +1,104 @@
+"""
+Tests for call rollups and the time-series analytics endpoint
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call, CallRollup
+from routes import api_routes
+from services.rollup_service import RollupService, truncate
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+def make_call(started_at, answered=True, consent=True, duration=60):
+    """Create a completed call"""
+    call = Call(
+        status='completed',
+        started_at=started_at,
+        answered_at=started_at if answered else None,
+        consent_given=consent,
+        duration_seconds=duration if answered else None
+    )
+    db.session.add(call)
+    db.session.commit()
+    return call
+
+
+def test_truncate():
+    """Test bucket truncation"""
+    moment = datetime(2024, 1, 2, 13, 45, 30, 123)
+    assert truncate(moment, 'minute') == datetime(2024, 1, 2, 13, 45)
+    assert truncate(moment, 'hour') == datetime(2024, 1, 2, 13)
+    assert truncate(moment, 'day') == datetime(2024, 1, 2)
+
+
+def test_record_call_is_idempotent(app):
+    """Test a call is only counted once"""
+    call = make_call(datetime.utcnow())
+    assert RollupService.record_call(call) is True
+    assert RollupService.record_call(call) is False
+
+    rows = CallRollup.query.all()
+    assert len(rows) == 1
+    assert rows[0].granularity == 'minute'
+    assert rows[0].calls_total == 1
+
+
+def test_timeseries_merges_fine_buckets(app):
+    """Test hourly series combines minute buckets"""
+    base = truncate(datetime.utcnow() - timedelta(hours=2), 'hour')
+    RollupService.record_call(make_call(base + timedelta(minutes=5), duration=30))
+    RollupService.record_call(make_call(base + timedelta(minutes=50), consent=False, duration=90))
+    RollupService.record_call(make_call(base + timedelta(hours=1), answered=False, consent=False))
+
+    buckets = RollupService.timeseries('hour', base, base + timedelta(hours=2))
+    assert len(buckets) == 2
+    assert buckets[0]['calls'] == 2
+    assert buckets[0]['consent_rate'] == 50.0
+    assert buckets[0]['avg_duration_seconds'] == 60.0
+    assert buckets[1]['answer_rate'] == 0
+    assert buckets[1]['avg_duration_seconds'] is None
+
+
+def test_compaction_preserves_totals(app):
+    """Test compaction folds old minute buckets into hours without losing counts"""
+    old = truncate(datetime.utcnow() - timedelta(hours=2), 'hour')
+    for minute in (1, 2, 3):
+        RollupService.record_call(make_call(old + timedelta(minutes=minute)))
+
+    results = RollupService.compact(now=old + timedelta(days=2))
+    assert results['minute'] == 3
+
+    rows = CallRollup.query.all()
+    assert [(r.granularity, r.calls_total) for r in rows] == [('hour', 3)]
+
+    buckets = RollupService.timeseries('day', old, old + timedelta(days=1))
+    assert buckets[0]['calls'] == 3
+
+
+def test_timeseries_endpoint(client):
+    """Test time-series endpoint"""
+    started_at = datetime.utcnow() - timedelta(minutes=5)
+    RollupService.record_call(make_call(started_at))
+
+    response = client.get('/api/analytics/timeseries?granularity=hour')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total'] == 1
+    assert data['buckets'][0]['bucket_start'] == truncate(started_at, 'hour').isoformat()
+
+    response = client.get('/api/analytics/timeseries?start=2024-01-02T00:00:00Z&end=2024-01-01T00:00:00Z')
+    assert response.status_code == 400
+
+    response = client.get('/api/analytics/timeseries?granularity=week')
+    assert response.status_code == 400
@@ -0,0 +1,174 @@
+"""
+Tests for the ApertureData writer against the local protocol stand-in
+"""
+import pytest
+import sys
+import os
+import socket
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from models import db, Call, OutboxJob
+from services import outbox as outbox_module
+from services.aperturedata_client import ApertureDataWriter, decode_message, encode_message, reset_aperturedata_writer
+from services.aperturedata_standin import ApertureDataStandIn
+from services.circuit_breaker import CallRejected, get_breaker, reset_breakers
+from services.storage_service import StorageService
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    """A stand-in server the shared writer is configured to use"""
+    server = ApertureDataStandIn()
+    host, port = server.start()
+    monkeypatch.setattr(Config, 'APERTUREDATA_ENABLED', True)
+    monkeypatch.setattr(Config, 'APERTUREDATA_HOST', host)
+    monkeypatch.setattr(Config, 'APERTUREDATA_PORT', port)
+    reset_aperturedata_writer()
+    yield server
+    reset_aperturedata_writer()
+    server.stop()
+
+
+def writer_for(standin, **kwargs):
+    host, port = standin._server.server_address
+    return ApertureDataWriter(host=host, port=port, **kwargs)
+
+
+def items(count, start=1):
+    return [
+        (f'aperturedata:call:{i}:v1', {'id': i, 'version': 1, 'status': 'completed', 'recording_url': None},
+         [{'sequence': 1, 'speaker': 'patient', 'text': f'call {i}'}])
+        for i in range(start, start + count)
+    ]
+
+
+def test_message_round_trip():
+    """Test QueryMessage frames decode to what was encoded"""
+    frame = encode_message([{'FindEntity': {}}], [b'\x00audio', b''], token='t1')
+    assert decode_message(frame[4:]) == ([{'FindEntity': {}}], [b'\x00audio', b''], 't1')
+
+
+def test_calls_are_grouped_into_pipelined_transactions(standin):
+    """Test a write sends one transaction per transaction_size calls over one connection"""
+    writer = writer_for(standin, transaction_size=10, pipeline_depth=4)
+    acks = writer.write(items(45))
+
+    assert all(accepted for accepted, _ in acks.values())
+    assert acks['aperturedata:call:7:v1'] == (True, 'aperturedata:call:7:v1')
+    assert standin.transactions == 5
+    assert standin.connections == 1
+    assert len(standin.entities) == 45
+
+    writer.write(items(20, start=40))  # Retries and new calls
+    assert len(standin.entities) == 59
+    assert standin.connections == 1
+
+
+def test_failed_transaction_fails_only_its_calls(standin):
+    """Test a rejected transaction fails its calls and leaves the other transactions stored"""
+    standin.fail_uids.add('aperturedata:call:3:v1')
+    acks = writer_for(standin, transaction_size=2).write(items(6))
+
+    assert [acks[key][0] for key, _, _ in items(6)] == [True, True, False, False, True, True]
+    assert 'AddEntity failed' in acks['aperturedata:call:4:v1'][1]
+    assert set(standin.entities) == {'aperturedata:call:1:v1', 'aperturedata:call:2:v1',
+                                     'aperturedata:call:5:v1', 'aperturedata:call:6:v1'}
+
+
+def test_recording_is_attached_as_blob(standin):
+    """Test a call with a recording gets an AddBlob connected to its entity"""
+    writer = writer_for(standin, recording_loader=lambda url: b'RIFF' + url.encode())
+    key, call_data, transcripts = items(1)[0]
+    call_data['recording_url'] = 'https://recordings.test/1.wav'
+
+    assert writer.write([(key, call_data, transcripts)])[key][0]
+    properties, audio, entity = standin.blobs[f'{key}:recording']
+    assert audio == b'RIFFhttps://recordings.test/1.wav'
+    assert (properties['kind'], entity) == ('recording', key)
+
+    def unavailable(url):
+        raise IOError('404')
+
+    acks = writer_for(standin, recording_loader=unavailable).write([('k2', dict(call_data, id=2), [])])
+    assert acks['k2'][0] is False
+
+
+def test_push_and_fetch_through_storage_service(standin):
+    """Test the StorageService push returns the entity uid and the call reads back unchanged"""
+    key, call_data, transcripts = items(1)[0]
+    uid = StorageService.push_to_aperturedata(call_data, transcripts, idempotency_key=key)
+
+    assert uid == key
+    assert StorageService.fetch_from_aperturedata(uid) == {'call': call_data, 'transcripts': transcripts}
+    assert StorageService.fetch_from_aperturedata('missing') is None
+
+
+def test_outbox_batches_aperturedata_jobs(app, standin, monkeypatch):
+    """Test due ApertureData jobs are written in one batch and the uid is recorded on each call"""
+    monkeypatch.setattr(Config, 'MEMVERGE_ENABLED', False)
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', None)
+    monkeypatch.setattr(Config, 'TIERING_ENABLED', False)
+    monkeypatch.setattr(Config, 'OUTBOX_WORKERS_ENABLED', False)
+    monkeypatch.setattr(Config, 'APERTUREDATA_BATCH_MAX_DELAY_MS', 0)
+    monkeypatch.setattr(Config, 'APERTUREDATA_TRANSACTION_SIZE', 3)
+    reset_breakers()
+
+    for i in range(1, 8):
+        call = Call(id=i, call_control_id=f'cc_{i}', status='completed')
+        db.session.add(call)
+        db.session.flush()
+        outbox_module.outbox.enqueue_push(call)
+    db.session.commit()
+
+    assert outbox_module.Outbox().drain(['aperturedata']) == 1
+    assert {job.status for job in OutboxJob.query} == {'delivered'}
+    assert all(call.aperturedata_id in standin.entities for call in Call.query)
+    assert standin.transactions == 3
+
+
+def test_refused_connection_opens_the_breaker(monkeypatch):
+    """Test a write that cannot reach the server fails as a whole and trips the circuit breaker"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]  # Nothing listens here once the socket is closed
+    monkeypatch.setattr(Config, 'APERTUREDATA_ENABLED', True)
+    monkeypatch.setattr(Config, 'APERTUREDATA_HOST', '127.0.0.1')
+    monkeypatch.setattr(Config, 'APERTUREDATA_PORT', port)
+    reset_aperturedata_writer()
+    reset_breakers()
+
+    breaker = get_breaker('aperturedata')
+    assert StorageService.push_batch_to_aperturedata(items(2)) is None
+    for _ in range(Config.CIRCUIT_MIN_CALLS):
+        try:
+            breaker.call(StorageService.push_batch_to_aperturedata, items(2))
+        except CallRejected:
+            break
+
+    assert breaker.state == 'open'
+    assert StorageService.push_to_aperturedata(*items(1)[0][1:], idempotency_key='k') is None
+    reset_aperturedata_writer()
+    reset_breakers()
+
+
+def test_recordings_are_loaded_one_transaction_at_a_time(standin, monkeypatch):
+    """Test a transaction closes once its recordings reach the size cap, and recordings load as it is sent"""
+    monkeypatch.setattr(Config, 'APERTUREDATA_MAX_RECORDING_BYTES', 10)
+    sent_before_load = []
+
+    def loader(url):
+        sent_before_load.append(standin.commands)
+        return b'x' * 6
+
+    batch = items(5)
+    for _, call_data, _ in batch:
+        call_data['recording_url'] = f"https://recordings.test/{call_data['id']}.wav"
+    acks = writer_for(standin, transaction_size=10, pipeline_depth=1, recording_loader=loader).write(batch)
+
+    assert all(accepted for accepted, _ in acks.values())
+    assert standin.transactions == 3  # 2 + 2 + 1 calls
+    assert len(standin.blobs) == 5
+    assert sent_before_load[-1] > 0  # The last recording was loaded after earlier transactions went out
@@ -0,0 +1,136 @@
+"""
+Tests for the columnar archive export
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from models import db, Call, IntakeAnswer, Transcript
+from services.archive_export import ArchiveExporter
+
+DAY_1 = datetime(2026, 3, 1, 9, 30)
+DAY_2 = datetime(2026, 3, 2, 14, 0)
+
+
+def add_call(call_id, created_at, segments=2):
+    db.session.add(Call(id=call_id, call_control_id=f'cc_{call_id}', status='completed', consent_given=True,
+                        created_at=created_at, updated_at=created_at))
+    for sequence in range(1, segments + 1):
+        db.session.add(Transcript(call_id=call_id, speaker='patient', text=f'segment {sequence}',
+                                  sequence=sequence, created_at=created_at))
+    db.session.add(IntakeAnswer(call_id=call_id, section='hpi', question_key='pain_level', value='7',
+                                numeric_value=7.0))
+    db.session.commit()
+
+
+def read(output, table):
+    """All rows of a table across its partitions, with the partition each came from"""
+    rows = []
+    for root, _, files in os.walk(os.path.join(output, table)):
+        for name in files:
+            day = os.path.basename(root).split('=', 1)[1]
+            rows += [dict(row, _day=day) for row in pq.read_table(os.path.join(root, name)).to_pylist()]
+    return rows
+
+
+def test_tables_are_written_partitioned_by_day(app, tmp_path):
+    """Test every row lands in its day's partition with the column types preserved"""
+    add_call(1, DAY_1)
+    add_call(2, DAY_2, segments=3)
+
+    results = ArchiveExporter(str(tmp_path), batch_rows=2).export()
+
+    assert {name: result['rows'] for name, result in results.items()} == {'calls': 2, 'transcripts': 5, 'answers': 2}
+    assert results['transcripts']['files'] == 2
+    calls = {row['id']: row for row in read(tmp_path, 'calls')}
+    assert calls[1]['_day'] == '2026-03-01' and calls[2]['_day'] == '2026-03-02'
+    assert calls[1]['consent_given'] is True and calls[1]['created_at'] == DAY_1
+    transcripts = read(tmp_path, 'transcripts')
+    assert sorted((row['call_id'], row['sequence']) for row in transcripts if row['_day'] == '2026-03-02') == \
+        [(2, 1), (2, 2), (2, 3)]
+    assert {row['numeric_value'] for row in read(tmp_path, 'answers')} == {7.0}
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+
+
+def test_incremental_export_only_writes_changes(app, tmp_path):
+    """Test a second run exports only new and changed rows, and --full starts over"""
+    add_call(1, DAY_1)
+    add_call(2, DAY_1)
+    exporter = ArchiveExporter(str(tmp_path))
+    exporter.export()
+
+    assert {name: result['rows'] for name, result in exporter.export().items()} == \
+        {'calls': 0, 'transcripts': 0, 'answers': 0}
+
+    call = db.session.get(Call, 2)
+    call.status = 'failed'
+    call.updated_at = DAY_1 + timedelta(days=30)
+    db.session.add(Transcript(call_id=2, speaker='agent', text='follow up', sequence=3, created_at=DAY_2))
+    db.session.commit()
+
+    results = exporter.export()
+    assert {name: result['rows'] for name, result in results.items()} == {'calls': 1, 'transcripts': 1, 'answers': 1}
+    latest = {}
+    for row in read(tmp_path, 'calls'):
+        if row['id'] not in latest or row['version'] > latest[row['id']]['version']:
+            latest[row['id']] = row
+    assert latest[2]['status'] == 'failed' and latest[1]['status'] == 'completed'
+
+    full = exporter.export(tables=['transcripts'], full=True)
+    assert full == {'transcripts': dict(full['transcripts'], rows=5)}
+
+
+def test_recent_rows_wait_for_the_safety_lag(app, tmp_path):
+    """Test rows written within the safety lag are exported by a later run, not skipped"""
+    add_call(1, DAY_1)
+    add_call(2, datetime.utcnow())
+    add_call(3, DAY_2)  # Written after call 2, but timestamped earlier (as by another process)
+    exporter = ArchiveExporter(str(tmp_path), safety_lag=3600)
+
+    results = exporter.export()
+    assert {name: result['rows'] for name, result in results.items()} == {'calls': 2, 'transcripts': 2, 'answers': 2}
+
+    exporter.safety_lag = 0
+    results = exporter.export()
+    assert {name: result['rows'] for name, result in results.items()} == {'calls': 1, 'transcripts': 4, 'answers': 1}
+    assert sorted(row['id'] for row in read(tmp_path, 'calls')) == [1, 2, 3]
+
+
+def test_failed_run_removes_temporary_files(app, tmp_path, monkeypatch):
+    """Test an export that fails part way leaves no .tmp part files behind"""
+    add_call(1, DAY_1)
+    add_call(2, DAY_2)
+    exporter = ArchiveExporter(str(tmp_path), batch_rows=1)
+    open_writer = exporter._open_writer
+    opened = []
+
+    class FailingWriter:
+        def __init__(self, writer):
+            self.writer = writer
+
+        def write_batch(self, batch):
+            if len(opened) == 2:
+                raise OSError('disk full')
+            self.writer.write_batch(batch)
+
+        def close(self):
+            self.writer.close()
+
+    def open_failing_writer(*args):
+        writer, tmp, path = open_writer(*args)
+        opened.append(tmp)
+        return FailingWriter(writer), tmp, path
+
+    monkeypatch.setattr(exporter, '_open_writer', open_failing_writer)
+    with pytest.raises(OSError):
+        exporter.export(tables=['calls'])
+
+    assert len(opened) == 2
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+    assert exporter.load_state() == {'tables': {}}
@@ -0,0 +1,130 @@
+"""
+Tests for batched multi-call reads
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from config import Config
+from models import db, Call, Transcript
+from routes import call_routes
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [call_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """Tiering disabled"""
+    return {'TIERING_ENABLED': False}
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with three calls"""
+    for call_id in (1, 2, 3):
+        call = Call(id=call_id, call_control_id=f'cc_{call_id}', status='completed', consent_given=True,
+                    consent_timestamp=datetime(2026, 3, 1, 9, 0))
+        call.set_intake_data({'hpi': {'pain_level': {'value': str(call_id)}}})
+        db.session.add(call)
+        for sequence in (2, 1):
+            db.session.add(Transcript(call_id=call_id, speaker='patient', sequence=sequence,
+                                      text=f'call {call_id} segment {sequence} ' + 'x' * 200))
+    db.session.commit()
+    return app
+
+
+def test_batch_returns_resources_in_request_order(client):
+    """Test each call carries the same data as the single-call endpoints, in the order asked"""
+    data = client.get('/api/calls/batch?ids=3,1,99').get_json()
+
+    assert [item['call_id'] for item in data['calls']] == [3, 1]
+    assert (data['total'], data['missing'], data['next_ids']) == (2, [99], [])
+    item = data['calls'][0]
+    assert set(item['call']) == set(Call.FIELDS)
+    assert item['intake_data'] == {'intake_data': {'hpi': {'pain_level': {'value': '3'}}}, 'consent_given': True,
+                                   'consent_timestamp': '2026-03-01T09:00:00'}
+    assert [t['sequence'] for t in item['transcripts']] == [1, 2]
+
+
+def test_batch_uses_one_query_per_resource_type(app, client):
+    """Test calls and transcripts are each loaded with a single IN query"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.post('/api/calls/batch', json={'ids': [1, 2, 3], 'include': ['call', 'transcripts'],
+                                                         'view': 'summary'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    data = response.get_json()
+    assert [len(item['transcripts']) for item in data['calls']] == [2, 2, 2]
+    assert set(data['calls'][0]) == {'call_id', 'call', 'transcripts'}
+    assert set(data['calls'][0]['call']) == set(Call.VIEWS['summary'])
+    assert len(statements) == 2
+    assert 'intake_data' not in statements[0]
+
+
+def test_batch_post_accepts_field_list(client):
+    """Test fields may be given as a JSON list as well as a comma-separated string"""
+    response = client.post('/api/calls/batch', json={'ids': [1], 'include': ['call'], 'fields': ['id', 'status']})
+    assert response.status_code == 200
+    assert response.get_json()['calls'][0]['call'] == {'id': 1, 'status': 'completed'}
+
+    assert client.post('/api/calls/batch', json={'ids': [1], 'fields': ['id', 'nope']}).status_code == 400
+    assert client.post('/api/calls/batch', json={'ids': [1], 'fields': 5}).status_code == 400
+    assert client.post('/api/calls/batch', json={'ids': [1], 'view': ['summary']}).status_code == 400
+
+
+def test_recording_reads_does_not_reload_calls(app, client, monkeypatch):
+    """Test flushing buffered reads does not expire the loaded calls mid-response"""
+    monkeypatch.setattr(Config, 'TIERING_ENABLED', True)
+    monkeypatch.setattr(Config, 'TIERING_ACCESS_FLUSH_SIZE', 1)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/calls/batch?ids=1,2,3')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert [item['call_id'] for item in response.get_json()['calls']] == [1, 2, 3]
+    assert len([s for s in statements if 'FROM transcripts' in s]) == 1
+    assert len([s for s in statements if s.lstrip().startswith('SELECT') and 'calls.intake_data' in s]) == 1
+
+
+def test_batch_size_cap_returns_next_ids(client, monkeypatch):
+    """Test calls past the byte cap are left for a follow-up request"""
+    monkeypatch.setattr(Config, 'BATCH_READ_MAX_BYTES', 1000)
+    data = client.get('/api/calls/batch?ids=1,2,3&include=transcripts').get_json()
+    assert [item['call_id'] for item in data['calls']] == [1]
+    assert data['next_ids'] == [2, 3]
+
+    monkeypatch.setattr(Config, 'BATCH_READ_MAX_BYTES', 10)
+    data = client.get('/api/calls/batch?ids=2,3&include=transcripts').get_json()
+    assert [item['call_id'] for item in data['calls']] == [2]  # Always at least one
+
+
+def test_batch_validation(client, monkeypatch):
+    """Test bad ids, unknown resources and too many ids are rejected"""
+    monkeypatch.setattr(Config, 'BATCH_READ_MAX_IDS', 2)
+    assert client.get('/api/calls/batch').status_code == 400
+    assert client.get('/api/calls/batch?ids=1,two').status_code == 400
+    assert client.get('/api/calls/batch?ids=1&include=recording').status_code == 400
+    assert client.get('/api/calls/batch?ids=1,2,3').status_code == 400
+    assert client.get('/api/calls/batch?ids=1,1,2').status_code == 200
@@ -0,0 +1,76 @@
+"""
+Tests for projection-aware call serialization
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call
+from routes import call_routes
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [call_routes.bp]
+
+
+def make_call():
+    """Create a completed call with intake data"""
+    call = Call(status='completed', to_number='+12025551234', duration_seconds=42)
+    call.set_intake_data({'hpi': {'pain_level': {'value': '7'}}})
+    db.session.add(call)
+    db.session.commit()
+    return call
+
+
+def test_resolve_fields():
+    """Test field and view resolution"""
+    assert Call.resolve_fields() == Call.FIELDS
+    assert Call.resolve_fields(view='summary') == Call.VIEWS['summary']
+    assert Call.resolve_fields(fields='status,id') == ['id', 'status']
+    with pytest.raises(ValueError):
+        Call.resolve_fields(fields='id,ssn')
+    with pytest.raises(ValueError):
+        Call.resolve_fields(view='everything')
+
+
+def test_intake_data_is_memoized(app):
+    """Test intake data is parsed once and reparsed after it changes"""
+    call = make_call()
+    first = call.get_intake_data()
+    assert call.get_intake_data() is first
+
+    call.set_intake_data({'hpi': {}})
+    assert call.get_intake_data() == {'hpi': {}}
+
+
+def test_list_calls_summary_view(client):
+    """Test summary view omits intake data"""
+    make_call()
+
+    response = client.get('/api/calls?view=summary')
+    assert response.status_code == 200
+    call = response.get_json()['calls'][0]
+    assert set(call) == set(Call.VIEWS['summary'])
+    assert call['duration_seconds'] == 42
+
+
+def test_get_call_fields(client):
+    """Test field selection on call detail"""
+    call = make_call()
+
+    response = client.get(f'/api/calls/{call.id}?fields=status,intake_data')
+    assert response.get_json() == {
+        'status': 'completed',
+        'intake_data': {'hpi': {'pain_level': {'value': '7'}}}
+    }
+
+    full = client.get(f'/api/calls/{call.id}').get_json()
+    assert set(full) == set(Call.FIELDS)
+
+    response = client.get(f'/api/calls/{call.id}?fields=password')
+    assert response.status_code == 400
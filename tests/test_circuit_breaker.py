@@ -0,0 +1,167 @@
+"""
+Tests for per-target circuit breakers and bulkheads
+"""
+import sys
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from models import db, OutboxJob
+from routes import api_routes
+from services import outbox as outbox_module
+from services.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, BulkheadFullError, get_breaker, reset_breakers, CLOSED, OPEN, HALF_OPEN
+)
+from services.outbox import Outbox
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock, **kwargs):
+    options = dict(failure_rate=0.5, slow_call_seconds=1.0, slow_call_rate=0.8, window=10, min_calls=4,
+                   open_seconds=30, half_open_probes=1, max_concurrent=2, clock=clock)
+    options.update(kwargs)
+    return CircuitBreaker('memverge', **options)
+
+
+def test_opens_on_failure_rate_and_fails_fast():
+    """Test the circuit opens at the failure rate and then rejects without calling"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    calls = []
+
+    def push():
+        calls.append(1)
+        return None
+
+    for _ in range(4):
+        breaker.call(push)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as rejected:
+        breaker.call(push)
+    assert len(calls) == 4
+    assert rejected.value.retry_after == 30
+    assert breaker.snapshot()['rejected'] == 1
+
+
+def test_opens_on_slow_calls():
+    """Test calls slower than the threshold open the circuit even when they succeed"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    def slow_push():
+        clock.now += 2
+        return 'ok'
+
+    for _ in range(4):
+        breaker.call(slow_push)
+    assert breaker.state == OPEN
+
+
+def test_half_open_probe_closes_or_reopens():
+    """Test one probe is let through after the cool-down, and its outcome decides the state"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.call(lambda: None)
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    breaker.call(lambda: None)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    probe = breaker.acquire()
+    assert probe
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # Only one probe at a time
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()['times_opened'] == 2
+
+
+def test_bulkhead_caps_in_flight_calls():
+    """Test calls beyond max_concurrent are rejected instead of queued"""
+    breaker = make_breaker(FakeClock(), max_concurrent=2)
+    release = threading.Event()
+    started = threading.Barrier(3)
+
+    def slow_push():
+        started.wait()
+        release.wait()
+        return 'ok'
+
+    workers = [threading.Thread(target=breaker.call, args=(slow_push,)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    started.wait()
+    assert breaker.snapshot()['in_flight'] == 2
+    with pytest.raises(BulkheadFullError):
+        breaker.call(lambda: 'ok')
+    release.set()
+    for worker in workers:
+        worker.join()
+    assert breaker.snapshot()['in_flight'] == 0
+    assert breaker.state == CLOSED
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """MemVerge pushes enabled"""
+    return {
+        'OUTBOX_WORKERS_ENABLED': False,
+        'MEMVERGE_ENABLED': True,
+        'APERTUREDATA_ENABLED': False,
+        'BACKEND_API_URL': None
+    }
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with closed circuits"""
+    reset_breakers()
+    yield app
+    reset_breakers()
+
+
+def test_outbox_defers_jobs_while_circuit_is_open(app, monkeypatch):
+    """Test an open circuit postpones jobs without using up their attempts"""
+    calls = []
+    monkeypatch.setitem(outbox_module.TARGETS, 'memverge', (
+        lambda: True,
+        lambda call_data, transcript_data, idempotency_key=None: calls.append(1),
+        outbox_module._apply_memverge
+    ))
+    for i in range(Config.CIRCUIT_MIN_CALLS + 1):
+        db.session.add(OutboxJob(target='memverge', idempotency_key=f'memverge:call:{i}',
+                                 payload='{"call": {}, "transcripts": []}'))
+    db.session.commit()
+
+    Outbox().drain()
+    assert len(calls) == Config.CIRCUIT_MIN_CALLS
+    assert get_breaker('memverge').state == OPEN
+
+    deferred = OutboxJob.query.filter_by(attempts=0).one()
+    assert deferred.status == 'pending'
+    assert deferred.next_attempt_at > datetime.utcnow() + timedelta(seconds=Config.CIRCUIT_OPEN_SECONDS - 5)
+
+    circuits = app.test_client().get('/api/outbox').get_json()['circuits']
+    assert circuits['memverge']['state'] == 'open'
@@ -0,0 +1,113 @@
+"""
+Tests for vectorized cohort analytics
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call
+from routes import api_routes
+from services import cohort_analytics
+from services.intake_answer_service import IntakeAnswerService
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with an empty cohort cache"""
+    cohort_analytics._cache.reset()
+    return app
+
+
+def make_call(started_at, **answers):
+    """Create a call with DTMF answers"""
+    call = Call(status='completed', started_at=started_at)
+    db.session.add(call)
+    db.session.flush()
+    sections = {'symptom_duration': 'hpi', 'pain_level': 'hpi', 'last_meal': 'ample'}
+    intake_data = {'hpi': {}, 'ample': {}, 'family_history': {}}
+    for key, value in answers.items():
+        intake_data[sections.get(key, 'family_history')][key] = {'value': value}
+    IntakeAnswerService.sync_answers(call, intake_data)
+    db.session.commit()
+    return call
+
+
+def test_summary_statistics(app):
+    """Test distributions, percentiles and family history rates"""
+    now = datetime.utcnow()
+    make_call(now, pain_level='2', symptom_duration='1', diabetes='1')
+    make_call(now, pain_level='8', symptom_duration='4', diabetes='2', cancer='1')
+    make_call(now, pain_level='10', symptom_duration='4')
+
+    summary = cohort_analytics.summarize(
+        cohort_analytics.get_cache(),
+        crosstab_pair=('symptom_duration', 'diabetes')
+    )
+    assert summary['intakes'] == 3
+    assert summary['distributions']['symptom_duration'] == {'1': 1, '2': 0, '3': 0, '4': 2}
+    assert summary['pain_level']['percentiles']['p50'] == 8.0
+    assert summary['family_history']['diabetes'] == {'answered': 2, 'yes': 1, 'yes_rate': 50.0}
+    assert summary['family_history']['any']['yes'] == 2
+    assert summary['crosstab']['counts']['4'] == {'1': 0, '2': 1}
+
+
+def test_incremental_refresh_and_resync(app):
+    """Test new calls are appended and re-synced calls replace their row"""
+    now = datetime.utcnow()
+    first = make_call(now, pain_level='3')
+    cache = cohort_analytics.get_cache()
+    assert len(cache) == 1
+
+    make_call(now, pain_level='5')
+    IntakeAnswerService.sync_answers(first, {'hpi': {'pain_level': {'value': '9'}}})
+    db.session.commit()
+
+    cache = cohort_analytics.get_cache()
+    assert len(cache) == 2
+    assert cohort_analytics.summarize(cache)['distributions']['pain_level']['9'] == 1
+    assert cohort_analytics.summarize(cache)['distributions']['pain_level']['3'] == 0
+
+
+def test_cohort_endpoint_time_filter(app):
+    """Test cohort endpoint filters by call start time"""
+    now = datetime.utcnow()
+    make_call(now - timedelta(days=10), pain_level='1')
+    make_call(now, pain_level='7')
+
+    client = app.test_client()
+    since = (now - timedelta(days=1)).isoformat()
+    response = client.get(f'/api/analytics/cohort?since={since}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['intakes'] == 1
+    assert data['pain_level']['mean'] == 7.0
+
+    response = client.get('/api/analytics/cohort?crosstab=pain_level')
+    assert response.status_code == 400
+
+
+def test_out_of_range_numeric_answers_are_ignored(app):
+    """Test voice answers and bad codes that parse to huge, nan or inf values do not break the refresh"""
+    call = make_call(datetime.utcnow(), pain_level='4')
+    IntakeAnswerService.sync_answers(call, {'hpi': {
+        'chief_complaint': {'value': '99999'},
+        'pain_level': {'value': 'inf'},
+        'symptom_duration': {'value': 'nan'}
+    }})
+    make_call(datetime.utcnow(), pain_level='70000')
+
+    cache = cohort_analytics.get_cache()
+    summary = cohort_analytics.summarize(cache)
+    assert summary['intakes'] == 2
+    assert summary['pain_level']['answered'] == 0
+    assert cache.watermark > 0
@@ -0,0 +1,70 @@
+"""
+Tests for atomic writes and group commit
+"""
+import pytest
+import sys
+import os
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.durability import GroupCommitter, AtomicFileWriter, validate_mode
+from services.segment_log import SegmentLog
+
+
+def run_concurrently(target, count):
+    """Run target(i) on count threads and wait for them"""
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_group_commit_shares_flushes():
+    """Test concurrent submitters are flushed together"""
+    flushed = []
+    committer = GroupCommitter(lambda items: flushed.append(list(items)), window=0.05)
+    run_concurrently(lambda i: committer.submit(i), 8)
+
+    assert sorted(item for batch in flushed for item in batch) == list(range(8))
+    assert committer.flushes < 8
+
+
+def test_group_commit_propagates_errors():
+    """Test every writer in a failed batch sees the error"""
+    def fail(items):
+        raise OSError('disk full')
+
+    committer = GroupCommitter(fail, window=0)
+    with pytest.raises(OSError):
+        committer.submit('a')
+
+
+@pytest.mark.parametrize('mode', ['none', 'group', 'per-write'])
+def test_atomic_writer_modes(tmp_path, mode):
+    """Test files are written completely and no temp files are left behind"""
+    writer = AtomicFileWriter(mode=mode, window=0.01)
+    run_concurrently(lambda i: writer.write(tmp_path / f'note_{i}.json', b'{"n": %d}' % i), 4)
+    writer.write(tmp_path / 'note_0.json', b'{"n": "replaced"}')
+
+    assert sorted(os.listdir(tmp_path)) == [f'note_{i}.json' for i in range(4)]
+    assert (tmp_path / 'note_0.json').read_bytes() == b'{"n": "replaced"}'
+
+
+def test_invalid_mode():
+    """Test unknown durability modes are rejected"""
+    with pytest.raises(ValueError):
+        validate_mode('eventually')
+
+
+@pytest.mark.parametrize('mode', ['none', 'group', 'per-write'])
+def test_segment_log_modes(tmp_path, mode):
+    """Test segment appends in each durability mode"""
+    log = SegmentLog(tmp_path, durability=mode, group_window=0.01)
+    entries = []
+    run_concurrently(lambda i: entries.append(log.append('intake', f'call_{i}', {'n': i})), 4)
+
+    assert sorted(log.read(e)['n'] for e in entries) == [0, 1, 2, 3]
+    log.close()
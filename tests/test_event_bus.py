@@ -0,0 +1,115 @@
+"""
+Tests for the live event bus and Server-Sent Events endpoints
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, CallEvent
+from routes import event_routes
+from services.event_bus import EventBus, Subscription, DROPPED
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [event_routes.bp]
+
+
+def test_subscribe_filters_and_replays():
+    """Test per-call filtering and Last-Event-ID replay"""
+    bus = EventBus(backend='memory', buffer_size=10)
+    bus.publish('call.status', 1, {'status': 'ringing'})
+    bus.publish('call.status', 2, {'status': 'ringing'})
+    bus.publish('call.transcript', 1, {'text': 'hello'})
+
+    subscription, complete = bus.subscribe(call_id=1, last_event_id=1)
+    assert complete
+    event = subscription.get(timeout=0)
+    assert (event.id, event.event_type) == (3, 'call.transcript')
+    assert subscription.get(timeout=0) is None
+
+    bus.publish('call.status', 2, {'status': 'answered'})
+    bus.publish('call.status', 1, {'status': 'answered'})
+    assert subscription.get(timeout=0).id == 5
+
+
+def test_resume_outside_buffer_is_incomplete():
+    """Test resuming from an evicted event id asks the client to refetch"""
+    bus = EventBus(backend='memory', buffer_size=2)
+    for _ in range(5):
+        bus.publish('call.status', 1, {})
+
+    subscription, complete = bus.subscribe(last_event_id=1)
+    assert not complete
+    assert subscription.get(timeout=0) is None
+
+    _, complete = bus.subscribe(last_event_id=3)
+    assert complete
+
+
+def test_slow_subscriber_is_dropped():
+    """Test a full subscriber queue drops the subscriber instead of blocking"""
+    subscription = Subscription(max_pending=2)
+    bus = EventBus(backend='memory')
+    bus.subscribers.add(subscription)
+    for _ in range(5):
+        bus.publish('call.status', 1, {})
+
+    assert subscription.dropped
+    assert subscription.get(timeout=0).id == 2
+    assert subscription.get(timeout=0) is DROPPED
+
+
+def test_database_backend_dispatches_stored_events(app):
+    """Test events are shared through the call_events table"""
+    bus = EventBus(backend='database')
+    bus._initialized = True
+    subscription = Subscription()
+    bus.subscribers.add(subscription)
+
+    bus.publish('call.answer', 7, {'question_key': 'pain_level', 'value': '8'})
+    assert CallEvent.query.count() == 1
+    assert bus.poll_once() == 1
+
+    event = subscription.get(timeout=0)
+    assert event.call_id == 7
+    assert event.data['value'] == '8'
+    assert event.encode().startswith(f'id: {event.id}\nevent: call.answer\n'.encode())
+
+
+def test_database_backend_dispatches_late_committed_lower_ids(app):
+    """Test a row whose id is below the last seen one (committed later) is still dispatched, once"""
+    bus = EventBus(backend='database')
+    bus._initialized = True
+    subscription = Subscription()
+    bus.subscribers.add(subscription)
+
+    for event_id in (1, 3):
+        db.session.add(CallEvent(id=event_id, call_id=7, event_type='call.answer', payload='{}'))
+    db.session.commit()
+    assert bus.poll_once() == 2
+
+    db.session.add(CallEvent(id=2, call_id=7, event_type='call.answer', payload='{}'))
+    db.session.commit()
+    assert bus.poll_once() == 1
+    assert bus.poll_once() == 0
+    assert [subscription.get(timeout=0).id for _ in range(3)] == [1, 3, 2]
+    assert bus.last_id == 3
+
+
+def test_sse_endpoint_streams_events(app, monkeypatch):
+    """Test the per-call SSE endpoint replays events after Last-Event-ID"""
+    bus = EventBus(backend='memory')
+    monkeypatch.setattr(event_routes, 'event_bus', bus)
+    bus.publish('call.status', 3, {'status': 'answered'})
+
+    response = app.test_client().get('/api/calls/3/events', headers={'Last-Event-ID': '0'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks) == b'retry: 3000\n\n'
+    assert b'event: call.status' in next(chunks)
+    response.close()
@@ -0,0 +1,74 @@
+"""
+Tests for the streaming NDJSON call export
+"""
+import pytest
+import sys
+import os
+import json
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call
+from routes import api_routes
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """Small export batches"""
+    return {'STORAGE_STREAM_BATCH_SIZE': 2}
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with seven calls"""
+    for i in range(1, 8):
+        call = Call(id=i, call_control_id=f'cc_{i}', status='completed' if i % 2 else 'failed',
+                    consent_given=i != 3, started_at=datetime(2026, 3, i, 12, 0))
+        call.set_intake_data({'hpi': {'pain_level': {'value': str(i)}}})
+        db.session.add(call)
+    db.session.commit()
+    return app
+
+
+def export(client, query=''):
+    response = client.get(f'/api/export/calls{query}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_streams_every_call_with_intake_data(client):
+    """Test every call is one NDJSON line in id order, across cursor batches"""
+    calls = export(client)
+
+    assert [call['id'] for call in calls] == list(range(1, 8))
+    assert calls[3]['intake_data'] == {'hpi': {'pain_level': {'value': '4'}}}
+    assert set(calls[0]) == set(Call.FIELDS)
+
+
+def test_export_filters(client):
+    """Test date range, status and consent filters combine"""
+    calls = export(client, '?since=2026-03-02T00:00:00&until=2026-03-07T00:00:00&status=completed&consent=true')
+    assert [call['id'] for call in calls] == [5]
+
+    assert [call['id'] for call in export(client, '?status=failed,completed&consent=false')] == [3]
+    assert client.get('/api/export/calls?consent=maybe').status_code == 400
+    assert client.get('/api/export/calls?since=yesterday').status_code == 400
+
+
+def test_export_resumes_from_cursor(client):
+    """Test passing the last id received continues where a limited export stopped"""
+    first = export(client, '?limit=3&fields=status')
+    assert first == [{'id': 1, 'status': 'completed'}, {'id': 2, 'status': 'failed'}, {'id': 3, 'status': 'completed'}]
+
+    rest = export(client, f"?cursor={first[-1]['id']}&view=summary")
+    assert [call['id'] for call in rest] == [4, 5, 6, 7]
@@ -0,0 +1,100 @@
+"""
+Tests for the normalized intake answer table and search endpoint
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call, IntakeAnswer
+from routes import api_routes
+from services.intake_answer_service import IntakeAnswerService, parse_filter
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+def make_intake(pain_level, allergies):
+    """Build formatted intake data"""
+    timestamp = datetime.utcnow().isoformat()
+    return {
+        'consent_given': True,
+        'hpi': {'pain_level': {'value': pain_level, 'timestamp': timestamp}},
+        'ample': {'allergies': {'value': allergies, 'timestamp': timestamp}},
+        'family_history': {}
+    }
+
+
+def make_call(intake_data):
+    """Create a call with synced intake answers"""
+    call = Call(status='completed')
+    db.session.add(call)
+    db.session.flush()
+    call.set_intake_data(intake_data)
+    IntakeAnswerService.sync_answers(call, intake_data)
+    db.session.commit()
+    return call
+
+
+def test_parse_filter():
+    """Test filter expression parsing"""
+    assert parse_filter('pain_level:gte:8') == ('pain_level', 'gte', '8')
+    with pytest.raises(ValueError):
+        parse_filter('pain_level:between:8')
+    with pytest.raises(ValueError):
+        parse_filter('pain_level:gte:high')
+
+
+def test_sync_answers_replaces_rows(app):
+    """Test re-syncing a call replaces its answers"""
+    call = make_call(make_intake('3', '2'))
+    IntakeAnswerService.sync_answers(call, make_intake('9', '2'))
+    db.session.commit()
+
+    answers = IntakeAnswer.query.filter_by(call_id=call.id).all()
+    assert len(answers) == 2
+    pain = [a for a in answers if a.question_key == 'pain_level'][0]
+    assert pain.section == 'hpi'
+    assert pain.numeric_value == 9.0
+
+
+def test_search_combines_filters(app):
+    """Test numeric and equality filters are combined with AND"""
+    severe_allergic = make_call(make_intake('10', '1'))
+    make_call(make_intake('9', '2'))
+    make_call(make_intake('2', '1'))
+
+    results = IntakeAnswerService.search([('pain_level', 'gte', '8'), ('allergies', 'eq', '1')])
+    assert [r['call_id'] for r in results] == [severe_allergic.id]
+    assert results[0]['answers'] == {'pain_level': '10', 'allergies': '1'}
+
+
+def test_search_endpoint(client):
+    """Test intake answer search endpoint"""
+    make_call(make_intake('8', '2'))
+
+    response = client.get('/api/intake-answers/search?filter=pain_level:gte:8')
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 1
+
+    response = client.get('/api/intake-answers/search')
+    assert response.status_code == 400
+
+
+def test_rebuild_endpoint(client):
+    """Test rebuilding answers from stored intake data"""
+    call = Call(status='completed')
+    call.set_intake_data(make_intake('5', '1'))
+    db.session.add(call)
+    db.session.commit()
+
+    response = client.post('/api/intake-answers/rebuild')
+    assert response.status_code == 200
+    assert response.get_json()['calls_processed'] == 1
+    assert IntakeAnswer.query.filter_by(call_id=call.id).count() == 2
@@ -0,0 +1,138 @@
+"""
+Tests for the WebSocket live-transcript channel
+"""
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import websockets
+from services.event_bus import Event
+from services.live_transcript_ws import TranscriptHub, Viewer, CLOSE_TOO_SLOW
+
+
+def snapshot_loader(call_id):
+    """Stand-in for the database snapshot"""
+    if call_id != 1:
+        return None
+    return {
+        'status': 'answered',
+        'transcripts': [{'id': 10, 'text': 'hello', 'is_final': True}],
+        'answers': {}
+    }
+
+
+async def with_server(scenario):
+    """Run a scenario against a hub served on a free local port"""
+    hub = TranscriptHub(snapshot_loader=snapshot_loader)
+    hub.loop = asyncio.get_running_loop()
+    async with websockets.serve(hub.handler, 'localhost', 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        return await scenario(hub, f'ws://localhost:{port}')
+
+
+async def receive(websocket):
+    return json.loads(await asyncio.wait_for(websocket.recv(), timeout=2))
+
+
+def test_snapshot_events_and_interim_coalescing():
+    """Test viewers get a snapshot, deduplicated finals, answers and coalesced interim text"""
+    async def scenario(hub, url):
+        async with websockets.connect(f'{url}/calls/1') as websocket:
+            snapshot = await receive(websocket)
+            assert snapshot['type'] == 'snapshot'
+            assert snapshot['transcripts'][0]['text'] == 'hello'
+
+            hub.dispatch(Event(1, 'call.transcript', 1, {'id': 10, 'text': 'hello', 'is_final': True}))
+            for text in ('I', 'I have', 'I have a headache'):
+                hub.dispatch(Event(2, 'call.transcript', 1, {'text': text, 'is_final': False}))
+            interim = await receive(websocket)
+            assert interim == {'type': 'interim', 'call_id': 1, 'text': 'I have a headache'}
+
+            hub.dispatch(Event(3, 'call.transcript', 1, {'id': 11, 'text': 'I have a headache', 'is_final': True}))
+            hub.dispatch(Event(4, 'call.answer', 1, {'question_key': 'pain_level', 'value': '7'}))
+            assert (await receive(websocket))['segment']['id'] == 11
+            assert (await receive(websocket))['value'] == '7'
+
+            # Later viewers see the accumulated state in their snapshot
+            async with websockets.connect(url) as second:
+                await second.send(json.dumps({'action': 'subscribe', 'call_id': 1}))
+                late = await receive(second)
+                assert len(late['transcripts']) == 2
+                assert late['answers'] == {'pain_level': '7'}
+
+    asyncio.run(with_server(scenario))
+
+
+def test_unknown_call_and_channel_cleanup():
+    """Test unknown calls return an error and empty channels are removed"""
+    async def scenario(hub, url):
+        async with websockets.connect(url) as websocket:
+            await websocket.send(json.dumps({'action': 'subscribe', 'call_id': 2}))
+            assert (await receive(websocket))['type'] == 'error'
+            await websocket.send(json.dumps({'action': 'subscribe', 'call_id': 1}))
+            await receive(websocket)
+            assert 1 in hub.channels
+            await websocket.send(json.dumps({'action': 'unsubscribe', 'call_id': 1}))
+            assert (await receive(websocket))['type'] == 'unsubscribed'
+            assert hub.channels == {}
+
+    asyncio.run(with_server(scenario))
+
+
+def test_slow_viewer_is_dropped():
+    """Test a viewer whose queue overflows is closed instead of buffering without bound"""
+    class FakeWebSocket:
+        closed_with = None
+
+        async def close(self, code, reason):
+            self.closed_with = code
+
+    async def scenario():
+        websocket = FakeWebSocket()
+        viewer = Viewer(websocket, max_pending=2)
+        for message in ('a', 'b', 'c'):
+            viewer.offer(message)
+        await asyncio.sleep(0)
+        assert viewer.dropped
+        assert websocket.closed_with == CLOSE_TOO_SLOW
+
+    asyncio.run(scenario())
+
+
+def test_failed_snapshot_load_releases_waiting_viewers():
+    """Test a snapshot load that raises wakes viewers waiting on it and is retried by the next subscriber"""
+    class FakeWebSocket:
+        async def close(self, code, reason):
+            pass
+
+    attempts = []
+
+    def flaky_loader(call_id):
+        attempts.append(call_id)
+        if len(attempts) == 1:
+            raise RuntimeError('database unavailable')
+        return snapshot_loader(call_id)
+
+    async def scenario():
+        hub = TranscriptHub(snapshot_loader=flaky_loader)
+        hub.loop = asyncio.get_running_loop()
+        first, waiting, retry = (Viewer(FakeWebSocket()) for _ in range(3))
+
+        loading = asyncio.ensure_future(hub.subscribe(first, 1))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(hub.subscribe(waiting, 1), timeout=2)
+        assert json.loads(waiting.queue.get_nowait())['type'] == 'error'
+        with pytest.raises(RuntimeError):
+            await loading
+        assert hub.channels == {}
+
+        await hub.subscribe(retry, 1)
+        assert json.loads(retry.queue.get_nowait())['type'] == 'snapshot'
+        assert len(attempts) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,298 @@
+"""
+Tests for the transactional outbox of external pushes
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from models import db, Call, Transcript, OutboxJob, PushState
+from routes import webhook_routes, api_routes
+from services import outbox as outbox_module
+from services.outbox import Outbox, backoff_delay, payload_hashes
+from services.circuit_breaker import reset_breakers
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [webhook_routes.bp, api_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """MemVerge + backend pushes enabled"""
+    return {
+        'OUTBOX_WORKERS_ENABLED': False,
+        'MEMVERGE_ENABLED': True,
+        'APERTUREDATA_ENABLED': False,
+        'BACKEND_API_URL': 'http://backend.test/intake',
+        'EVENT_BUS_BACKEND': 'memory'
+    }
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with closed circuits"""
+    reset_breakers()
+    return app
+
+
+@pytest.fixture
+def pushes(monkeypatch):
+    """Replace the push functions with recorders; set fail[target] to make a target fail"""
+    calls = []
+    fail = {}
+
+    def recorder(target, result):
+        def push(call_data, transcript_data, idempotency_key=None):
+            sent = None if transcript_data is None else len(list(transcript_data))
+            calls.append((target, call_data['id'], sent, idempotency_key))
+            return None if fail.get(target) else result
+        return push
+
+    monkeypatch.setitem(outbox_module.TARGETS, 'memverge',
+                        (lambda: True, recorder('memverge', 'mv_1'), outbox_module._apply_memverge))
+    monkeypatch.setitem(outbox_module.TARGETS, 'backend',
+                        (lambda: True, recorder('backend', True), outbox_module._apply_backend))
+    return calls, fail
+
+
+def hang_up(client, call):
+    return client.post('/webhooks/telnyx', json={
+        'data': {'event_type': 'call.hangup', 'payload': {'call_control_id': call.call_control_id}}
+    })
+
+
+@pytest.fixture
+def call(app):
+    call = Call(call_control_id='cc_1', status='answered', answered_at=datetime.utcnow())
+    db.session.add(call)
+    db.session.commit()
+    db.session.add(Transcript(call_id=call.id, speaker='patient', text='hello', sequence=1))
+    db.session.commit()
+    return call
+
+
+def test_hangup_enqueues_jobs_and_workers_deliver(app, call, pushes):
+    """Test completion writes one job per target, and delivery records results on the call"""
+    calls, _ = pushes
+    client = app.test_client()
+
+    assert hang_up(client, call).status_code == 200
+    assert calls == []  # Nothing is pushed inside the webhook
+    jobs = OutboxJob.query.order_by(OutboxJob.target).all()
+    assert [(j.target, j.status) for j in jobs] == [('backend', 'pending'), ('memverge', 'pending')]
+
+    keys = [job.idempotency_key for job in jobs]
+    assert keys[0].startswith(f'backend:call:{call.id}:v')
+    assert Outbox().drain() == 2
+    assert sorted(calls) == [('backend', call.id, 1, keys[0]), ('memverge', call.id, 1, keys[1])]
+    refreshed = db.session.get(Call, call.id)
+    assert refreshed.memverge_id == 'mv_1'
+    assert refreshed.backend_pushed
+    assert {j.status for j in OutboxJob.query} == {'delivered'}
+
+
+def test_repeated_hangup_does_not_duplicate_jobs(app, call, pushes):
+    """Test a redelivered webhook keeps one job per target"""
+    client = app.test_client()
+    hang_up(client, call)
+    hang_up(client, call)
+    assert OutboxJob.query.count() == 2
+
+
+def test_declined_call_gets_end_time_at_hangup(app, call, pushes, monkeypatch):
+    """Test a call completed by declining consent still records when it ended"""
+    monkeypatch.setattr(webhook_routes.TelnyxService, 'speak', staticmethod(lambda *args, **kwargs: None))
+    monkeypatch.setattr(webhook_routes.TelnyxService, 'hangup', staticmethod(lambda *args, **kwargs: None))
+    monkeypatch.setitem(webhook_routes.call_states, call.call_control_id, {'call_id': call.id, 'stage': 'consent'})
+    client = app.test_client()
+
+    client.post('/webhooks/telnyx', json={'data': {'event_type': 'call.gather.ended', 'payload': {
+        'call_control_id': call.call_control_id, 'digits': '2'}}})
+    assert db.session.get(Call, call.id).status == 'completed'
+    hang_up(client, call)
+
+    declined = db.session.get(Call, call.id)
+    assert declined.ended_at is not None
+    assert declined.duration_seconds is not None
+    ended_at = declined.ended_at
+    hang_up(client, call)
+    assert db.session.get(Call, call.id).ended_at == ended_at
+
+
+def test_failures_back_off_then_dead_letter(app, call, pushes, monkeypatch):
+    """Test failed pushes are retried with backoff and dead-lettered after the attempt limit"""
+    calls, fail = pushes
+    fail['memverge'] = True
+    monkeypatch.setattr(Config, 'OUTBOX_MAX_ATTEMPTS', 3)
+    hang_up(app.test_client(), call)
+    worker = Outbox()
+
+    assert worker.drain(['memverge']) == 1
+    job = OutboxJob.query.filter_by(target='memverge').one()
+    assert (job.status, job.attempts) == ('pending', 1)
+    assert job.next_attempt_at > datetime.utcnow()
+    assert worker.drain(['memverge']) == 0  # Not due yet
+
+    for attempt in (2, 3):
+        job.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert worker.drain(['memverge']) == 1
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ('dead', 3)
+    assert 'did not accept' in job.last_error
+
+    stats = worker.stats()
+    assert stats['dead'] == 1
+    assert stats['depth'] == 1  # The backend job has not been drained
+    assert stats['targets']['memverge']['dead'] == 1
+
+    fail['memverge'] = False
+    client = app.test_client()
+    assert client.post('/api/outbox/retry', json={}).get_json()['requeued'] == 1
+    assert worker.drain() == 2
+    assert db.session.get(Call, call.id).memverge_id == 'mv_1'
+    assert len(calls) == 5
+
+
+def test_expired_lease_is_reclaimed(app, call, pushes):
+    """Test a job claimed by a worker that died is delivered after its lease expires"""
+    hang_up(app.test_client(), call)
+    worker = Outbox()
+    job = worker.claim('backend')
+    assert job.status == 'in_progress'
+    assert worker.claim('backend') is None
+
+    job.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    reclaimed = worker.claim('backend')
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
+
+
+def test_outbox_stats_endpoint(app, call, pushes):
+    """Test depth and age are reported per target"""
+    client = app.test_client()
+    hang_up(client, call)
+
+    data = client.get('/api/outbox').get_json()
+    assert data['depth'] == 2
+    assert data['targets']['memverge']['pending'] == 1
+    assert data['oldest_pending_seconds'] >= 0
+
+
+def test_backoff_delay_is_capped():
+    """Test backoff doubles per attempt with jitter and respects the cap"""
+    assert 1 <= backoff_delay(1, base=2, maximum=100) <= 2
+    assert 4 <= backoff_delay(3, base=2, maximum=100) <= 8
+    assert backoff_delay(20, base=2, maximum=100) <= 100
+
+
+def test_batched_backend_delivery_retries_only_failed_items(app, pushes, monkeypatch):
+    """Test backend jobs go out in one request and only unacknowledged items are retried"""
+    monkeypatch.setattr(Config, 'BACKEND_BATCH_ENABLED', True)
+    monkeypatch.setattr(Config, 'BACKEND_BATCH_MAX_ITEMS', 10)
+    monkeypatch.setattr(Config, 'BACKEND_BATCH_MAX_DELAY_MS', 0)
+    batches = []
+
+    def push_batch(items):
+        batches.append([call_data['id'] for _, call_data, _ in items])
+        return {key: (call_data['id'] != 2, 'validation failed') for key, call_data, _ in items[:-1]}
+
+    monkeypatch.setattr(outbox_module.StorageService, 'push_batch_to_backend', staticmethod(push_batch))
+    for i in range(1, 5):
+        db.session.add(Call(id=i, call_control_id=f'cc_{i}', status='completed'))
+        db.session.flush()
+        outbox_module.outbox.enqueue_push(db.session.get(Call, i), [])
+    db.session.commit()
+
+    worker = Outbox()
+    assert worker.drain(['backend']) == 1
+    assert batches == [[1, 2, 3, 4]]
+
+    jobs = {job.call_id: job for job in OutboxJob.query.filter_by(target='backend')}
+    assert {i: jobs[i].status for i in jobs} == {1: 'delivered', 2: 'pending', 3: 'delivered', 4: 'pending'}
+    assert jobs[2].last_error == 'validation failed'
+    assert jobs[4].last_error == 'Not acknowledged by the receiver'
+    assert db.session.get(Call, 1).backend_pushed
+
+    delivery = worker.stats()['delivery']['backend']
+    assert (delivery['requests'], delivery['items'], delivery['requests_saved']) == (1, 4, 3)
+    assert delivery['delay_p50_seconds'] is not None
+
+
+def test_unchanged_payload_is_not_pushed_again(app, call, pushes):
+    """Test a resync of an unchanged call is skipped, and a changed call is pushed again"""
+    calls, _ = pushes
+    client = app.test_client()
+    hang_up(client, call)
+    worker = Outbox()
+    worker.drain()
+    assert len(calls) == 2
+    assert PushState.query.count() == 2
+
+    # Writing back push results bumps the version but not the content
+    response = client.post('/api/outbox/resync', json={'call_ids': [call.id, 999]})
+    assert response.get_json() == {'success': True, 'enqueued': 0, 'missing': [999]}
+    assert worker.resync([call.id])['enqueued'] == 0
+    assert worker.drain() == 0
+    assert worker.delivery_stats()['backend']['skipped'] == 1
+
+    db.session.add(Transcript(call_id=call.id, speaker='agent', text='thanks', sequence=2))
+    db.session.commit()
+    assert worker.resync([call.id])['enqueued'] == 2
+    assert worker.drain() == 2
+    assert sorted(entry[:3] for entry in calls[2:]) == [('backend', call.id, 2), ('memverge', call.id, 2)]
+
+
+def test_job_for_acknowledged_content_is_skipped(app, call, pushes):
+    """Test a queued job whose content the target acknowledged meanwhile is closed without a push"""
+    calls, _ = pushes
+    hang_up(app.test_client(), call)
+    job = OutboxJob.query.filter_by(target='backend').one()
+    db.session.add(PushState(target='backend', call_id=call.id, content_hash=job.content_hash,
+                             section_hashes=job.section_hashes))
+    db.session.commit()
+
+    worker = Outbox()
+    assert worker.drain(['backend']) == 1
+    assert calls == []
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ('skipped', 0)
+    assert worker.stats()['targets']['backend']['skipped'] == 1
+
+
+def test_partial_backend_update_omits_unchanged_transcripts(app, call, pushes, monkeypatch):
+    """Test only changed sections are sent to the backend when partial updates are enabled"""
+    monkeypatch.setattr(Config, 'BACKEND_PARTIAL_UPDATES', True)
+    calls, _ = pushes
+    client = app.test_client()
+    hang_up(client, call)
+    worker = Outbox()
+    worker.drain()
+
+    refreshed = db.session.get(Call, call.id)
+    refreshed.patient_id = None
+    refreshed.recording_url = 'https://recordings.test/1.mp3'
+    db.session.commit()
+    assert worker.resync([call.id])['enqueued'] == 2
+    worker.drain()
+    assert sorted(entry[:3] for entry in calls[2:]) == [('backend', call.id, None), ('memverge', call.id, 1)]
+
+
+def test_payload_hash_ignores_push_results():
+    """Test push results and version do not change the content hash, and other fields do"""
+    call_data = {'id': 1, 'status': 'completed', 'memverge_id': None, 'version': 1}
+    pushed = dict(call_data, memverge_id='mv_1', version=2)
+    changed = dict(call_data, status='failed')
+    transcripts = [{'speaker': 'patient', 'text': 'hello'}]
+
+    assert payload_hashes(call_data, transcripts)[0] == payload_hashes(pushed, transcripts)[0]
+    assert payload_hashes(call_data, transcripts)[0] != payload_hashes(changed, transcripts)[0]
+    assert payload_hashes(call_data, [])[1]['call'] == payload_hashes(call_data, transcripts)[1]['call']
@@ -0,0 +1,82 @@
+"""
+Tests for the shared dashboard overview snapshot
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Patient, Call
+from routes import api_routes
+from services.overview_snapshot import OverviewSnapshot, overview_snapshot
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with an empty overview snapshot"""
+    overview_snapshot.reset()
+    yield app
+    overview_snapshot.reset()
+
+
+def test_rebuilds_only_on_change(app):
+    """Test the snapshot is rebuilt only when calls or patients change"""
+    snapshot = OverviewSnapshot(tick=0)
+    body, etag = snapshot.get()
+    again, same_etag = snapshot.get()
+    assert again is body
+    assert same_etag == etag
+    assert snapshot.builds == 1
+
+    db.session.add(Call(status='ringing', to_number='+15551234567'))
+    db.session.commit()
+    body, new_etag = snapshot.get()
+    assert snapshot.builds == 2
+    assert new_etag != etag
+
+    call = Call.query.first()
+    call.status = 'completed'
+    db.session.commit()
+    snapshot.get()
+    assert snapshot.builds == 3
+
+
+def test_tick_limits_checks(app):
+    """Test changes within a tick are not picked up until the tick expires"""
+    snapshot = OverviewSnapshot(tick=60)
+    snapshot.get()
+    db.session.add(Patient(phone_number='+15551234567'))
+    db.session.commit()
+    snapshot.get()
+    assert snapshot.builds == 1
+
+    snapshot.invalidate()
+    snapshot.get()
+    assert snapshot.builds == 2
+
+
+def test_overview_endpoint(client):
+    """Test overview payload, cache headers and conditional GET"""
+    db.session.add(Patient(phone_number='+15551234567'))
+    db.session.add(Call(status='completed', consent_given=True, to_number='+15551234567'))
+    db.session.commit()
+
+    response = client.get('/api/overview')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['stats']['total_calls'] == 1
+    assert data['stats']['consent_rate'] == 100.0
+    assert data['recent_calls'][0]['status'] == 'completed'
+    assert 'intake_data' not in data['recent_calls'][0]
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+
+    response = client.get('/api/overview', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
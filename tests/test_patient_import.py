@@ -0,0 +1,114 @@
+"""
+Tests for bulk patient import
+"""
+import pytest
+import sys
+import os
+import io
+import json
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from models import db, Patient
+from routes import api_routes
+from services.patient_import import normalize_phone
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """Small import batches"""
+    return {'IMPORT_BATCH_SIZE': 3, 'IMPORT_DEFAULT_COUNTRY_CODE': '1'}
+
+
+def test_normalize_phone():
+    """Test phone numbers in common formats normalize to E.164"""
+    assert normalize_phone('(202) 555-0100') == '+12025550100'
+    assert normalize_phone('1.202.555.0100') == '+12025550100'
+    assert normalize_phone('+44 20 7946 0958') == '+442079460958'
+    assert normalize_phone('0044 20 7946 0958') == '+442079460958'
+    assert normalize_phone('020 7946 0958', default_country_code='44') == '+442079460958'
+    for invalid in ('', None, '555-CALL', '12345', '+1 202 555 0100 ext 4'):
+        with pytest.raises(ValueError):
+            normalize_phone(invalid)
+
+
+def test_csv_import_dedups_and_reports_row_errors(client):
+    """Test a CSV import skips existing and repeated numbers and lists invalid rows by line"""
+    db.session.add(Patient(phone_number='+12025550100', first_name='Existing'))
+    db.session.commit()
+    body = '\n'.join([
+        'phone,first_name,last_name,dob,notes',
+        '202-555-0100,Dup,Existing,,',             # row 2: already on file
+        '(202) 555-0101,Ada,Lovelace,1815-12-10,x',
+        'not a number,Bad,Phone,,',                # row 4
+        '202.555.0102,Alan,Turing,,',
+        '+1 202 555 0101,Ada,Again,,',             # row 6: repeated in the file
+        '2025550103,Grace,Hopper,12/09/1906,',     # row 7: bad date
+        '2025550104,Edsger,Dijkstra,,',
+    ])
+
+    response = client.post('/api/patients/import', data=body, content_type='text/csv')
+
+    assert response.status_code == 200
+    result = response.get_json()
+    assert {key: result[key] for key in ('rows', 'inserted', 'skipped', 'failed')} == \
+        {'rows': 7, 'inserted': 3, 'skipped': 2, 'failed': 2}
+    assert [error['row'] for error in result['errors']] == [4, 7]
+    assert 'YYYY-MM-DD' in result['errors'][1]['error']
+    ada = Patient.query.filter_by(phone_number='+12025550101').one()
+    assert (ada.last_name, ada.date_of_birth) == ('Lovelace', date(1815, 12, 10))
+    assert Patient.query.filter_by(phone_number='+12025550100').one().first_name == 'Existing'
+
+
+def test_ndjson_import_uses_one_lookup_per_batch(app, client):
+    """Test NDJSON rows are checked with one IN query and inserted with one statement per batch"""
+    lines = [json.dumps({'phone_number': f'202555{i:04d}', 'first_name': f'P{i}'}) for i in range(7)]
+    lines.insert(2, '{broken')
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.post('/api/patients/import?format=ndjson', data='\n'.join(lines) + '\n\n',
+                               content_type='application/octet-stream')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    result = response.get_json()
+    assert (result['inserted'], result['failed'], result['errors'][0]['row']) == (7, 1, 3)
+    assert statements.count('SELECT') == 3  # Batches of 3, 3 and 1
+    assert statements.count('INSERT') == 3
+    assert Patient.query.count() == 7
+
+
+def test_multipart_upload_and_unknown_format(client):
+    """Test a multipart file upload is accepted and an unknown format is rejected"""
+    upload = {'file': (io.BytesIO(b'phone_number\n2025550199\n'), 'roster.csv')}
+    response = client.post('/api/patients/import', data=upload, content_type='multipart/form-data')
+    assert response.get_json()['inserted'] == 1
+
+    response = client.post('/api/patients/import', data='phone\n1', content_type='text/plain')
+    assert response.status_code == 400
+
+
+def test_created_and_imported_patients_share_phone_format(client):
+    """Test POST /api/patients stores E.164, so an import of the same number skips it"""
+    response = client.post('/api/patients', json={'phone_number': '(202) 555-0100', 'first_name': 'Ada'})
+    assert response.status_code == 201
+    assert response.get_json()['phone_number'] == '+12025550100'
+
+    response = client.post('/api/patients/import', data='phone\n202-555-0100\n', content_type='text/csv')
+    assert (response.get_json()['inserted'], response.get_json()['skipped']) == (0, 1)
+    assert client.post('/api/patients', json={'phone_number': '+1 202 555 0100'}).status_code == 409
+    assert client.post('/api/patients', json={'phone_number': 'unknown'}).status_code == 400
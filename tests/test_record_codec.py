@@ -0,0 +1,131 @@
+"""
+Tests for compressed at-rest storage
+"""
+import sys
+import os
+import io
+import json
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import storage_integration
+from config import Config
+from services.record_codec import CodecRegistry, RecordCodec, train_dictionary, zstandard
+from services.segment_log import COMPRESSED_SUFFIX, SegmentLog
+from storage_integration import LocalJSONStorage
+
+CODECS = ['zlib'] + (['zstd'] if zstandard is not None else [])
+
+SAMPLES = [
+    json.dumps({'call_id': f'call_{i}', 'consent_given': True,
+                'hpi': {'pain_level': {'value': str(i % 10)}, 'chief_complaint': {'value': 'headache'}}}).encode()
+    for i in range(200)
+]
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_codec_roundtrip_with_dictionary(name):
+    """Test records roundtrip with a trained dictionary, and the dictionary helps small records"""
+    plain = RecordCodec(name)
+    with_dict = RecordCodec(name, dictionary=train_dictionary(SAMPLES, name, size=4096), dictionary_id='d')
+    record = SAMPLES[7]
+
+    assert plain.decompress(plain.compress(record)) == record
+    assert with_dict.decompress(with_dict.compress(record)) == record
+    assert len(with_dict.compress(record)) < len(plain.compress(record))
+
+    stats = with_dict.stats()
+    assert stats['dictionary'] == 'd'
+    assert stats['ratio'] > 1
+    assert stats['encode_mb_per_second'] and stats['decode_mb_per_second']
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_stream_reader(name):
+    """Test a compressed stream is decoded incrementally"""
+    codec = RecordCodec(name)
+    payload = b''.join(SAMPLES)
+    reader = codec.stream_reader(io.BytesIO(codec.compress(payload)))
+
+    chunks = iter(lambda: reader.read(1000), b'')
+    assert b''.join(chunks) == payload
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_compressed_segment_log(tmp_path, name):
+    """Test compressed segments read back by offset, stream in order and recover after a torn write"""
+    log = SegmentLog(tmp_path, compression=name)
+    entries = [log.append('intake', f'call_{i}', {'note': 'x' * 200, 'i': i}) for i in range(5)]
+    log.append('transcript', 'call_0', [{'text': 'hello'}])
+
+    assert entries[0]['segment'].endswith(COMPRESSED_SUFFIX)
+    assert (tmp_path / entries[0]['segment']).stat().st_size < 5 * 200
+    assert log.read(entries[3]) == {'note': 'x' * 200, 'i': 3}
+    assert [r['data']['i'] for r in log.iter_records('intake')] == list(range(5))
+    log.close()
+
+    with open(tmp_path / entries[0]['segment'], 'ab') as f:
+        f.write(b'\x00\x00\x01\x00partial')
+    reopened = SegmentLog(tmp_path, compression=name)
+    assert len(reopened.find()) == 6
+    assert reopened.read(entries[4])['i'] == 4
+    reopened.close()
+
+
+def test_new_dictionary_starts_new_segment(tmp_path):
+    """Test training a dictionary rolls over, and older segments still decode with their own codec"""
+    log = SegmentLog(tmp_path, compression='zlib')
+    before = [log.append('intake', f'call_{i}', {'note': f'visit {i}'}) for i in range(20)]
+
+    dictionary_id = log.train_dictionary('intake', samples=10)
+    after = log.append('intake', 'call_new', {'note': 'visit new'})
+
+    assert after['segment'] != before[0]['segment']
+    assert log.compression_stats()['dictionary'] == dictionary_id
+    log.close()
+
+    reopened = SegmentLog(tmp_path, compression='zlib')
+    assert reopened.read(before[0]) == {'note': 'visit 0'}
+    assert reopened.read(after) == {'note': 'visit new'}
+    reopened.close()
+
+
+def test_uncompressed_segments_readable_after_enabling(tmp_path):
+    """Test plain segments written before compression was enabled stay readable"""
+    log = SegmentLog(tmp_path)
+    plain = log.append('intake', 'call_1', {'a': 1})
+    log.close()
+
+    log = SegmentLog(tmp_path, compression='zlib')
+    compressed = log.append('intake', 'call_2', {'b': 2})
+    assert compressed['segment'] != plain['segment']
+    assert [log.read(e) for e in log.find()] == [{'b': 2}, {'a': 1}]
+    log.close()
+
+
+def test_dictionary_store_current(tmp_path):
+    """Test the current dictionary is persisted for new registries"""
+    dictionary_id = CodecRegistry(tmp_path, 'zlib').train(SAMPLES)
+    registry = CodecRegistry(tmp_path, 'zlib')
+    assert registry.writer().dictionary_id == dictionary_id
+
+
+def test_json_storage_compression(monkeypatch):
+    """Test the JSON backend writes compressed files that index, read and rebuild transparently"""
+    monkeypatch.setattr(Config, 'STORAGE_COMPRESSION', 'zlib')
+
+    path = LocalJSONStorage.save_intake_note('call_1', {'pain_level': '7', 'notes': 'x' * 500})
+    transcript_path = LocalJSONStorage.save_transcript('call_1', [{'text': 'hello'}])
+
+    assert path.endswith('.json.zz')
+    assert transcript_path.endswith('.json.zz')
+    assert os.path.getsize(path) < 500
+    assert LocalJSONStorage.get_intake_notes(call_id='call_1') == [{'pain_level': '7', 'notes': 'x' * 500}]
+
+    assert LocalJSONStorage.rebuild_index() == 1
+    entry = storage_integration.get_intake_index().find()[0]
+    assert entry['encoding'] == 'zlib'
+    assert LocalJSONStorage.get_intake_notes()[0]['pain_level'] == '7'
@@ -0,0 +1,114 @@
+"""
+Tests for call versioning, ETags and the completed-call response cache
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import db, Call, Transcript
+from routes import api_routes, call_routes
+from services.response_cache import response_cache, LRUResponseCache
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp, call_routes.bp]
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with an empty response cache"""
+    response_cache.clear()
+    return app
+
+
+def make_call(status='answered'):
+    """Create a call"""
+    call = Call(status=status, to_number='+12025551234')
+    db.session.add(call)
+    db.session.commit()
+    return call
+
+
+def test_version_bumps_on_changes(app):
+    """Test call and transcript changes bump the call version"""
+    call = make_call()
+    assert call.version == 1
+
+    call.status = 'completed'
+    db.session.commit()
+    assert call.version == 2
+
+    db.session.add(Transcript(call_id=call.id, text='hello', sequence=0))
+    db.session.commit()
+    assert call.version == 3
+
+
+def test_version_bump_keeps_concurrent_increments(app):
+    """Test the version is incremented in SQL, not from a stale value loaded earlier"""
+    call = make_call()
+    assert call.version == 1
+    # Another writer bumps the version after this session loaded the call
+    db.session.execute(db.update(Call).where(Call.id == call.id).values(version=Call.version + 1),
+                       execution_options={'synchronize_session': False})
+
+    call.status = 'completed'
+    db.session.commit()
+    assert call.version == 3
+
+
+def test_if_none_match_returns_304(client):
+    """Test conditional GET on call detail, intake data and transcripts"""
+    call = make_call()
+
+    for path in (f'/api/calls/{call.id}', f'/api/calls/{call.id}/intake-data', f'/api/calls/{call.id}/transcripts'):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+
+        response = client.get(path, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+    db.session.add(Transcript(call_id=call.id, text='hello', sequence=0))
+    db.session.commit()
+    response = client.get(f'/api/calls/{call.id}/transcripts', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 1
+
+
+def test_etag_varies_with_projection(client):
+    """Test different field selections get different ETags"""
+    call = make_call()
+    full = client.get(f'/api/calls/{call.id}').headers['ETag']
+    summary = client.get(f'/api/calls/{call.id}?view=summary').headers['ETag']
+    assert full != summary
+
+
+def test_completed_calls_are_cached(client):
+    """Test completed call responses are served from the LRU cache"""
+    call = make_call(status='completed')
+
+    first = client.get(f'/api/calls/{call.id}')
+    second = client.get(f'/api/calls/{call.id}')
+    assert first.data == second.data
+    assert response_cache.stats()['hits'] == 1
+
+    assert client.get('/api/calls/999').status_code == 404
+
+
+def test_lru_eviction():
+    """Test least recently used entries are evicted"""
+    cache = LRUResponseCache(max_entries=2)
+    cache.set('a', b'1', ttl=60)
+    cache.set('b', b'2', ttl=60)
+    cache.get('a')
+    cache.set('c', b'3', ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+    cache.set('d', b'4', ttl=-1)
+    assert cache.get('d') is None
@@ -0,0 +1,123 @@
+"""
+Tests for fingerprinted static assets and JSON response compression
+"""
+import pytest
+import sys
+import os
+import gzip
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import jsonify, render_template_string
+from models import db, Call, Transcript
+from routes import asset_routes, api_routes
+from services import static_assets
+from services.compression import ResponseCompressor, CompressionBudget
+from services.response_cache import response_cache
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    """Static directory with one script"""
+    (tmp_path / 'app.js').write_text('console.log("intake");\n' * 200)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [asset_routes.bp, api_routes.bp]
+
+
+@pytest.fixture
+def app(app, static_dir):
+    """The shared app with built assets and response compression"""
+    static_assets.build_assets(static_dir)
+    static_assets.init_app(app, static_dir)
+    ResponseCompressor(min_size=1024, level=5).init_app(app)
+    response_cache.clear()
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app
+
+
+def test_build_writes_fingerprinted_and_compressed_files(static_dir):
+    """Test the build writes hashed copies, .gz siblings and a manifest"""
+    manifest = static_assets.build_assets(static_dir)
+    hashed = manifest['app.js']
+    assert hashed.startswith('app.') and hashed.endswith('.js') and hashed != 'app.js'
+
+    dist = os.path.join(static_dir, 'dist')
+    with open(os.path.join(dist, hashed + '.gz'), 'rb') as f:
+        assert gzip.decompress(f.read()).startswith(b'console.log')
+    assert static_assets.load_manifest(static_dir) == manifest
+
+
+def test_asset_url_uses_manifest(app):
+    """Test templates link fingerprinted names and fall back to /static"""
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('app.js') }}")
+        assert url.startswith('/assets/app.') and url.endswith('.js')
+        assert render_template_string("{{ asset_url('missing.css') }}") == '/static/missing.css'
+
+
+def test_serves_precompressed_immutable_asset(app, client):
+    """Test the gzip sibling is served with immutable cache headers"""
+    with app.test_request_context():
+        url = render_template_string("{{ asset_url('app.js') }}")
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.mimetype in ('text/javascript', 'application/javascript')
+    assert gzip.decompress(response.data).startswith(b'console.log')
+
+    response = client.get(url)
+    assert 'Content-Encoding' not in response.headers
+
+    assert client.get('/assets/../app.js').status_code == 404
+
+
+def test_large_json_is_compressed(app, client):
+    """Test JSON over the threshold is gzipped and keeps working with conditional GET"""
+    call = Call(status='completed')
+    db.session.add(call)
+    db.session.flush()
+    for i in range(50):
+        db.session.add(Transcript(call_id=call.id, text='Patient reports chest pain ' * 3, sequence=i))
+    db.session.commit()
+
+    response = client.get(f'/api/calls/{call.id}/transcripts', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['total'] == 50
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+
+    response = client.get(f'/api/calls/{call.id}/transcripts',
+                          headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = client.get(f'/api/calls/{call.id}/transcripts')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['total'] == 50
+
+
+def test_small_json_is_not_compressed(client):
+    """Test JSON under the threshold is sent as-is"""
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == {'ok': True}
+
+
+def test_budget_limits_compression():
+    """Test the byte budget refuses work once spent"""
+    budget = CompressionBudget(bytes_per_second=10000)
+    assert budget.take(8000)
+    assert not budget.take(8000)
@@ -0,0 +1,186 @@
+"""
+Tests for pushes to external storage systems
+"""
+import sys
+import os
+import json
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from services.storage_service import StorageService
+from services.circuit_breaker import get_breaker, reset_breakers
+from services.json_stream import iter_json, iter_ndjson
+
+
+@pytest.fixture
+def slow_targets(monkeypatch):
+    """Enable every target and replace each push with a sleep of the given latency"""
+    monkeypatch.setattr(Config, 'MEMVERGE_ENABLED', True)
+    monkeypatch.setattr(Config, 'APERTUREDATA_ENABLED', True)
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', 'http://backend.test/intake')
+    reset_breakers()
+
+    def set_latencies(memverge, aperturedata, backend):
+        def stub(latency, result):
+            def push(call_data, transcript_data, idempotency_key=None):
+                time.sleep(latency)
+                return result
+            return staticmethod(push)
+
+        monkeypatch.setattr(StorageService, 'push_to_memverge', stub(memverge, 'mv_1'))
+        monkeypatch.setattr(StorageService, 'push_to_aperturedata', stub(aperturedata, 'ad_1'))
+        monkeypatch.setattr(StorageService, 'push_to_backend', stub(backend, True))
+
+    return set_latencies
+
+
+def test_push_all_runs_targets_concurrently(slow_targets):
+    """Test total time approaches the slowest target, not the sum"""
+    slow_targets(0.2, 0.2, 0.2)
+
+    start = time.monotonic()
+    results = StorageService.push_all({'id': 1}, [])
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert results['memverge_id'] == 'mv_1'
+    assert results['aperturedata_id'] == 'ad_1'
+    assert results['backend_pushed'] is True
+    assert set(results['timings']) == {'memverge', 'aperturedata', 'backend'}
+    assert results['incomplete'] == []
+
+
+def test_push_all_records_partial_results(slow_targets):
+    """Test a target slower than its timeout is reported incomplete without blocking the rest"""
+    slow_targets(0.01, 1.0, 0.01)
+
+    start = time.monotonic()
+    results = StorageService.push_all({'id': 1}, [], timeout=0.2)
+
+    assert time.monotonic() - start < 0.5
+    assert results['memverge_id'] == 'mv_1'
+    assert results['backend_pushed'] is True
+    assert results['aperturedata_id'] is None
+    assert results['incomplete'] == ['aperturedata']
+
+
+def test_push_all_deadline(slow_targets):
+    """Test the overall deadline caps the wait even when per-target timeouts are longer"""
+    slow_targets(0.6, 0.6, 0.01)
+
+    start = time.monotonic()
+    results = StorageService.push_all({'id': 1}, [], timeout=5, deadline=0.2)
+
+    assert time.monotonic() - start < 0.5
+    assert results['incomplete'] == ['memverge', 'aperturedata']
+    assert results['backend_pushed'] is True
+
+
+def test_push_all_skips_disabled_targets(monkeypatch):
+    """Test nothing is pushed when no target is configured"""
+    monkeypatch.setattr(Config, 'MEMVERGE_ENABLED', False)
+    monkeypatch.setattr(Config, 'APERTUREDATA_ENABLED', False)
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', None)
+
+    results = StorageService.push_all({'id': 1}, [])
+    assert results['timings'] == {}
+    assert results['incomplete'] == []
+
+
+def test_push_all_skips_open_circuits(slow_targets):
+    """Test a target with an open circuit is skipped without waiting for it"""
+    slow_targets(0.01, 1.0, 0.01)
+    breaker = get_breaker('aperturedata')
+    for _ in range(breaker.min_calls):
+        breaker.call(lambda: None)
+
+    start = time.monotonic()
+    results = StorageService.push_all({'id': 1}, [])
+
+    assert time.monotonic() - start < 0.5
+    assert results['incomplete'] == ['aperturedata']
+    assert results['memverge_id'] == 'mv_1'
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+        self.content = b'' if body is None else b'{}'
+        self.text = ''
+
+    def json(self):
+        return self._body
+
+
+def test_push_batch_to_backend_formats_and_acks(monkeypatch):
+    """Test batches are sent as a JSON array or NDJSON and per-item acks are returned"""
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', 'http://backend.test/intake')
+    sent = []
+
+    def post(url, data, headers, timeout):
+        sent.append((headers['Content-Type'], b''.join(data).decode()))
+        return FakeResponse(207, {'results': [{'idempotency_key': 'k1', 'ok': True},
+                                              {'idempotency_key': 'k2', 'ok': False, 'error': 'bad'}]})
+
+    monkeypatch.setattr('services.storage_service.requests.post', post)
+    items = [('k1', {'id': 1}, []), ('k2', {'id': 2}, [])]
+
+    acks = StorageService.push_batch_to_backend(items, batch_format='json')
+    assert acks == {'k1': (True, None), 'k2': (False, 'bad')}
+    content_type, body = sent[-1]
+    assert content_type == 'application/json'
+    assert [item['idempotency_key'] for item in json.loads(body)] == ['k1', 'k2']
+
+    StorageService.push_batch_to_backend(items, batch_format='ndjson')
+    content_type, body = sent[-1]
+    assert content_type == 'application/x-ndjson'
+    assert [json.loads(line)['call']['id'] for line in body.splitlines()] == [1, 2]
+
+    monkeypatch.setattr('services.storage_service.requests.post', lambda *args, **kwargs: FakeResponse(202))
+    assert StorageService.push_batch_to_backend(items) == {'k1': (True, None), 'k2': (True, None)}
+    monkeypatch.setattr('services.storage_service.requests.post', lambda *args, **kwargs: FakeResponse(503))
+    assert StorageService.push_batch_to_backend(items) is None
+
+
+def test_iter_json_matches_json_dumps_in_bounded_chunks():
+    """Test streamed encoding equals json.dumps and is cut into chunks near the chunk size"""
+    def segments():
+        for i in range(2000):
+            yield {'sequence': i, 'speaker': 'patient', 'text': 'It started two days ago ✓'}
+
+    payload = {'call': {'id': 1, 'intake_data': {'pain': 3}, 'tags': ('a', 'b')}, 'transcripts': segments()}
+    chunks = list(iter_json(payload, chunk_size=4096))
+
+    expected = dict(payload, transcripts=list(segments()))
+    assert b''.join(chunks).decode('utf-8') == json.dumps(expected, default=str)
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 4096 + 200
+
+    lines = b''.join(iter_ndjson([{'id': 1, 'rows': iter([1, 2])}, {'id': 2}])).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [{'id': 1, 'rows': [1, 2]}, {'id': 2}]
+
+
+def test_push_to_backend_streams_body(monkeypatch):
+    """Test the backend push sends a chunked body that reads transcripts lazily"""
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', 'http://backend.test/intake')
+    read = []
+
+    def segments():
+        for i in range(3):
+            read.append(i)
+            yield {'sequence': i}
+
+    def post(url, data, headers, timeout):
+        assert read == []  # Nothing is encoded before the request starts sending
+        body = json.loads(b''.join(data))
+        assert body['transcripts'] == [{'sequence': 0}, {'sequence': 1}, {'sequence': 2}]
+        return FakeResponse(200)
+
+    monkeypatch.setattr('services.storage_service.requests.post', post)
+    assert StorageService.push_to_backend({'id': 1}, segments(), idempotency_key='k1') is True
@@ -0,0 +1,166 @@
+"""
+Tests for hot/cold storage tiering
+"""
+import pytest
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from models import db, Call, CallAccess, Transcript
+from routes import api_routes
+from services import outbox as outbox_module
+from services.tiering import InMemoryStore, TieringEngine
+
+
+@pytest.fixture
+def blueprints():
+    """Routes under test"""
+    return [api_routes.bp]
+
+
+@pytest.fixture
+def config():
+    """Tiering enabled"""
+    return {
+        'TIERING_ENABLED': True,
+        'TIERING_DEMOTE_AFTER_DAYS': 7,
+        'TIERING_HOT_MAX_CALLS': 0,
+        'TIERING_HOT_MAX_BYTES': 0,
+        'TIERING_BATCH_SIZE': 2
+    }
+
+
+@pytest.fixture
+def engine(app):
+    return TieringEngine(hot=InMemoryStore('memverge'), cold=InMemoryStore('aperturedata'))
+
+
+def add_hot_call(engine, call_id, ended_days_ago, text='hello'):
+    """A completed call stored in the hot tier"""
+    call = Call(id=call_id, call_control_id=f'cc_{call_id}', status='completed',
+                ended_at=datetime.utcnow() - timedelta(days=ended_days_ago))
+    db.session.add(call)
+    db.session.add(Transcript(call_id=call_id, speaker='patient', text=text, sequence=1))
+    db.session.flush()
+    call.memverge_id = engine.hot.put(call.to_dict(), [t.to_dict() for t in call.transcripts])
+    db.session.commit()
+    return call
+
+
+def test_idle_calls_move_to_cold_storage(engine):
+    """Test calls unread past the threshold are copied, verified and evicted from hot storage"""
+    for call_id, age in ((1, 30), (2, 10), (3, 1)):
+        add_hot_call(engine, call_id, age)
+
+    assert engine.plan() == [1, 2]
+    assert engine.run_once() == {'planned': 2, 'demoted': 2, 'failed': 0}
+
+    calls = {call.id: call for call in Call.query}
+    assert calls[1].memverge_id is None and calls[1].aperturedata_id in engine.cold.objects
+    assert calls[3].memverge_id in engine.hot.objects and calls[3].aperturedata_id is None
+    assert len(engine.hot.objects) == 1
+    assert engine.cold.objects[calls[1].aperturedata_id]['transcripts'][0]['text'] == 'hello'
+    assert engine.stats()['hot'] == 1
+    assert engine.stats()['cold_only'] == 2
+
+
+def test_buffered_reads_are_written_after_a_time_bound(engine, monkeypatch):
+    """Test a few reads are written without waiting for a full buffer or a tiering run"""
+    monkeypatch.setattr(Config, 'TIERING_ACCESS_FLUSH_SECONDS', 0.05)
+    add_hot_call(engine, 1, 30)
+    engine.record_access(1)
+
+    deadline = time.monotonic() + 5
+    while db.session.get(CallAccess, 1) is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+        db.session.rollback()
+    assert db.session.get(CallAccess, 1).read_count == 1
+    assert engine.flush_accesses() == 0
+
+
+def test_reads_of_unknown_calls_are_not_recorded(app, engine):
+    """Test a 404 read is not buffered, and unknown ids are dropped when writing reads"""
+    from services.tiering import tiering as shared
+    shared.flush_accesses()
+    assert app.test_client().get('/api/calls/999/intake-data').status_code == 404
+    assert shared.flush_accesses() == 0
+
+    add_hot_call(engine, 1, 30)
+    engine.record_access(1)
+    engine.record_access(999)
+    assert engine.flush_accesses() == 1
+    assert [access.call_id for access in CallAccess.query] == [1]
+
+
+def test_recent_reads_keep_calls_hot(engine):
+    """Test a read resets the idle clock, and is recorded once flushed"""
+    add_hot_call(engine, 1, 30)
+    engine.record_access(1)
+    engine.record_access(1)
+    assert engine.flush_accesses() == 1
+
+    access = db.session.get(CallAccess, 1)
+    assert access.read_count == 2
+    assert engine.plan() == []
+
+    access.last_accessed_at = datetime.utcnow() - timedelta(days=8)
+    db.session.commit()
+    assert engine.plan() == [1]
+
+
+def test_size_caps_demote_least_recently_read(engine, monkeypatch):
+    """Test the hot caps demote the least recently read calls even before they are idle"""
+    add_hot_call(engine, 1, 3, text='a' * 100)
+    add_hot_call(engine, 2, 2, text='b' * 100)
+    add_hot_call(engine, 3, 1, text='c' * 100)
+
+    monkeypatch.setattr(Config, 'TIERING_HOT_MAX_CALLS', 2)
+    assert engine.plan() == [1]
+
+    monkeypatch.setattr(Config, 'TIERING_HOT_MAX_CALLS', 0)
+    monkeypatch.setattr(Config, 'TIERING_HOT_MAX_BYTES', 150)
+    assert engine.plan() == [1, 2]
+
+
+def test_unverified_copy_stays_hot(engine, monkeypatch):
+    """Test a call whose cold copy does not match is not evicted"""
+    add_hot_call(engine, 1, 30)
+    monkeypatch.setattr(engine.cold, 'get', lambda object_id: {'call': {'id': 1}, 'transcripts': []})
+
+    assert engine.run_once() == {'planned': 1, 'demoted': 0, 'failed': 1}
+    call = db.session.get(Call, 1)
+    assert call.memverge_id in engine.hot.objects
+    assert call.aperturedata_id is None
+
+
+def test_reads_go_through_either_tier(app, engine, monkeypatch):
+    """Test stored call data is served from the hot tier, then from the cold tier after demotion"""
+    monkeypatch.setattr(api_routes, 'tiering', engine)
+    add_hot_call(engine, 1, 30)
+    client = app.test_client()
+
+    data = client.get('/api/calls/1/stored').get_json()
+    assert (data['tier'], data['call']['id']) == ('memverge', 1)
+
+    assert engine.run_once()['planned'] == 0  # The read above counts as recent activity
+    engine.demote([1])
+    data = client.get('/api/calls/1/stored').get_json()
+    assert (data['tier'], data['transcripts'][0]['text']) == ('aperturedata', 'hello')
+    assert client.get('/api/calls/99/stored').status_code == 404
+
+
+def test_cold_target_is_not_pushed_at_completion(monkeypatch):
+    """Test completed calls go to hot storage only while tiering is on"""
+    monkeypatch.setattr(Config, 'MEMVERGE_ENABLED', True)
+    monkeypatch.setattr(Config, 'APERTUREDATA_ENABLED', True)
+    monkeypatch.setattr(Config, 'BACKEND_API_URL', None)
+
+    monkeypatch.setattr(Config, 'TIERING_ENABLED', True)
+    assert outbox_module.enabled_targets() == ['memverge']
+    monkeypatch.setattr(Config, 'TIERING_ENABLED', False)
+    assert outbox_module.enabled_targets() == ['memverge', 'aperturedata']
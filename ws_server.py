@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+WebSocket server for live call transcripts
+Usage: python ws_server.py [--port 8765]
+
+Viewers connect to ws://<host>:<port>/calls/<call_id>, or connect to / and send
+{"action": "subscribe", "call_id": <id>} messages.
+"""
+
+import argparse
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the live transcript WebSocket server')
+    parser.add_argument('--host', help='Host to bind (default: WS_HOST)')
+    parser.add_argument('--port', type=int, help='Port to bind (default: WS_PORT)')
+    args = parser.parse_args()
+    
+    from app import app, db
+    from services.live_transcript_ws import run
+    
+    with app.app_context():
+        db.create_all()
+    
+    run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()